@@ -2,15 +2,18 @@ from flask import Flask
 from flask_restful import Api
 from flask_cors import CORS
 from controllers.app_controller import AppExportApi
-from controllers.workflow_controller import WorkflowDraftApi, WorkflowListApi, WorkflowBatchExportApi, WorkflowRefreshApi, ApiTestApi
+from controllers.workflow_controller import WorkflowDraftApi, WorkflowListApi, WorkflowBatchExportApi, WorkflowRefreshApi, ApiTestApi, WorkflowIncrementalExportApi
+from controllers.export_job_controller import ExportJobListApi, ExportJobApi, ExportJobEventsApi, ExportJobDownloadApi
 from controllers.workflow_import_controller import (
     WorkflowImportApi, 
     WorkflowImportConfirmApi, 
     WorkflowBatchImportApi, 
+    WorkflowBatchImportStreamApi, 
     TargetInstancesApi, 
     TargetInstanceTestApi, 
     WorkflowFileValidateApi
 )
+from controllers.system_controller import HttpPoolStatsApi
 from services.config_service import config
 import os
 import logging
@@ -42,7 +45,11 @@ def create_app():
         raise
     
     # 配置CORS
-    CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])
+    CORS(
+        app,
+        origins=["http://localhost:3000", "http://localhost:3001"],
+        expose_headers=["Content-Disposition", "X-Export-Total", "X-Export-Since", "X-Export-Watermark"]
+    )
     
     # 创建API实例
     api = Api(app)
@@ -52,17 +59,28 @@ def create_app():
     api.add_resource(WorkflowDraftApi, "/api/apps/<string:app_id>/workflows/draft")
     api.add_resource(WorkflowListApi, "/api/workflows")
     api.add_resource(WorkflowBatchExportApi, "/api/workflows/batch-export")
+    api.add_resource(WorkflowIncrementalExportApi, "/api/workflows/incremental-export")
     api.add_resource(WorkflowRefreshApi, "/api/workflows/refresh")
     api.add_resource(ApiTestApi, "/api/test-connection")
     
+    # 异步导出任务相关路由
+    api.add_resource(ExportJobListApi, "/api/export-jobs")
+    api.add_resource(ExportJobApi, "/api/export-jobs/<string:job_id>")
+    api.add_resource(ExportJobEventsApi, "/api/export-jobs/<string:job_id>/events")
+    api.add_resource(ExportJobDownloadApi, "/api/export-jobs/<string:job_id>/download")
+    
     # 工作流导入相关路由
     api.add_resource(WorkflowImportApi, "/api/workflows/import")
     api.add_resource(WorkflowImportConfirmApi, "/api/workflows/import/<string:import_id>/confirm")
     api.add_resource(WorkflowBatchImportApi, "/api/workflows/batch-import")
+    api.add_resource(WorkflowBatchImportStreamApi, "/api/workflows/batch-import/stream")
     api.add_resource(TargetInstancesApi, "/api/target-instances")
     api.add_resource(TargetInstanceTestApi, "/api/target-instances/<string:instance_id>/test")
     api.add_resource(WorkflowFileValidateApi, "/api/workflows/validate")
     
+    # 系统状态相关路由
+    api.add_resource(HttpPoolStatsApi, "/api/system/http-pools")
+    
     return app
 
 if __name__ == "__main__":
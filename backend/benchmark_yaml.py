@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+YAML序列化性能对比：纯Python实现 vs libyaml实现
+
+用法: python benchmark_yaml.py [节点数] [重复次数]
+"""
+import sys
+import time
+import yaml
+from services.yaml_serializer import dump_yaml, load_yaml, LIBYAML_AVAILABLE
+
+CODE_TEMPLATE = '''def main(arg1: str, arg2: str) -> dict:
+    # 处理输入参数 🤖
+    result = {{"node": {index}, "text": arg1 + arg2}}
+    for i in range(10):
+        result[f"item_{{i}}"] = i * {index}
+    return {{"result": result}}
+'''
+
+PROMPT_TEMPLATE = (
+    "你是一个专业的助手 ✨，请根据以下上下文回答用户问题。\n"
+    "上下文: {{#context#}}\n"
+    "要求:\n"
+    "  1. 回答要简洁准确 \n"
+    "  2. 如果不知道答案，请直接说明 🙏\n"
+    "User question: {{#sys.query#}} - node {index}\t(tab)"
+)
+
+
+def build_dsl(node_count: int) -> dict:
+    """构造一个接近真实规模的工作流DSL"""
+    nodes = []
+    edges = []
+    for index in range(node_count):
+        node_type = ("llm", "code", "if-else", "template-transform")[index % 4]
+        data = {
+            "title": f"节点 {index} 🚀",
+            "type": node_type,
+            "desc": "这是一个用于性能测试的节点描述" * (index % 3 + 1),
+            "selected": False,
+            "variables": [
+                {"variable": f"var_{index}_{i}", "value_selector": ["sys", "query"]}
+                for i in range(3)
+            ],
+        }
+        if node_type == "llm":
+            data["prompt_template"] = [{"role": "system", "text": PROMPT_TEMPLATE.format(index=index)}]
+            data["model"] = {"provider": "openai", "name": "gpt-4o", "completion_params": {"temperature": 0.7}}
+        elif node_type == "code":
+            data["code"] = CODE_TEMPLATE.format(index=index)
+            data["code_language"] = "python3"
+        elif node_type == "template-transform":
+            data["template"] = "{{ arg1 }}\n\n  - 列表项 {{ arg2 }} 😀\n"
+        nodes.append({
+            "id": str(1711528914102 + index),
+            "type": "custom",
+            "data": data,
+            "position": {"x": 80 + index * 300, "y": 282},
+            "width": 244,
+            "height": 54,
+        })
+        if index:
+            edges.append({
+                "id": f"{1711528914102 + index - 1}-{1711528914102 + index}",
+                "source": str(1711528914102 + index - 1),
+                "target": str(1711528914102 + index),
+                "data": {"sourceType": nodes[index - 1]["data"]["type"], "targetType": node_type},
+            })
+    
+    return {
+        "app": {
+            "name": "性能测试工作流",
+            "mode": "workflow",
+            "icon": "🤖",
+            "icon_background": "#FFEAD5",
+            "description": "用于对比YAML序列化性能",
+            "use_icon_as_answer_icon": False,
+        },
+        "kind": "app",
+        "version": "1.0",
+        "workflow": {
+            "graph": {"nodes": nodes, "edges": edges},
+            "features": {"opening_statement": "你好 👋", "suggested_questions": []},
+            "environment_variables": [],
+            "conversation_variables": [],
+        },
+    }
+
+
+def timeit(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时(毫秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    
+    print(f'📦 libyaml available: {LIBYAML_AVAILABLE}')
+    data = build_dsl(node_count)
+    
+    expected = yaml.dump(data, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    actual = dump_yaml(data)
+    if actual != expected:
+        print('❌ dump_yaml output differs from yaml.dump')
+        sys.exit(1)
+    if load_yaml(actual) != yaml.safe_load(expected):
+        print('❌ load_yaml result differs from yaml.safe_load')
+        sys.exit(1)
+    print(f'✅ Output identical ({node_count} nodes, {len(expected.encode("utf-8")) // 1024} KB)')
+    
+    pure_dump = timeit(lambda: yaml.dump(data, allow_unicode=True, default_flow_style=False, sort_keys=False), repeat)
+    fast_dump = timeit(lambda: dump_yaml(data), repeat)
+    pure_load = timeit(lambda: yaml.safe_load(expected), repeat)
+    fast_load = timeit(lambda: load_yaml(expected), repeat)
+    
+    print(f'📝 dump: pure {pure_dump:.1f} ms, fast {fast_dump:.1f} ms ({pure_dump / fast_dump:.1f}x)')
+    print(f'📖 load: pure {pure_load:.1f} ms, fast {fast_load:.1f} ms ({pure_load / fast_load:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
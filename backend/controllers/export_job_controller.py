@@ -0,0 +1,106 @@
+from flask import request, send_file
+from flask_restful import Resource, reqparse
+from services.export_job_service import export_job_service, JobStatus
+from services.event_stream import format_sse_event, sse_response, KEEPALIVE_COMMENT
+
+# SSE连接上没有新事件时发送心跳的间隔(秒)
+EVENTS_KEEPALIVE_INTERVAL = 15
+
+
+class ExportJobListApi(Resource):
+    def post(self):
+        """创建异步批量导出任务"""
+        parser = reqparse.RequestParser()
+        parser.add_argument("app_ids", type=list, location="json", required=True,
+                          help="应用ID列表")
+        parser.add_argument("include_secret", type=bool, default=False, location="json")
+        parser.add_argument("archive_format", type=str, default=None, location="json",
+                          help="归档格式：zip、zip-stored、tar.gz、tar.xz 或 tar.zst")
+        parser.add_argument("compression_level", type=int, default=None, location="json")
+        args = parser.parse_args()
+        
+        if not args["app_ids"]:
+            return {"error": "应用ID列表不能为空"}, 400
+        
+        try:
+            job = export_job_service.create_job(
+                args["app_ids"], args["include_secret"], args["archive_format"], args["compression_level"]
+            )
+            return job.to_dict(include_items=False), 202
+        
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+class ExportJobApi(Resource):
+    def get(self, job_id):
+        """获取导出任务状态和每个应用的导出进度"""
+        job = export_job_service.get_job(job_id)
+        if job is None:
+            return {"error": "导出任务不存在或已过期"}, 404
+        
+        return job.to_dict()
+    
+    def delete(self, job_id):
+        """取消进行中的导出任务，或删除已结束的任务及其产物"""
+        job = export_job_service.cancel_job(job_id)
+        if job is None:
+            return {"error": "导出任务不存在或已过期"}, 404
+        
+        return job.to_dict(include_items=False)
+
+
+class ExportJobEventsApi(Resource):
+    def get(self, job_id):
+        """以Server-Sent Events推送导出进度，每完成一个应用推送一条 progress 事件，结束时推送 done 事件"""
+        job = export_job_service.get_job(job_id)
+        if job is None:
+            return {"error": "导出任务不存在或已过期"}, 404
+        
+        # 断线重连时从上次收到的事件之后继续推送
+        try:
+            cursor = int(request.headers.get("Last-Event-ID", -1)) + 1
+        except ValueError:
+            cursor = 0
+        
+        def generate():
+            nonlocal cursor
+            while True:
+                events, finished = job.wait_events(cursor, EVENTS_KEEPALIVE_INTERVAL)
+                if not events and not finished:
+                    yield KEEPALIVE_COMMENT
+                    continue
+                
+                for event in events:
+                    yield format_sse_event(event["event"], event["data"], cursor)
+                    cursor += 1
+                
+                if finished and cursor >= len(job.events):
+                    return
+        
+        return sse_response(generate())
+
+
+class ExportJobDownloadApi(Resource):
+    def get(self, job_id):
+        """下载已完成导出任务的归档"""
+        job = export_job_service.get_job(job_id)
+        if job is None:
+            return {"error": "导出任务不存在或已过期"}, 404
+        
+        if job.status != JobStatus.COMPLETED or job.archive_path is None:
+            return {"error": f"导出任务尚未完成，当前状态: {job.status.value}"}, 409
+        
+        try:
+            return send_file(
+                job.archive_path.resolve(),
+                mimetype=job.writer.mimetype,
+                as_attachment=True,
+                download_name=job.filename
+            )
+        
+        except FileNotFoundError:
+            return {"error": "导出文件已被清理"}, 410
@@ -0,0 +1,12 @@
+from flask_restful import Resource
+from services.http_session_registry import http_session_registry
+from services.single_flight import single_flight
+
+
+class HttpPoolStatsApi(Resource):
+    def get(self):
+        """获取各HTTP会话的请求数和连接池使用情况，以及并发读请求的合并统计"""
+        try:
+            return {"sessions": http_session_registry.stats(), "coalescing": single_flight.stats()}
+        except Exception as e:
+            return {"error": str(e)}, 500
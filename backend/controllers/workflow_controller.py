@@ -1,10 +1,9 @@
-from flask import request
+from flask import request, Response, stream_with_context
 from flask_restful import Resource, reqparse
 from services.workflow_service import WorkflowService
-from services.app_dsl_service import AppDslService
-import zipfile
-import io
-import json
+from services.batch_export_service import batch_export_service
+from services.archive_writer import create_archive_writer
+from services.incremental_export_service import incremental_export_service, to_utc_datetime, format_watermark
 from datetime import datetime
 
 class WorkflowDraftApi(Resource):
@@ -40,6 +39,7 @@ class ApiTestApi(Resource):
         try:
             from services.api_connector import api_connector
             result = api_connector.test_connection()
+            result["circuit"] = api_connector.get_circuit_info()
             
             if result["success"]:
                 return result, 200
@@ -57,7 +57,7 @@ class WorkflowRefreshApi(Resource):
             workflow_service.clear_cache()
             
             return {
-                "message": "缓存已清除，数据将在下次请求时刷新",
+                "message": "缓存已刷新",
                 "success": True
             }
         except Exception as e:
@@ -71,6 +71,8 @@ class WorkflowListApi(Resource):
         parser.add_argument("page", type=int, default=1, location="args", help="页码")
         parser.add_argument("page_size", type=int, default=20, location="args", help="每页数量")
         parser.add_argument("search", type=str, default="", location="args", help="搜索关键词")
+        parser.add_argument("after", type=str, default=None, location="args",
+                          help="游标分页：上一页返回的 next_cursor")
         args = parser.parse_args()
         
         # 验证分页参数
@@ -85,43 +87,31 @@ class WorkflowListApi(Resource):
             result = workflow_service.get_workflows_paginated(
                 page=page, 
                 page_size=page_size, 
-                search=search
+                search=search,
+                after=args["after"] or None
             )
             
             workflows = result.get("workflows", [])
             total = result.get("total", 0)
             
-            # 获取全量应用类型统计（不分页）
-            all_apps_result = workflow_service.get_workflows_paginated(
-                page=1, 
-                page_size=total if total > 0 else 100, 
-                search=search
-            )
-            all_apps = all_apps_result.get("workflows", [])
-            
-            # 计算应用类型统计
-            type_stats = {}
-            for workflow in all_apps:
-                app_mode = getattr(workflow, 'app_mode', 'workflow')
-                type_stats[app_mode] = type_stats.get(app_mode, 0) + 1
+            # 获取全量应用类型统计（不分页），由数据源聚合，不再拉取全部工作流
+            type_stats = workflow_service.get_mode_stats(search)
             
             # 转换为前端需要的格式
             workflow_list = []
-            for workflow in workflows:
+            for summary in workflows:
+                app_name = summary.app_name or f"工作流 {summary.app_id[:8]}"
                 workflow_list.append({
-                    "id": workflow.id,
-                    "app_id": workflow.app_id,
-                    "app_name": getattr(workflow, 'app_name', f"工作流 {workflow.app_id[:8]}"),
-                    "version": workflow.version,
-                    "name": getattr(workflow, 'app_name', f"工作流 {workflow.app_id[:8]}"),  # 兼容前端
-                    "node_count": len(workflow.graph.get("nodes", [])),
-                    "has_secret_variables": any(
-                        env.value_type == "secret" 
-                        for env in workflow.environment_variables
-                    ),
-                    "last_modified": datetime.now().isoformat(),
-                    "description": getattr(workflow, 'app_description', '') or '',
-                    "app_mode": getattr(workflow, 'app_mode', 'workflow')  # 添加应用模式字段
+                    "id": summary.id,
+                    "app_id": summary.app_id,
+                    "app_name": app_name,
+                    "version": summary.version,
+                    "name": app_name,  # 兼容前端
+                    "node_count": summary.node_count,
+                    "has_secret_variables": summary.has_secret_variables,
+                    "last_modified": (summary.updated_at or datetime.now()).isoformat(),
+                    "description": summary.app_description or '',
+                    "app_mode": summary.app_mode or 'workflow'  # 添加应用模式字段
                 })
             
             # 计算分页信息
@@ -134,12 +124,17 @@ class WorkflowListApi(Resource):
                     "page_size": page_size,
                     "total": total,
                     "total_pages": total_pages,
-                    "has_next": page < total_pages,
-                    "has_prev": page > 1
+                    "has_next": result.get("has_next", page < total_pages),
+                    "has_prev": page > 1,
+                    "next_cursor": result.get("next_cursor")
                 },
-                "stats": type_stats  # 添加全量应用类型统计
+                "stats": type_stats,  # 添加全量应用类型统计
+                "cache": workflow_service.get_cache_info()  # 应用列表缓存状态，非API模式为None
             }
             
+        except ValueError as e:
+            # 分页游标不合法或已失效
+            return {"error": str(e)}, 400
         except Exception as e:
             return {"error": str(e)}, 500
 
@@ -151,93 +146,97 @@ class WorkflowBatchExportApi(Resource):
                           help="应用ID列表")
         parser.add_argument("include_secret", type=bool, default=False, location="json")
         parser.add_argument("export_format", type=str, default="zip", location="json",
-                          choices=["zip", "individual"], help="导出格式：zip或individual")
+                          choices=["zip", "individual"], help="导出格式：zip(打包为归档)或individual")
+        parser.add_argument("archive_format", type=str, default=None, location="json",
+                          help="归档格式：zip、zip-stored、tar.gz、tar.xz 或 tar.zst，为空时使用配置")
+        parser.add_argument("compression_level", type=int, default=None, location="json")
         
         args = parser.parse_args()
         
-        workflow_service = WorkflowService()
-        
         try:
-            export_results = []
-            
-            # 为每个应用ID导出DSL
-            for app_id in args["app_ids"]:
-                try:
-                    # 获取工作流
-                    workflow = workflow_service.get_draft_workflow(app_id)
-                    if not workflow:
-                        workflow = workflow_service.create_default_workflow(app_id)
-                    
-                    # 获取或创建应用模型
-                    app_model = workflow_service.get_or_create_app_model(app_id)
-                    
-                    # 导出DSL
-                    dsl_data = AppDslService.export_dsl(
-                        app_model=app_model,
-                        include_secret=args["include_secret"]
-                    )
-                    
-                    # 生成文件名 - 使用工作流名称
-                    workflow_name = getattr(workflow, 'app_name', None) or app_model.name
-                    # 清理文件名，移除特殊字符
-                    safe_name = "".join(c for c in workflow_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                    safe_name = safe_name.replace(' ', '_')  # 空格替换为下划线
-                    if not safe_name:  # 如果名称为空，使用app_id作为fallback
-                        safe_name = f"workflow-{app_id[:8]}"
-                    
-                    filename = f"{safe_name}.yml"
-                    
-                    export_results.append({
-                        "app_id": app_id,
-                        "success": True,
-                        "data": dsl_data,
-                        "filename": filename,
-                        "workflow_name": workflow_name
-                    })
-                    
-                except Exception as e:
-                    export_results.append({
-                        "app_id": app_id,
-                        "success": False,
-                        "error": str(e),
-                        "workflow_name": f"工作流 {app_id[:8]}"
-                    })
-            
-            # 根据导出格式处理结果
+            # 打包格式：边导出边写入归档，以二进制流返回
             if args["export_format"] == "zip":
-                # 创建ZIP文件
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for result in export_results:
-                        if result["success"]:
-                            zip_file.writestr(result["filename"], result["data"])
-                        else:
-                            # 为失败的导出创建错误文件
-                            error_content = f"导出失败: {result['error']}"
-                            zip_file.writestr(f"ERROR-{result['app_id']}.txt", error_content)
-                
-                zip_buffer.seek(0)
+                try:
+                    writer = create_archive_writer(args["archive_format"], args["compression_level"])
+                except ValueError as e:
+                    return {"error": str(e)}, 400
                 
-                # 返回ZIP文件的base64编码
-                import base64
-                zip_base64 = base64.b64encode(zip_buffer.getvalue()).decode('utf-8')
+                filename = f"workflows-export-{datetime.now().strftime('%Y%m%d_%H%M%S')}{writer.extension}"
+                results = batch_export_service.iter_export(args["app_ids"], args["include_secret"])
                 
-                return {
-                    "export_format": "zip",
-                    "filename": f"workflows-export-{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-                    "data": zip_base64,
-                    "results": export_results,
-                    "success_count": sum(1 for r in export_results if r["success"]),
-                    "total_count": len(export_results)
-                }
-            else:
-                # 返回单独的文件
-                return {
-                    "export_format": "individual",
-                    "results": export_results,
-                    "success_count": sum(1 for r in export_results if r["success"]),
-                    "total_count": len(export_results)
-                }
+                response = Response(
+                    stream_with_context(batch_export_service.stream_archive(results, writer)),
+                    mimetype=writer.mimetype
+                )
+                response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+                response.headers["X-Export-Total"] = str(len(args["app_ids"]))
+                # 禁止Nginx缓冲，保证分块及时下发
+                response.headers["X-Accel-Buffering"] = "no"
+                return response
+            
+            # 返回单独的文件
+            export_results = list(
+                batch_export_service.iter_export(args["app_ids"], args["include_secret"])
+            )
+            return {
+                "export_format": "individual",
+                "results": export_results,
+                "success_count": sum(1 for r in export_results if r["success"]),
+                "total_count": len(export_results)
+            }
                 
         except Exception as e:
-            return {"error": str(e)}, 500 
\ No newline at end of file
+            return {"error": str(e)}, 500 
+
+class WorkflowIncrementalExportApi(Resource):
+    def get(self):
+        """获取当前数据源已保存的增量导出水位线"""
+        try:
+            watermark = incremental_export_service.get_watermark()
+            return {
+                "source": incremental_export_service.get_source_key(),
+                "watermark": format_watermark(watermark)
+            }
+        except Exception as e:
+            return {"error": str(e)}, 500
+    
+    def post(self):
+        """增量导出：只导出水位线之后变更过的应用，以归档流返回，新水位线通过响应头和manifest.json返回"""
+        parser = reqparse.RequestParser()
+        parser.add_argument("since", location="json", default=None,
+                          help="起始时间（ISO 8601或Unix时间戳），为空时使用已保存的水位线")
+        parser.add_argument("include_secret", type=bool, default=False, location="json")
+        parser.add_argument("commit_watermark", type=bool, default=True, location="json",
+                          help="导出成功后是否保存新水位线")
+        parser.add_argument("archive_format", type=str, default=None, location="json")
+        parser.add_argument("compression_level", type=int, default=None, location="json")
+        args = parser.parse_args()
+        
+        try:
+            since = to_utc_datetime(args["since"])
+            writer = create_archive_writer(args["archive_format"], args["compression_level"])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
+        try:
+            if since is None:
+                since = incremental_export_service.get_watermark()
+            app_ids, watermark = incremental_export_service.find_changed_apps(since)
+            
+            filename = f"workflows-incremental-{datetime.now().strftime('%Y%m%d_%H%M%S')}{writer.extension}"
+            response = Response(
+                stream_with_context(incremental_export_service.stream_export(
+                    app_ids, since, watermark, writer, args["include_secret"], args["commit_watermark"]
+                )),
+                mimetype=writer.mimetype
+            )
+            response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+            response.headers["X-Export-Total"] = str(len(app_ids))
+            response.headers["X-Export-Since"] = format_watermark(since) or ""
+            response.headers["X-Export-Watermark"] = format_watermark(watermark) or ""
+            # 禁止Nginx缓冲，保证分块及时下发
+            response.headers["X-Accel-Buffering"] = "no"
+            return response
+        
+        except Exception as e:
+            return {"error": str(e)}, 500
@@ -1,7 +1,11 @@
 from flask import request, jsonify
 from flask_restful import Resource
 import logging
+import yaml
+from typing import Dict, Any, Optional
 from services.workflow_import_service import workflow_import_service
+from services.yaml_serializer import load_yaml
+from services.event_stream import format_sse_event, sse_response
 import json
 
 logger = logging.getLogger(__name__)
@@ -88,6 +92,29 @@ class WorkflowImportConfirmApi(Resource):
             return {'error': f'服务器内部错误: {str(e)}'}, 500
 
 
+def _validate_batch_import_request(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """校验批量导入请求，返回错误信息，校验通过时返回None"""
+    # 验证必需参数
+    if not data:
+        return '请求数据不能为空'
+    
+    if not data.get('target_instance_id'):
+        return '目标实例ID不能为空'
+    
+    files = data.get('files', [])
+    if not files:
+        return '工作流文件列表不能为空'
+    
+    # 验证文件数据
+    for i, file_data in enumerate(files):
+        if not file_data.get('filename'):
+            return f'文件 {i+1} 缺少文件名'
+        if not file_data.get('content'):
+            return f'文件 {i+1} 内容不能为空'
+    
+    return None
+
+
 class WorkflowBatchImportApi(Resource):
     """批量工作流导入API"""
     
@@ -96,31 +123,13 @@ class WorkflowBatchImportApi(Resource):
         try:
             data = request.get_json()
             
-            # 验证必需参数
-            if not data:
-                return {'error': '请求数据不能为空'}, 400
-            
-            target_instance_id = data.get('target_instance_id')
-            if not target_instance_id:
-                return {'error': '目标实例ID不能为空'}, 400
-            
-            files = data.get('files', [])
-            if not files:
-                return {'error': '工作流文件列表不能为空'}, 400
-            
-            # 验证文件数据
-            for i, file_data in enumerate(files):
-                if not file_data.get('filename'):
-                    return {'error': f'文件 {i+1} 缺少文件名'}, 400
-                if not file_data.get('content'):
-                    return {'error': f'文件 {i+1} 内容不能为空'}, 400
-            
-            # 获取导入选项
-            import_options = data.get('import_options', {})
+            error = _validate_batch_import_request(data)
+            if error:
+                return {'error': error}, 400
             
             # 执行批量导入
             result = workflow_import_service.batch_import_workflows(
-                target_instance_id, files, import_options
+                data['target_instance_id'], data['files'], data.get('import_options', {})
             )
             
             return result, 200
@@ -130,6 +139,54 @@ class WorkflowBatchImportApi(Resource):
             return {'error': f'服务器内部错误: {str(e)}'}, 500
 
 
+class WorkflowBatchImportStreamApi(Resource):
+    """批量工作流导入API（Server-Sent Events推送进度）"""
+    
+    def post(self):
+        """
+        批量导入工作流，每导入完一个文件推送一条 progress 事件，结束时推送 done 事件
+        
+        客户端断开连接即取消导入，尚未开始的文件不再导入。
+        """
+        data = request.get_json(silent=True)
+        error = _validate_batch_import_request(data)
+        if error:
+            return {'error': error}, 400
+        
+        files = data['files']
+        results = workflow_import_service.iter_batch_import(
+            data['target_instance_id'], files, data.get('import_options', {})
+        )
+        
+        def generate():
+            completed = []
+            yield format_sse_event('start', {'total_count': len(files)})
+            try:
+                for result in results:
+                    completed.append(result)
+                    yield format_sse_event('progress', {
+                        **result,
+                        'completed_count': len(completed),
+                        'total_count': len(files)
+                    }, result['index'])
+                
+                summary = workflow_import_service.summarize_import_results(completed, len(files))
+                yield format_sse_event('done', summary)
+            
+            except GeneratorExit:
+                logger.info(f"客户端断开连接，批量导入已取消，已完成 {len(completed)}/{len(files)} 个文件")
+                raise
+            
+            except Exception as e:
+                logger.exception(f"批量导入工作流时发生错误: {e}")
+                yield format_sse_event('error', {'error': f'服务器内部错误: {str(e)}'})
+            
+            finally:
+                results.close()
+        
+        return sse_response(generate())
+
+
 class TargetInstancesApi(Resource):
     """目标实例列表API"""
     
@@ -175,8 +232,7 @@ class WorkflowFileValidateApi(Resource):
             
             # 验证YAML格式
             try:
-                import yaml
-                yaml_data = yaml.safe_load(yaml_content)
+                yaml_data = load_yaml(yaml_content)
                 
                 if not isinstance(yaml_data, dict):
                     return {'valid': False, 'error': 'YAML内容必须是一个对象'}, 200
@@ -92,4 +92,31 @@ class Workflow(BaseModel):
                 "value_type": env_var.value_type
             })
         
-        return workflow_dict 
\ No newline at end of file
+        return workflow_dict 
+
+
+class WorkflowSummary(BaseModel):
+    """工作流列表项摘要，只包含列表页展示需要的字段，不携带graph等完整内容"""
+    id: str
+    app_id: str
+    version: str = "draft"
+    app_name: Optional[str] = None
+    app_description: Optional[str] = None
+    app_mode: Optional[str] = None
+    node_count: int = 0
+    has_secret_variables: bool = False
+    updated_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_workflow(cls, workflow: Workflow) -> "WorkflowSummary":
+        """根据完整的工作流对象生成摘要"""
+        return cls(
+            id=workflow.id,
+            app_id=workflow.app_id,
+            version=workflow.version,
+            app_name=workflow.app_name,
+            app_description=workflow.app_description,
+            app_mode=workflow.app_mode,
+            node_count=len(workflow.graph.get("nodes", [])),
+            has_secret_variables=any(env.value_type == "secret" for env in workflow.environment_variables)
+        )
@@ -1,14 +1,30 @@
 import json
 import logging
 import time
-from typing import Dict, Any, Optional, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urljoin
 import requests
-from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
 from .config_service import config
-from models.app import App, Workflow, EnvironmentVariable, AppMode
+from .pagination import locate_after
+from .search_index import AppSearchIndex
+from .cache_backend import cache_backend, app_detail_cache
+from .async_api_client import AsyncAPIClient
+from .http_session_registry import http_session_registry, SOURCE_SESSION
+from .token_manager import token_manager
+from .single_flight import single_flight, make_key
+from models.app import App, Workflow, WorkflowSummary, EnvironmentVariable, AppMode
+
+# 抓取应用列表时同时请求的默认分页数
+DEFAULT_CRAWL_CONCURRENCY = 4
+# 应用列表缓存的默认有效期(秒)
+DEFAULT_CACHE_TTL = 300
+# 缓存过期后仍可先返回旧数据、同时在后台刷新的默认时长(秒)
+DEFAULT_STALE_WHILE_REVALIDATE = 3600
+
 
 class APIConnector:
     """API连接器，用于通过Dify API获取数据"""
@@ -16,118 +32,80 @@ class APIConnector:
     def __init__(self):
         self.config = config
         self.session = self._create_session()
+        self.async_client = AsyncAPIClient(self)  # 批量读取时使用的异步客户端
         self.base_url = None
         self.headers = {}
-        # 添加超时配置
-        self.timeout = 30  # 默认30秒超时
+        # 添加超时配置: (连接超时, 读取超时)
+        self.timeout = http_session_registry.get_timeout(30)
         # 添加简单缓存
         self._workflow_apps_cache = None
+        self._app_positions = None  # 缓存列表中应用ID到位置的索引，用于游标分页
+        self._search_index = None  # 缓存列表的搜索索引，随缓存一起重建
         self._cache_timestamp = None
-        self._cache_ttl = 300  # 缓存5分钟
-        # 添加token管理
-        self._access_token = None
-        self._refresh_token = None
-        self._token_expiry = None
+        self._refresh_lock = threading.Lock()  # 同一时间只有一个线程抓取应用列表
+        self._refresh_state_lock = threading.Lock()
+        self._refreshing = False  # 是否有后台刷新正在进行
         self._init_api_config()
     
+    @property
+    def _cache_ttl(self) -> int:
+        """缓存有效期，读取 cache.ttl 配置"""
+        return int(self.config.get_cache_config().get('ttl', DEFAULT_CACHE_TTL))
+    
+    @property
+    def _cache_stale_ttl(self) -> int:
+        """缓存过期后仍可直接使用的时长，读取 cache.stale_while_revalidate 配置"""
+        return int(self.config.get_cache_config().get('stale_while_revalidate', DEFAULT_STALE_WHILE_REVALIDATE))
+    
+    def _get_cache_age(self) -> Optional[float]:
+        """获取缓存已存在的秒数，没有缓存时返回None"""
+        if self._workflow_apps_cache is None or self._cache_timestamp is None:
+            return None
+        return time.time() - self._cache_timestamp
+    
     def _is_cache_valid(self) -> bool:
         """检查缓存是否有效"""
-        if self._workflow_apps_cache is None or self._cache_timestamp is None:
-            return False
-        
-        import time
-        return (time.time() - self._cache_timestamp) < self._cache_ttl
+        age = self._get_cache_age()
+        return age is not None and age < self._cache_ttl
     
-    def _login_with_credentials(self) -> bool:
-        """使用用户名密码登录获取access_token"""
-        try:
-            api_config = self.config.get_api_config()
-            auth_config = api_config.get('auth', {})
-            
-            if auth_config.get('type') != 'basic':
-                return False
-            
-            username = auth_config.get('username')
-            password = auth_config.get('password')
-            
-            if not username or not password:
-                logging.error("用户名或密码为空")
-                return False
-            
-            # 登录请求
-            login_url = f"{self.base_url.rstrip('/')}/console/api/login"
-            login_data = {
-                "email": username,
-                "password": password,
-                "language": "zh-Hans",
-                "remember_me": True
-            }
-            
-            response = self.session.post(login_url, json=login_data, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            if result.get('result') == 'success' and result.get('data'):
-                data = result['data']
-                self._access_token = data.get('access_token')
-                self._refresh_token = data.get('refresh_token')
-                
-                # 计算token过期时间（假设24小时有效）
-                import time
-                self._token_expiry = time.time() + (24 * 3600)  # 24小时
-                
-                logging.info("登录成功，获得访问令牌")
-                return True
-            else:
-                logging.error(f"登录失败: {result}")
-                return False
-                
-        except Exception as e:
-            logging.error(f"登录请求失败: {e}")
-            return False
+    def _is_cache_usable(self) -> bool:
+        """检查缓存是否可用，已过期但仍在 stale_while_revalidate 时长内的缓存也可先返回"""
+        age = self._get_cache_age()
+        return age is not None and age < self._cache_ttl + self._cache_stale_ttl
     
-    def _refresh_access_token(self) -> bool:
-        """刷新访问令牌"""
-        try:
-            if not self._refresh_token:
-                return False
-            
-            # 刷新token请求
-            refresh_url = f"{self.base_url.rstrip('/')}/console/api/refresh-token"
-            headers = {"Authorization": f"Bearer {self._refresh_token}"}
-            
-            response = self.session.post(refresh_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            if result.get('result') == 'success' and result.get('data'):
-                data = result['data']
-                self._access_token = data.get('access_token')
-                
-                # 更新过期时间
-                import time
-                self._token_expiry = time.time() + (24 * 3600)  # 24小时
-                
-                logging.info("访问令牌刷新成功")
-                return True
-            else:
-                logging.error(f"令牌刷新失败: {result}")
-                return False
-                
-        except Exception as e:
-            logging.error(f"令牌刷新请求失败: {e}")
-            return False
+    def _get_basic_credentials(self) -> Optional[Tuple[str, str]]:
+        """获取basic认证的用户名和密码，不是basic认证时返回None"""
+        auth_config = self.config.get_api_config().get('auth', {})
+        if auth_config.get('type') != 'basic':
+            return None
+        return auth_config.get('username'), auth_config.get('password')
     
-    def _is_token_valid(self) -> bool:
-        """检查访问令牌是否有效"""
-        if not self._access_token or not self._token_expiry:
+    def _get_access_token(self) -> Optional[str]:
+        """获取basic认证的访问令牌，登录和刷新由令牌管理器统一处理，并发调用只登录一次"""
+        username, password = self._get_basic_credentials() or (None, None)
+        if not username or not password:
+            logging.error("用户名或密码为空")
+            return None
+        return token_manager.get_token(self.base_url, username, password, self.session)
+    
+    def _refresh_access_token(self, failed_token: Optional[str] = None) -> bool:
+        """
+        请求返回401后作废令牌并重新获取
+        :param failed_token: 被拒绝的令牌，令牌已被其他线程刷新时不会重复刷新
+        :return: 是否得到了有效的令牌
+        """
+        credentials = self._get_basic_credentials()
+        if not credentials:
             return False
-        
-        import time
-        # 提前5分钟刷新token
-        return time.time() < (self._token_expiry - 300)
+        token_manager.invalidate(self.base_url, credentials[0], failed_token)
+        return self._get_access_token() is not None
+            
+    def _get_auth_headers(self) -> Dict[str, str]:
+        """basic认证时返回携带访问令牌的请求头，令牌随请求传递，不写入共享会话"""
+        if not self._get_basic_credentials():
+            return {}
+        token = self._get_access_token()
+        return {"Authorization": f"Bearer {token}"} if token else {}
     
     def _ensure_valid_token(self) -> bool:
         """确保有有效的访问令牌"""
@@ -140,95 +118,240 @@ class APIConnector:
         
         # 如果配置的是basic认证，需要获取访问令牌
         if auth_config.get('type') == 'basic':
-            # 检查当前token是否有效
-            if self._is_token_valid():
-                return True
-            
-            # 尝试刷新token
-            if self._refresh_token and self._refresh_access_token():
-                return True
-            
-            # 重新登录获取token
-            return self._login_with_credentials()
+            return self._get_access_token() is not None
         
         return False
     
-    def _get_all_apps(self, search: str = "") -> List[Dict[str, Any]]:
-        """获取所有应用的基本信息（带缓存）"""
-        import time
+    def _get_all_apps(self) -> List[Dict[str, Any]]:
+        """
+        获取所有应用的基本信息（带缓存），搜索由调用方通过 _filter_apps 在本地完成
         
-        # 如果有搜索条件，不使用缓存
-        if search or not self._is_cache_valid():
-            all_apps = []
-            api_page = 1
-            
-            # 从配置获取分页大小
-            pagination_config = self._get_api_params('pagination')
-            api_page_size = pagination_config.get('api_page_size', 50)
+        缓存过期后先返回旧列表，同时在后台刷新；没有缓存或缓存过旧时同步抓取。
+        """
+        if not self._is_cache_usable():
+            return self.refresh_cache()
+        
+        if not self._is_cache_valid():
+            self._refresh_in_background()
+        logging.info(f"使用缓存的应用列表: {len(self._workflow_apps_cache)} 个")
+        return self._workflow_apps_cache
+    
+    def refresh_cache(self, force: bool = False, strict: bool = False) -> List[Dict[str, Any]]:
+        """
+        重新获取应用列表并替换缓存
+        
+        共享缓存中有其他工作进程刚抓取的列表时直接采用，否则重新抓取并写回共享缓存。
+        并发调用只抓取一次，等待中的调用直接使用刚完成的结果；
+        抓取不完整时保留原缓存，避免用不完整的列表覆盖。
+        :param force: 为True时不采用共享缓存，总是重新抓取
+        :param strict: 为True时抓取不完整直接抛出异常，不返回原缓存或不完整的列表
+        :return: 最新的应用列表
+        :raises RuntimeError: strict为True且应用列表获取不完整
+        """
+        requested_at = time.time()
+        with self._refresh_lock:
+            if self._cache_timestamp is not None and self._cache_timestamp >= requested_at:
+                return self._workflow_apps_cache
             
-            logging.info(f"重新获取所有应用列表...")
-            
-            while True:
-                # 使用配置化的端点构建URL
-                full_endpoint = self._build_apps_list_url(page=api_page, limit=api_page_size, search=search)
-                
-                apps_response = self._make_request('GET', full_endpoint)
-                if not apps_response:
-                    break
-                
-                current_apps = apps_response.get('data', [])
-                has_more = apps_response.get('has_more', False)
-                
-                if not current_apps:
-                    break
-                
-                # 获取所有应用，不筛选类型
-                for app_item in current_apps:
-                    app_id = app_item.get('id')
-                    if app_id:
-                        all_apps.append({
-                            'id': app_id,
-                            'name': app_item.get('name', f"应用 {app_id[:8]}"),
-                            'description': app_item.get('description', ''),
-                            'mode': app_item.get('mode', 'chat'),
-                            'has_workflow_field': app_item.get('workflow') is not None
-                        })
-                
-                if not has_more:
-                    break
-                
-                api_page += 1
-                if api_page > 20:  # 安全限制
-                    break
+            if not force and self._load_shared_catalog():
+                return self._workflow_apps_cache
             
+            logging.info("重新获取所有应用列表...")
+            all_apps, complete = self._crawl_apps()
             logging.info(f"获取到 {len(all_apps)} 个应用")
             
-            # 只有在没有搜索条件时才缓存
-            if not search:
-                self._workflow_apps_cache = all_apps  # 复用缓存变量
-                self._cache_timestamp = time.time()
+            if complete:
+                self._invalidate_app_details(all_apps, clear_all=force)
+                self._set_catalog(all_apps, time.time())
+                cache_backend.set(
+                    self._catalog_cache_key(),
+                    {"timestamp": self._cache_timestamp, "apps": all_apps},
+                    self._cache_ttl + self._cache_stale_ttl
+                )
+            elif strict:
+                raise RuntimeError("应用列表获取不完整，部分分页请求失败")
+            elif self._workflow_apps_cache is not None:
+                logging.warning("应用列表获取不完整，继续使用原缓存")
+                return self._workflow_apps_cache
             
             return all_apps
-        else:
-            logging.info(f"使用缓存的应用列表: {len(self._workflow_apps_cache)} 个")
-            return self._workflow_apps_cache
     
-    def _create_session(self) -> requests.Session:
-        """创建HTTP会话"""
-        session = requests.Session()
+    def _set_catalog(self, apps: List[Dict[str, Any]], timestamp: float) -> None:
+        """替换进程内的应用列表及其位置索引和搜索索引"""
+        self._workflow_apps_cache = apps  # 复用缓存变量
+        self._app_positions = {app['id']: index for index, app in enumerate(apps)}
+        self._search_index = AppSearchIndex(apps)
+        self._cache_timestamp = timestamp
+    
+    def _invalidate_app_details(self, apps: List[Dict[str, Any]], clear_all: bool = False) -> None:
+        """
+        应用列表刷新后清除已变更应用的详情缓存
+        :param apps: 新抓取的应用列表
+        :param clear_all: 为True时清除全部应用详情缓存
+        """
+        if clear_all:
+            app_detail_cache.clear(f"api:app:{self.base_url}:")
+            return
+        if self._workflow_apps_cache is None:
+            return
+        
+        previous = {app['id']: self._get_app_updated_at(app) for app in self._workflow_apps_cache}
+        for app in apps:
+            if app['id'] in previous and previous[app['id']] != self._get_app_updated_at(app):
+                app_detail_cache.delete(self._app_detail_cache_key(app['id']))
+    
+    def _catalog_cache_key(self) -> str:
+        """共享缓存中应用列表的键，不同Dify实例互不影响"""
+        return f"api:apps:{self.base_url}"
+    
+    def _load_shared_catalog(self) -> bool:
+        """
+        采用共享缓存中比本进程更新且未过期的应用列表
+        :return: 是否采用了共享缓存
+        """
+        entry = cache_backend.get(self._catalog_cache_key())
+        if not entry:
+            return False
+        
+        timestamp = entry.get("timestamp") or 0
+        if timestamp <= (self._cache_timestamp or 0) or time.time() - timestamp >= self._cache_ttl:
+            return False
+        
+        self._set_catalog(entry["apps"], timestamp)
+        logging.info(f"使用共享缓存的应用列表: {len(self._workflow_apps_cache)} 个")
+        return True
+    
+    def _refresh_in_background(self) -> None:
+        """在后台线程刷新应用列表缓存，已有刷新在进行时不重复启动"""
+        with self._refresh_state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        def run():
+            try:
+                self.refresh_cache()
+            except Exception as e:
+                logging.error(f"后台刷新应用列表失败: {e}")
+            finally:
+                self._refreshing = False
+        
+        threading.Thread(target=run, name="api-apps-refresh", daemon=True).start()
+    
+    def get_cache_info(self) -> Optional[Dict[str, Any]]:
+        """
+        获取应用列表缓存的状态
+        :return: 缓存时长、有效期、是否过期及是否正在刷新，没有缓存时返回None
+        """
+        age = self._get_cache_age()
+        if age is None:
+            return None
+        return {
+            "age": int(age),
+            "ttl": self._cache_ttl,
+            "stale": age >= self._cache_ttl,
+            "refreshing": self._refreshing,
+        }
+    
+    def get_circuit_info(self) -> Dict[str, Any]:
+        """获取数据源实例的熔断器状态"""
+        return http_session_registry.get_circuit_breaker(SOURCE_SESSION).stats()
+    
+    def _crawl_apps(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        抓取应用列表的所有分页
         
-        # 配置重试策略
+        先请求第一页读取 total，再在并发上限内同时请求其余分页；
+        上游没有返回 total 或抓取期间应用增加时，按 has_more 继续顺序抓取。
+        :return: (按分页顺序去重后的应用列表, 是否所有分页都获取成功)
+        """
+        # 从配置获取分页大小和并发抓取数
+        pagination_config = self._get_api_params('pagination')
+        page_size = max(1, int(pagination_config.get('api_page_size', 50)))
+        concurrency = max(1, int(pagination_config.get('crawl_concurrency', DEFAULT_CRAWL_CONCURRENCY)))
+        
+        first_page = self._fetch_apps_page(1, page_size)
+        if first_page is None:
+            return [], False
+        
+        pages = {1: first_page}
+        has_more = bool(first_page.get('has_more', False))
+        next_page = 2
+        
+        total = first_page.get('total')
+        if has_more and isinstance(total, int):
+            last_page = (total + page_size - 1) // page_size
+            if last_page >= next_page:
+                remaining = range(next_page, last_page + 1)
+                with ThreadPoolExecutor(max_workers=min(concurrency, len(remaining)),
+                                        thread_name_prefix="apps-crawl") as executor:
+                    for page, response in zip(remaining, executor.map(
+                        lambda page: self._fetch_apps_page(page, page_size), remaining
+                    )):
+                        pages[page] = response
+                
+                last_response = pages[last_page]
+                has_more = bool(last_response and last_response.get('has_more', False))
+                next_page = last_page + 1
+        
+        while has_more:
+            response = self._fetch_apps_page(next_page, page_size)
+            pages[next_page] = response
+            if not response or not response.get('data'):
+                break
+            has_more = bool(response.get('has_more', False))
+            next_page += 1
+        
+        all_apps = []
+        seen_ids = set()
+        complete = True
+        for page in sorted(pages):
+            response = pages[page]
+            if response is None:
+                logging.warning(f"获取应用列表第 {page} 页失败，列表不完整")
+                complete = False
+                continue
+            
+            # 获取所有应用，不筛选类型；抓取期间分页边界移动时按ID去重
+            for app_item in response.get('data', []):
+                app_id = app_item.get('id')
+                if app_id and app_id not in seen_ids:
+                    seen_ids.add(app_id)
+                    all_apps.append(self._build_app_info(app_item))
+        
+        return all_apps, complete
+    
+    def _fetch_apps_page(self, page: int, page_size: int) -> Optional[Dict[str, Any]]:
+        """获取应用列表的一页，失败时返回None"""
+        # 使用配置化的端点构建URL
+        full_endpoint = self._build_apps_list_url(page=page, limit=page_size)
+        return self._make_request('GET', full_endpoint)
+    
+    def _build_app_info(self, app_item: Dict[str, Any]) -> Dict[str, Any]:
+        """从应用列表的条目中提取缓存需要的字段"""
+        app_id = app_item['id']
+        workflow_item = app_item.get('workflow') or {}
+        return {
+            'id': app_id,
+            'name': app_item.get('name', f"应用 {app_id[:8]}"),
+            'description': app_item.get('description', ''),
+            'mode': app_item.get('mode', 'chat'),
+            'has_workflow_field': app_item.get('workflow') is not None,
+            'updated_at': app_item.get('updated_at'),
+            'workflow_updated_at': workflow_item.get('updated_at')
+        }
+    
+    def _create_session(self) -> requests.Session:
+        """获取数据源的HTTP会话，连接池由会话注册表统一管理"""
+        # 配置重试策略，429/503由会话的限速器按 Retry-After 重试
         retry_strategy = Retry(
             total=3,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=[500, 502, 504],
+            respect_retry_after_header=False,
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        return session
+        return http_session_registry.get_session(SOURCE_SESSION, max_retries=retry_strategy)
     
     def _get_endpoint(self, endpoint_key: str, **kwargs) -> str:
         """从配置获取API端点并格式化参数"""
@@ -285,7 +408,7 @@ class APIConnector:
             # 在database模式下，设置默认值以避免属性错误
             self.base_url = None
             self.headers = {}
-            self.timeout = 30
+            self.timeout = http_session_registry.get_timeout()
             return
         
         api_config = self.config.get_api_config()
@@ -294,11 +417,12 @@ class APIConnector:
         # 获取认证配置
         auth_config = api_config.get('auth', {})
         
-        # 如果是basic认证，尝试登录获取token
+        # 设置超时: 连接超时来自 http 配置，读取超时沿用 api.timeout
+        self.timeout = http_session_registry.get_timeout(api_config.get('timeout', 30))
+        
+        # 如果是basic认证，尝试登录获取token，令牌随每个请求传递
         if auth_config.get('type') == 'basic':
-            if self._login_with_credentials():
-                # 使用获取的access_token
-                self.headers = {"Authorization": f"Bearer {self._access_token}"}
+            if self._ensure_valid_token():
                 logging.info("使用自动登录获得的访问令牌")
             else:
                 logging.error("自动登录失败，无法获取访问令牌")
@@ -310,13 +434,22 @@ class APIConnector:
             # 设置会话头部
             self.session.headers.update(self.headers)
             
-            # 设置超时
-            self.timeout = api_config.get('timeout', 30)
-            
             logging.info(f"API连接器初始化成功，基础URL: {self.base_url}")
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict[str, Any]]:
-        """发送HTTP请求"""
+        """
+        发送HTTP请求
+        
+        并发的相同GET请求（基础URL、端点和查询参数都相同）合并为一次上游调用，
+        共享同一响应；带其他请求参数的GET和写请求不合并。
+        """
+        if method.upper() == 'GET' and set(kwargs) <= {'params'}:
+            key = make_key("api", self.base_url, endpoint, kwargs.get('params'))
+            return single_flight.do(key, lambda: self._send_request(method, endpoint, **kwargs))
+        return self._send_request(method, endpoint, **kwargs)
+    
+    def _send_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """发送HTTP请求，basic认证的令牌被拒绝时刷新后重试一次"""
         if not self.base_url:
             raise RuntimeError("API连接器未正确初始化")
         
@@ -325,21 +458,25 @@ class APIConnector:
             logging.error("无法获取有效的访问令牌")
             return None
         
-        # 如果使用basic认证且有access_token，更新Authorization头
-        api_config = self.config.get_api_config()
-        auth_config = api_config.get('auth', {})
-        if auth_config.get('type') == 'basic' and self._access_token:
-            self.session.headers['Authorization'] = f"Bearer {self._access_token}"
-        
         url = urljoin(self.base_url, endpoint)
+        extra_headers = kwargs.pop('headers', None) or {}
         
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                timeout=self.timeout,
-                **kwargs
-            )
+            # basic认证的令牌随请求传递；令牌被拒绝时刷新一次后重试
+            for attempt in range(2):
+                auth_headers = self._get_auth_headers()
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    timeout=self.timeout,
+                    headers={**extra_headers, **auth_headers},
+                    **kwargs
+                )
+                if response.status_code != 401 or not auth_headers or attempt > 0:
+                    break
+                failed_token = auth_headers['Authorization'][len("Bearer "):]
+                if not self._refresh_access_token(failed_token):
+                    break
             
             response.raise_for_status()
             
@@ -353,37 +490,67 @@ class APIConnector:
             return None
     
     def get_app_by_id(self, app_id: str) -> Optional[App]:
-        """根据应用ID获取应用信息"""
+        """根据应用ID获取应用信息，应用详情在缓存中保留 cache.ttl 秒"""
         if not self.config.is_api_enabled():
             return None
         
+        cache_key = self._app_detail_cache_key(app_id)
+        app_data = app_detail_cache.get(cache_key)
+        
         try:
-            # 使用配置化的端点
-            endpoint = self._get_endpoint('app_detail', app_id=app_id)
-            
-            response = self._make_request('GET', endpoint)
-            if not response:
-                logging.warning(f"未找到应用ID为 {app_id} 的应用")
-                return None
-            
-            # 根据实际API响应格式调整
-            app_data = response.get('data', response)
+            if app_data is None:
+                # 使用配置化的端点
+                endpoint = self._get_endpoint('app_detail', app_id=app_id)
+                
+                response = self._make_request('GET', endpoint)
+                if not response:
+                    logging.warning(f"未找到应用ID为 {app_id} 的应用")
+                    return None
+                
+                # 根据实际API响应格式调整
+                app_data = response.get('data', response)
+                app_detail_cache.set(cache_key, app_data, self._cache_ttl)
             
-            return App(
-                id=app_data.get('id', app_id),
-                name=app_data.get('name', f'工作流应用 {app_id[:8]}'),
-                mode=app_data.get('mode', AppMode.WORKFLOW.value),
-                icon=app_data.get('icon', '🤖'),
-                description=app_data.get('description', ''),
-                created_at=app_data.get('created_at', ''),
-                updated_at=app_data.get('updated_at', '')
-            )
+            return self._build_app(app_id, app_data)
         except Exception as e:
             logging.error(f"获取应用信息失败: {e}")
             return None
     
-    def get_workflow_by_app_id(self, app_id: str) -> Optional[Workflow]:
-        """根据应用ID获取工作流信息"""
+    def _build_app(self, app_id: str, app_data: Dict[str, Any]) -> App:
+        """用应用详情接口的数据构造应用"""
+        return App(
+            id=app_data.get('id', app_id),
+            name=app_data.get('name', f'工作流应用 {app_id[:8]}'),
+            mode=app_data.get('mode', AppMode.WORKFLOW.value),
+            icon=app_data.get('icon', '🤖'),
+            description=app_data.get('description', ''),
+            created_at=app_data.get('created_at', ''),
+            updated_at=app_data.get('updated_at', '')
+        )
+    
+    def _app_detail_cache_key(self, app_id: str) -> str:
+        """缓存中应用详情的键"""
+        return f"api:app:{self.base_url}:{app_id}"
+    
+    def _app_from_info(self, app_info: Dict[str, Any]) -> App:
+        """用应用列表中的基本信息构造应用，只含工作流需要的名称、描述和类型"""
+        return App(
+            id=app_info['id'],
+            name=app_info['name'],
+            mode=app_info['mode'],
+            description=app_info['description'] or ''
+        )
+    
+    def _get_cached_app_info(self, app_id: str) -> Optional[Dict[str, Any]]:
+        """从进程内的应用列表缓存中查找应用的基本信息，没有缓存或不在列表中时返回None"""
+        apps, positions = self._workflow_apps_cache, self._app_positions
+        if apps is None or positions is None:
+            return None
+        position = positions.get(app_id)
+        return apps[position] if position is not None else None
+    
+    def get_workflow_by_app_id(self, app_id: str, app_model: Optional[App] = None) -> Optional[Workflow]:
+        """根据应用ID获取工作流信息，已知应用信息时通过app_model传入以避免重复请求"""
         if not self.config.is_api_enabled():
             return None
         
@@ -404,32 +571,40 @@ class APIConnector:
             # 根据实际API响应格式调整
             workflow_data = response.get('data', response)
             
-            # 获取应用信息以获取应用名称
-            app_info = self.get_app_by_id(app_id)
-            app_name = app_info.name if app_info else f"工作流 {app_id[:8]}"
-            app_description = app_info.description if app_info else ""
-            app_mode = app_info.mode if app_info else "workflow"
-            
-            # 获取环境变量
-            environment_variables = self.get_environment_variables_by_app_id(app_id)
+            # 获取应用信息以获取应用名称，优先使用传入的或应用列表中已有的信息
+            app_info = app_model
+            if app_info is None:
+                cached_info = self._get_cached_app_info(app_id)
+                app_info = self._app_from_info(cached_info) if cached_info else self.get_app_by_id(app_id)
             
-            return Workflow(
-                id=workflow_data.get('id', ''),
-                app_id=workflow_data.get('app_id', app_id),
-                version=workflow_data.get('version', '1.0'),
-                graph=workflow_data.get('graph', {}),
-                features=workflow_data.get('features', {}),
-                environment_variables=environment_variables,
-                app_name=app_name,
-                app_description=app_description,
-                app_mode=app_mode
-            )
+            return self._build_workflow(app_id, workflow_data, app_info)
         except Exception as e:
             logging.error(f"获取工作流信息失败: {e}")
             return None
     
+    def _build_workflow(self, app_id: str, workflow_data: Dict[str, Any], app_info: Optional[App]) -> Workflow:
+        """用工作流草稿接口的数据和应用信息构造工作流"""
+        app_name = app_info.name if app_info else f"工作流 {app_id[:8]}"
+        app_description = app_info.description if app_info else ""
+        app_mode = app_info.mode if app_info else "workflow"
+        
+        # 获取环境变量
+        environment_variables = self.get_environment_variables_by_app_id(app_id)
+        
+        return Workflow(
+            id=workflow_data.get('id', ''),
+            app_id=workflow_data.get('app_id', app_id),
+            version=workflow_data.get('version', '1.0'),
+            graph=workflow_data.get('graph', {}),
+            features=workflow_data.get('features', {}),
+            environment_variables=environment_variables,
+            app_name=app_name,
+            app_description=app_description,
+            app_mode=app_mode
+        )
+    
     def get_all_workflows(self) -> List[Workflow]:
-        """获取所有工作流（使用缓存优化）"""
+        """获取所有工作流（使用缓存优化），工作流草稿通过异步客户端并发获取"""
         if not self.config.is_api_enabled():
             return []
         
@@ -438,24 +613,18 @@ class APIConnector:
             workflow_apps = self._get_all_apps()
             
             logging.info(f"开始获取 {len(workflow_apps)} 个工作流的详细信息")
+            drafts = self.async_client.fetch_drafts([app_info['id'] for app_info in workflow_apps])
             
             workflows = []
-            for i, app_info in enumerate(workflow_apps):
-                if i <= 5 or i % 10 == 0:  # 只显示前5个和每10个的详细信息
-                    logging.info(f"处理第 {i+1}/{len(workflow_apps)} 个工作流应用: {app_info['name']} ({app_info['id']})")
+            for app_info in workflow_apps:
+                workflow_data = drafts.get(app_info['id'])
+                if not workflow_data:
+                    logging.warning(f"无法获取工作流详情: {app_info['name']} ({app_info['id']})")
+                    continue
                 
                 try:
-                    workflow = self.get_workflow_by_app_id(app_info['id'])
-                    if workflow:
-                        # 确保工作流包含应用名称信息
-                        workflow.app_name = app_info['name']
-                        workflow.app_description = app_info['description']
-                        workflow.app_mode = app_info['mode']
-                        workflows.append(workflow)
-                        if i <= 5:  # 只显示前5个的成功信息
-                            logging.info(f"成功获取工作流: {app_info['name']}")
-                        else:
-                            logging.warning(f"无法获取工作流详情: {app_info['name']} ({app_info['id']})")
+                    # 应用列表中已有名称、描述和类型，不再逐个请求应用详情
+                    workflows.append(self._build_workflow(app_info['id'], workflow_data, self._app_from_info(app_info)))
                 except Exception as e:
                     logging.error(f"获取工作流时出错: {app_info['name']} ({app_info['id']}) - {e}")
             
@@ -466,6 +635,35 @@ class APIConnector:
             logging.error(f"获取所有工作流失败: {e}")
             return []
     
+    def get_export_sources(self, app_ids: List[str]) -> Dict[str, Tuple[App, Workflow]]:
+        """
+        批量获取导出所需的应用和工作流，应用详情和工作流草稿都并发请求
+        :param app_ids: 应用ID列表
+        :return: 以应用ID为键的 (应用实例, 工作流实例) 字典，获取失败的应用不包含在内
+        """
+        if not self.config.is_api_enabled() or not app_ids:
+            return {}
+        
+        app_data = {app_id: app_detail_cache.get(self._app_detail_cache_key(app_id)) for app_id in app_ids}
+        missing = [app_id for app_id, data in app_data.items() if data is None]
+        for app_id, data in self.async_client.fetch_apps(missing).items():
+            if data:
+                app_detail_cache.set(self._app_detail_cache_key(app_id), data, self._cache_ttl)
+            app_data[app_id] = data
+        
+        drafts = self.async_client.fetch_drafts(app_ids)
+        
+        sources = {}
+        for app_id in app_ids:
+            if not app_data.get(app_id) or not drafts.get(app_id):
+                continue
+            try:
+                app_model = self._build_app(app_id, app_data[app_id])
+                sources[app_id] = (app_model, self._build_workflow(app_id, drafts[app_id], app_model))
+            except Exception as e:
+                logging.error(f"构造导出数据失败: {app_id} - {e}")
+        return sources
+    
     def get_environment_variables_by_app_id(self, app_id: str) -> List[EnvironmentVariable]:
         """根据应用ID获取环境变量"""
         if not self.config.is_api_enabled():
@@ -549,91 +747,88 @@ class APIConnector:
             logging.error(f"搜索应用失败: {e}")
             return []
     
-    def get_app_export_data(self, app_id: str, include_secrets: bool = False) -> Optional[str]:
-        """获取应用导出数据"""
+    def get_app_export_data(self, app_id: str, include_secret: bool = False) -> Optional[str]:
+        """
+        通过Dify的应用导出接口(app_export端点)获取原生DSL
+        :param app_id: 应用ID
+        :param include_secret: 是否包含secret变量
+        :return: YAML格式的DSL字符串，请求失败或响应中没有DSL时返回None
+        """
         if not self.config.is_api_enabled():
             return None
         
         try:
-            endpoint = f'/api/apps/{app_id}/export'
-            params = {'include_secrets': include_secrets}
+            endpoint = self._get_endpoint('app_export', app_id=app_id)
+            params = {'include_secret': 'true' if include_secret else 'false'}
             
             response = self._make_request('GET', endpoint, params=params)
             if not response:
                 return None
             
-            # 根据实际API响应格式调整
-            export_data = response.get('data', response)
-            if isinstance(export_data, dict):
-                return json.dumps(export_data, indent=2, ensure_ascii=False)
-            else:
-                return str(export_data)
+            # Dify返回 {"data": "<YAML>"}，非JSON响应的正文同样放在 data 中
+            export_data = response.get('data')
+            if not isinstance(export_data, str) or not export_data.strip():
+                logging.warning(f"应用导出接口未返回DSL: {app_id}")
+                return None
+            return export_data
                 
         except Exception as e:
             logging.error(f"获取应用导出数据失败: {e}")
             return None
     
-    def get_workflows_paginated(self, page: int = 1, page_size: int = 20, search: str = "") -> dict:
+    def get_workflows_paginated(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search: str = "",
+        after_app_id: Optional[str] = None,
+        after_offset: Optional[int] = None
+    ) -> dict:
         """
         高效分页获取应用列表（带缓存优化）- 显示所有应用类型
-        :param page: 页码（从1开始）
+        :param page: 页码（从1开始），游标分页时忽略
         :param page_size: 每页数量
         :param search: 搜索关键词
-        :return: 包含应用列表和总数的字典
+        :param after_app_id: 上一页最后一个应用的ID，传入时从该应用之后开始
+        :param after_offset: 游标记录的位置，该应用已不在列表中时使用
+        :return: 包含应用列表、总数、本页起始位置和是否有下一页的字典
         """
         if not self.config.is_api_enabled():
-            return {"workflows": [], "total": 0}
+            return {"workflows": [], "total": 0, "has_next": False, "offset": 0}
         
         try:
-            # 获取所有应用的基本信息（使用缓存）
-            all_apps = self._get_all_apps(search)
-            
-            # 如果有搜索条件，进行本地过滤
-            if search:
-                search_lower = search.lower()
-                filtered_apps = []
-                for app in all_apps:
-                    if (search_lower in app['name'].lower() or 
-                        search_lower in app['id'].lower() or
-                        search_lower in app['description'].lower()):
-                        filtered_apps.append(app)
-                all_apps = filtered_apps
+            # 获取所有应用的基本信息（使用缓存），搜索也在缓存上通过本地索引完成，不再请求上游
+            all_apps = self._filter_apps(self._get_all_apps(), search)
             
             total_app_count = len(all_apps)
             logging.info(f"应用总数: {total_app_count}")
             
-            # 计算分页范围
-            start_idx = (page - 1) * page_size
+            # 计算分页范围，游标分页时通过位置索引定位，不随页码变深而变慢
+            if after_app_id is not None:
+                positions = self._app_positions if all_apps is self._workflow_apps_cache else None
+                if positions is None:
+                    positions = {app['id']: index for index, app in enumerate(all_apps)}
+                start_idx = locate_after(positions, total_app_count, after_app_id, after_offset)
+            else:
+                start_idx = (page - 1) * page_size
             end_idx = min(start_idx + page_size, total_app_count)
             current_page_apps = all_apps[start_idx:end_idx]
             
             logging.info(f"获取第 {page} 页应用，范围: {start_idx}-{end_idx}")
             
-            # 直接构造应用数据，不获取详细工作流信息
+            # 直接构造应用摘要，不获取详细工作流信息
             apps = []
             for app_info in current_page_apps:
                 try:
-                    # 判断应用类型
-                    app_mode = app_info['mode']
-                    has_workflow = app_info['has_workflow_field']
-                    is_workflow = (app_mode == 'workflow') or (app_mode == 'advanced-chat' and has_workflow)
-                    
-                    # 构造简化的工作流对象
-                    from models.app import Workflow
-                    workflow = Workflow(
+                    apps.append(WorkflowSummary(
                         id=app_info['id'],
                         app_id=app_info['id'],
                         version='draft',
-                        graph={},
-                        features={},
-                        environment_variables=[],
                         app_name=app_info['name'],
                         app_description=app_info['description'],
-                        app_mode=app_mode,
-                        # 添加应用类型信息
-                        is_workflow=is_workflow
-                    )
-                    apps.append(workflow)
+                        app_mode=app_info['mode'],
+                        updated_at=self._get_app_updated_at(app_info)
+                    ))
                     
                 except Exception as e:
                     logging.error(f"构造应用数据失败: {app_info['name']} ({app_info['id']}) - {e}")
@@ -642,17 +837,83 @@ class APIConnector:
             
             return {
                 "workflows": apps,
-                "total": total_app_count
+                "total": total_app_count,
+                "has_next": end_idx < total_app_count,
+                "offset": start_idx
             }
             
+        except ValueError:
+            # 游标失效需要返回给调用方
+            raise
         except Exception as e:
             logging.error(f"分页获取应用失败: {e}")
-            return {"workflows": [], "total": 0}
+            return {"workflows": [], "total": 0, "has_next": False, "offset": 0}
+    
+    def get_mode_stats(self, search: str = "") -> Dict[str, int]:
+        """
+        按应用类型统计应用数量，基于缓存的应用列表在本地计算，不额外请求应用详情
+        :param search: 搜索关键词
+        :return: 应用类型到应用数量的字典
+        """
+        if not self.config.is_api_enabled():
+            return {}
+        
+        try:
+            stats: Dict[str, int] = {}
+            for app_info in self._filter_apps(self._get_all_apps(), search):
+                stats[app_info['mode']] = stats.get(app_info['mode'], 0) + 1
+            return stats
+        except Exception as e:
+            logging.error(f"统计应用类型失败: {e}")
+            return {}
+    
+    def _filter_apps(self, apps: List[Dict[str, Any]], search: str) -> List[Dict[str, Any]]:
+        """按名称、ID或描述在本地过滤应用列表，过滤缓存列表时使用搜索索引"""
+        if not search:
+            return apps
+        
+        search_index = self._search_index
+        if search_index is not None and search_index.apps is apps:
+            return search_index.search(search)
+        
+        search_lower = search.lower()
+        return [
+            app for app in apps
+            if (search_lower in app['name'].lower() or 
+                search_lower in app['id'].lower() or
+                search_lower in (app.get('description') or '').lower())
+        ]
+    
+    def get_app_change_times(self) -> Dict[str, Any]:
+        """
+        获取每个应用的最后变更时间，取应用列表中应用和其工作流 updated_at 的较大者
+        应用列表接口不支持按时间过滤，由调用方比较变更时间
+        :return: 以应用ID为键的最后变更时间（Unix时间戳）字典
+        :raises RuntimeError: 应用列表获取不完整，此时调用方不应推进水位线
+        """
+        if not self.config.is_api_enabled():
+            return {}
+        
+        change_times = {}
+        for app_info in self.refresh_cache(force=True, strict=True):
+            updated_at = self._get_app_updated_at(app_info)
+            if updated_at is not None:
+                change_times[app_info['id']] = updated_at
+        return change_times
+    
+    def _get_app_updated_at(self, app_info: Dict[str, Any]) -> Optional[Any]:
+        """取应用和其工作流 updated_at 的较大者，都没有时返回None"""
+        timestamps = [t for t in (app_info.get('updated_at'), app_info.get('workflow_updated_at')) if t is not None]
+        return max(timestamps) if timestamps else None
     
     def clear_cache(self):
         """清除缓存，强制重新获取数据"""
         self._workflow_apps_cache = None
+        self._app_positions = None
+        self._search_index = None
         self._cache_timestamp = None
+        cache_backend.delete(self._catalog_cache_key())
+        self._invalidate_app_details([], clear_all=True)
         logging.info("API连接器缓存已清除")
     
     def close(self):
@@ -1,17 +1,61 @@
-import yaml
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, Optional, Tuple
 from models.app import App, AppMode, Workflow
 from services.workflow_service import WorkflowService
+from services.export_cache import export_cache, compute_export_key
+from services.yaml_serializer import dump_yaml
 
 CURRENT_DSL_VERSION = "1.0"
 
 class AppDslService:
     @classmethod
-    def export_dsl(cls, app_model: App, include_secret: bool = False) -> str:
+    def compute_etag(cls, app_model: App, workflow: Optional[Workflow], include_secret: bool = False) -> str:
+        """
+        计算导出内容的ETag
+        :param app_model: App实例
+        :param workflow: 已加载的工作流
+        :param include_secret: 是否包含secret变量
+        :return: 内容哈希
+        """
+        return compute_export_key(app_model, workflow, include_secret, CURRENT_DSL_VERSION)
+    
+    @classmethod
+    def compute_dsl_etag(cls, dsl_data: str) -> str:
+        """
+        计算已生成DSL的ETag，用于Dify原生导出的DSL
+        :param dsl_data: DSL字符串
+        :return: 内容哈希
+        """
+        return hashlib.sha256(dsl_data.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def export_dsl_cached(
+        cls, app_model: App, workflow: Workflow, include_secret: bool = False, etag: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        导出应用程序DSL，内容未变化时直接返回缓存结果
+        :param app_model: App实例
+        :param workflow: 已加载的工作流
+        :param include_secret: 是否包含secret变量
+        :param etag: 已计算好的ETag，为None时重新计算
+        :return: (YAML格式的DSL字符串, ETag)
+        """
+        etag = etag or cls.compute_etag(app_model, workflow, include_secret)
+        
+        dsl_data = export_cache.get(etag)
+        if dsl_data is None:
+            dsl_data = cls.export_dsl(app_model=app_model, include_secret=include_secret, workflow=workflow)
+            export_cache.set(etag, dsl_data)
+        
+        return dsl_data, etag
+    
+    @classmethod
+    def export_dsl(cls, app_model: App, include_secret: bool = False, workflow: Optional[Workflow] = None) -> str:
         """
         导出应用程序DSL
         :param app_model: App实例
         :param include_secret: 是否包含secret变量
+        :param workflow: 已加载的工作流，为None时按app_model.id重新获取
         :return: YAML格式的DSL字符串
         """
         app_mode = AppMode(app_model.mode)
@@ -31,27 +75,31 @@ class AppDslService:
         
         if app_mode in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
             cls._append_workflow_export_data(
-                export_data=export_data, app_model=app_model, include_secret=include_secret
+                export_data=export_data, app_model=app_model, include_secret=include_secret, workflow=workflow
             )
         else:
             cls._append_model_config_export_data(export_data, app_model)
         
-        return yaml.dump(export_data, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        return dump_yaml(export_data)
     
     @classmethod
-    def _append_workflow_export_data(cls, *, export_data: Dict[str, Any], app_model: App, include_secret: bool) -> None:
+    def _append_workflow_export_data(
+        cls, *, export_data: Dict[str, Any], app_model: App, include_secret: bool, workflow: Optional[Workflow] = None
+    ) -> None:
         """
         附加工作流导出数据
         :param export_data: 导出数据
         :param app_model: App实例
         :param include_secret: 是否包含secret变量
+        :param workflow: 已加载的工作流，为None时重新获取
         """
-        workflow_service = WorkflowService()
-        workflow = workflow_service.get_draft_workflow(app_model.id)
-        
-        if not workflow:
-            # 如果没有找到工作流，创建一个默认的
-            workflow = workflow_service.create_default_workflow(app_model.id)
+        if workflow is None:
+            workflow_service = WorkflowService()
+            workflow = workflow_service.get_draft_workflow(app_model.id, app_model=app_model)
+            
+            if not workflow:
+                # 如果没有找到工作流，创建一个默认的
+                workflow = workflow_service.create_default_workflow(app_model.id)
         
         workflow_dict = workflow.to_dict(include_secret=include_secret)
         
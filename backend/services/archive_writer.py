@@ -0,0 +1,191 @@
+import io
+import gzip
+import lzma
+import time
+import tarfile
+import zipfile
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from services.config_service import config
+
+# 默认的导出归档格式
+DEFAULT_ARCHIVE_FORMAT = "zip"
+
+
+class _StreamBuffer(io.RawIOBase):
+    """只写、不可seek的缓冲区，归档写入后由生成器分块取出"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        """取出并清空已写入的数据"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArchiveWriter:
+    """
+    流式归档写入器基类
+    
+    每次写入文件后返回已产生的压缩字节，关闭时返回剩余字节，
+    输出只追加不回写，可直接作为HTTP分块响应或写入文件。
+    """
+    
+    format = ""
+    extension = ""
+    mimetype = "application/octet-stream"
+    
+    def __init__(self, level: Optional[int] = None):
+        self.level = level
+        self._buffer = _StreamBuffer()
+    
+    def write_file(self, name: str, data: Union[str, bytes]) -> bytes:
+        """
+        向归档写入一个文件
+        :param name: 归档内的文件名
+        :param data: 文件内容，字符串按UTF-8编码
+        :return: 本次写入产生的字节
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._write(name, data)
+        return self._buffer.drain()
+    
+    def close(self) -> bytes:
+        """结束归档并返回剩余的字节"""
+        self._close()
+        return self._buffer.drain()
+    
+    def _write(self, name: str, data: bytes) -> None:
+        raise NotImplementedError
+    
+    def _close(self) -> None:
+        raise NotImplementedError
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    """ZIP归档，支持不压缩(stored)和deflate两种方式"""
+    
+    extension = ".zip"
+    mimetype = "application/zip"
+    
+    def __init__(self, level: Optional[int] = None, compression: int = zipfile.ZIP_DEFLATED):
+        super().__init__(level)
+        self._zip_file = zipfile.ZipFile(
+            self._buffer, 'w', compression,
+            compresslevel=level if compression == zipfile.ZIP_DEFLATED else None
+        )
+    
+    def _write(self, name: str, data: bytes) -> None:
+        self._zip_file.writestr(name, data)
+    
+    def _close(self) -> None:
+        self._zip_file.close()
+
+
+class TarArchiveWriter(ArchiveWriter):
+    """tar归档，外层套一个流式压缩器"""
+    
+    def __init__(self, level: Optional[int] = None):
+        super().__init__(level)
+        self._compressor = self._open_compressor(self._buffer, level)
+        self._tar_file = tarfile.open(fileobj=self._compressor, mode='w|')
+    
+    def _open_compressor(self, fileobj: io.RawIOBase, level: Optional[int]):
+        raise NotImplementedError
+    
+    def _write(self, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._tar_file.addfile(info, io.BytesIO(data))
+    
+    def _close(self) -> None:
+        self._tar_file.close()
+        self._compressor.close()
+
+
+class TarGzArchiveWriter(TarArchiveWriter):
+    extension = ".tar.gz"
+    mimetype = "application/gzip"
+    
+    def _open_compressor(self, fileobj, level):
+        return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6 if level is None else level)
+
+
+class TarXzArchiveWriter(TarArchiveWriter):
+    extension = ".tar.xz"
+    mimetype = "application/x-xz"
+    
+    def _open_compressor(self, fileobj, level):
+        return lzma.LZMAFile(fileobj, mode='wb', preset=level)
+
+
+class TarZstdArchiveWriter(TarArchiveWriter):
+    extension = ".tar.zst"
+    mimetype = "application/zstd"
+    
+    def _open_compressor(self, fileobj, level):
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.stream_writer(fileobj, closefd=False)
+
+
+# 支持的归档格式: 格式名 -> 写入器工厂和压缩级别范围，levels 为None表示不支持设置级别
+ARCHIVE_FORMATS: Dict[str, Dict[str, Any]] = {
+    "zip": {"writer": ZipArchiveWriter, "levels": (0, 9)},
+    "zip-stored": {"writer": lambda level: ZipArchiveWriter(compression=zipfile.ZIP_STORED), "levels": None},
+    "tar.gz": {"writer": TarGzArchiveWriter, "levels": (1, 9)},
+    "tar.xz": {"writer": TarXzArchiveWriter, "levels": (0, 9)},
+    "tar.zst": {"writer": TarZstdArchiveWriter, "levels": (1, 22)},
+}
+
+
+def get_available_formats() -> List[str]:
+    """获取当前环境可用的归档格式，zstandard 未安装时不包含 tar.zst"""
+    return [name for name in ARCHIVE_FORMATS if name != "tar.zst" or zstandard is not None]
+
+
+def create_archive_writer(archive_format: Optional[str] = None, level: Optional[int] = None) -> ArchiveWriter:
+    """
+    创建归档写入器，未指定的参数使用 export.archive 配置
+    :param archive_format: 归档格式，见 ARCHIVE_FORMATS
+    :param level: 压缩级别，为None时使用配置或格式默认值
+    :return: 归档写入器
+    """
+    archive_config = config.get_export_config().get('archive', {}) or {}
+    if archive_format is None:
+        archive_format = archive_config.get('format') or DEFAULT_ARCHIVE_FORMAT
+        if level is None:
+            level = archive_config.get('level')
+    
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"不支持的归档格式: {archive_format}，可选: {', '.join(get_available_formats())}")
+    if archive_format not in get_available_formats():
+        raise ValueError(f"归档格式 {archive_format} 需要安装 zstandard: pip install zstandard")
+    
+    spec = ARCHIVE_FORMATS[archive_format]
+    if level is not None and spec["levels"] is not None:
+        low, high = spec["levels"]
+        level = int(level)
+        if not low <= level <= high:
+            raise ValueError(f"归档格式 {archive_format} 的压缩级别须在 {low}-{high} 之间")
+    
+    writer = spec["writer"](level)
+    writer.format = archive_format
+    return writer
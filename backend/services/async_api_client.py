@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .config_service import config
+from .http_session_registry import http_session_registry, SOURCE_SESSION
+from .rate_limiter import THROTTLE_STATUS_CODES, parse_retry_after
+from .circuit_breaker import CircuitOpenError, FAILURE_STATUS_CODES
+
+# 批量请求的默认并发数
+DEFAULT_BULK_CONCURRENCY = 16
+# 与同步会话的重试策略一致: 这些状态码和网络错误会按指数退避重试，429/503由限速器处理
+RETRY_STATUS_CODES = {500, 502, 504}
+DEFAULT_RETRY_COUNT = 3
+DEFAULT_RETRY_DELAY = 1
+
+
+class _EventLoopThread:
+    """在专用后台线程中运行的事件循环，Flask 的同步请求通过它执行协程"""
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """首次使用时启动事件循环线程"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="dify-async-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
+    
+    def run(self, coro):
+        """在事件循环线程中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+
+class _BulkContext:
+    """一次批量请求共用的HTTP客户端和请求头"""
+    
+    def __init__(self, client, headers: Dict[str, str]):
+        self.client = client
+        self.headers = headers
+        self.token_lock = asyncio.Lock()
+
+
+class AsyncAPIClient:
+    """
+    基于 httpx 的异步Dify API客户端，用于批量读取工作流草稿和应用详情
+    
+    端点模板、认证令牌和基础URL都来自同步的 APIConnector；请求在专用事件循环
+    线程中并发执行，同时进行的请求数由信号量限制在 api.bulk_concurrency 以内，
+    发送速率和熔断状态与同步会话共用数据源的限速器和熔断器。
+    事件循环线程复用同一个 httpx 客户端，多次批量请求之间保持连接。
+    httpx 未安装时退回线程池，用同步会话并发请求。
+    """
+    
+    def __init__(self, connector):
+        self.connector = connector
+        self._loop_thread = _EventLoopThread()
+        # 以下状态只在事件循环线程中访问: 当前客户端、创建它时的(并发数, 超时)、各客户端进行中的批量请求数
+        self._client = None
+        self._client_settings = None
+        self._client_users: Dict[Any, int] = {}
+    
+    @property
+    def available(self) -> bool:
+        """是否可使用异步客户端（已安装 httpx）"""
+        return httpx is not None
+    
+    def _get_concurrency(self) -> int:
+        """获取批量请求的并发数"""
+        return max(1, int(config.get_api_config().get('bulk_concurrency', DEFAULT_BULK_CONCURRENCY)))
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """复制同步会话的请求头，basic认证时加上当前的访问令牌"""
+        headers = dict(self.connector.session.headers)
+        headers.update(self.connector._get_auth_headers())
+        return headers
+    
+    async def _refresh_headers(self, context: _BulkContext, used_headers: Dict[str, str]) -> bool:
+        """
+        请求返回401时刷新令牌，多个请求同时失败只刷新一次
+        :param context: 本次批量请求的上下文
+        :param used_headers: 失败请求使用的请求头
+        :return: 是否得到了新的请求头
+        """
+        async with context.token_lock:
+            if context.headers.get('Authorization') != used_headers.get('Authorization'):
+                return True
+            failed_token = (used_headers.get('Authorization') or '')[len("Bearer "):] or None
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, self.connector._refresh_access_token, failed_token):
+                return False
+            context.headers = self._build_headers()
+            return True
+    
+    async def _request(self, context: _BulkContext, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """发送请求，失败时按同步会话的策略重试，最终失败返回None"""
+        api_config = config.get_api_config()
+        retry_count = int(api_config.get('retry_count', DEFAULT_RETRY_COUNT))
+        retry_delay = float(api_config.get('retry_delay', DEFAULT_RETRY_DELAY))
+        url = urljoin(self.connector.base_url, endpoint)
+        rate_limiter = http_session_registry.get_rate_limiter(SOURCE_SESSION)
+        circuit_breaker = http_session_registry.get_circuit_breaker(SOURCE_SESSION)
+        refreshed = False
+        error = None
+        
+        for attempt in range(retry_count + 1):
+            try:
+                circuit_breaker.before_request()
+            except CircuitOpenError as e:
+                logging.error(f"API请求失败: {method} {url} - {e}")
+                return None
+            
+            wait = rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            
+            headers = context.headers
+            try:
+                response = await context.client.request(method, url, headers=headers)
+            except httpx.TransportError as e:
+                circuit_breaker.record_failure(e)
+                error = e
+            else:
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    # 限速器按 Retry-After 暂停发放令牌，下次循环取令牌时等待
+                    rate_limiter.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+                    if attempt < retry_count:
+                        # 重试前归还半开状态的试探名额，最后一次的响应和同步会话一样计入熔断器
+                        circuit_breaker.release()
+                        error = f"HTTP {response.status_code}"
+                        continue
+                else:
+                    rate_limiter.on_success()
+                if response.status_code in FAILURE_STATUS_CODES:
+                    circuit_breaker.record_failure(f"HTTP {response.status_code}")
+                else:
+                    circuit_breaker.record_success()
+                
+                if response.status_code == 401 and not refreshed:
+                    refreshed = True
+                    if await self._refresh_headers(context, headers):
+                        continue
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if response.is_error:
+                        logging.error(f"API请求失败: {method} {url} - HTTP {response.status_code}")
+                        return None
+                    if response.headers.get('content-type', '').startswith('application/json'):
+                        return response.json()
+                    return {'data': response.text}
+                error = f"HTTP {response.status_code}"
+            
+            if attempt < retry_count:
+                await asyncio.sleep(retry_delay * (2 ** attempt))
+        
+        logging.error(f"API请求失败: {method} {url} - {error}")
+        return None
+    
+    def _get_client(self, concurrency: int):
+        """
+        获取复用的 httpx 客户端，并发数或超时配置变化时新建
+        :param concurrency: 连接池大小
+        """
+        settings = (concurrency, tuple(self.connector.timeout))
+        if self._client is None or self._client_settings != settings:
+            connect_timeout, read_timeout = self.connector.timeout
+            # 等待连接不设超时，同时进行的请求数已由信号量限制
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=None),
+                limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            )
+            self._client_settings = settings
+            self._client_users[self._client] = 0
+        return self._client
+    
+    async def _gather(self, endpoints: Dict[str, str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """并发请求所有端点，同时进行的请求数不超过并发上限"""
+        concurrency = self._get_concurrency()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        client = self._get_client(concurrency)
+        self._client_users[client] += 1
+        try:
+            context = _BulkContext(client, self._build_headers())
+            
+            async def fetch(key: str, endpoint: str):
+                async with semaphore:
+                    return key, await self._request(context, 'GET', endpoint)
+            
+            results = await asyncio.gather(*(fetch(key, endpoint) for key, endpoint in endpoints.items()))
+        finally:
+            self._client_users[client] -= 1
+            # 配置变化后被替换的客户端在最后一个使用它的批量请求结束时关闭
+            if client is not self._client and self._client_users[client] == 0:
+                del self._client_users[client]
+                await client.aclose()
+        return dict(results)
+    
+    def fetch_all(self, endpoints: Dict[str, str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        并发GET一组端点
+        :param endpoints: 结果键到API端点的字典
+        :return: 结果键到响应数据的字典，请求失败的值为None
+        """
+        if not endpoints:
+            return {}
+        if not self.connector._ensure_valid_token():
+            logging.error("无法获取有效的访问令牌")
+            return {key: None for key in endpoints}
+        
+        if httpx is None:
+            # 未安装 httpx 时退回线程池
+            max_workers = min(self._get_concurrency(), len(endpoints))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-bulk") as executor:
+                responses = executor.map(lambda endpoint: self.connector._make_request('GET', endpoint), endpoints.values())
+                return dict(zip(endpoints, responses))
+        
+        return self._loop_thread.run(self._gather(endpoints))
+    
+    def fetch_drafts(self, app_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批量获取工作流草稿，返回应用ID到草稿数据的字典"""
+        responses = self.fetch_all({
+            app_id: self.connector._get_endpoint('workflow_draft', app_id=app_id) for app_id in app_ids
+        })
+        return {app_id: response.get('data', response) if response else None for app_id, response in responses.items()}
+    
+    def fetch_apps(self, app_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批量获取应用详情，返回应用ID到应用数据的字典"""
+        responses = self.fetch_all({
+            app_id: self.connector._get_endpoint('app_detail', app_id=app_id) for app_id in app_ids
+        })
+        return {app_id: response.get('data', response) if response else None for app_id, response in responses.items()}
@@ -0,0 +1,234 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from services.config_service import config
+from services.workflow_service import WorkflowService
+from services.app_dsl_service import AppDslService
+from services.archive_writer import ArchiveWriter, create_archive_writer
+from models.app import App, Workflow
+
+logger = logging.getLogger(__name__)
+
+# 归档中记录每个文件导出结果的清单文件名
+MANIFEST_FILENAME = "manifest.json"
+
+# 默认的批量导出线程数
+DEFAULT_MAX_WORKERS = 8
+
+# 数据库模式下每次批量预取的应用数量
+DEFAULT_PREFETCH_CHUNK_SIZE = 500
+
+
+def build_export_filename(workflow_name: str, app_id: str) -> str:
+    """根据工作流名称生成安全的导出文件名"""
+    # 清理文件名，移除特殊字符
+    safe_name = "".join(c for c in workflow_name if c.isalnum() or c in (' ', '-', '_')).strip()
+    safe_name = safe_name.replace(' ', '_')  # 空格替换为下划线
+    if not safe_name:  # 如果名称为空，使用app_id作为fallback
+        safe_name = f"workflow-{app_id[:8]}"
+    return f"{safe_name}.yml"
+
+
+class BatchExportService:
+    """批量导出服务"""
+    
+    # 按数据源共享的并发信号量，限制所有批量导出请求对同一数据源的并发访问
+    _source_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+    _semaphore_lock = threading.Lock()
+    
+    def __init__(self):
+        self.workflow_service = WorkflowService()
+    
+    def _get_max_workers(self) -> int:
+        """获取批量导出线程池大小"""
+        export_config = config.get_export_config()
+        return max(1, int(export_config.get('max_workers', DEFAULT_MAX_WORKERS)))
+    
+    def _get_source_concurrency(self, data_source: str) -> int:
+        """获取指定数据源的并发上限"""
+        export_config = config.get_export_config()
+        limits = export_config.get('source_concurrency', {}) or {}
+        if data_source in limits:
+            return max(1, int(limits[data_source]))
+        
+        # 数据库模式下并发不能超过连接池大小，否则会耗尽连接
+        if data_source == 'database':
+            return max(1, int(config.get_database_config().get('pool_size', 10)))
+        return self._get_max_workers()
+    
+    def _get_source_semaphore(self) -> threading.BoundedSemaphore:
+        """获取当前数据源的并发信号量"""
+        data_source = config.get_data_source()
+        with self._semaphore_lock:
+            semaphore = self._source_semaphores.get(data_source)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._get_source_concurrency(data_source))
+                self._source_semaphores[data_source] = semaphore
+            return semaphore
+    
+    def _get_prefetch_chunk_size(self) -> int:
+        """获取每次批量预取的应用数量"""
+        export_config = config.get_export_config()
+        return max(1, int(export_config.get('prefetch_chunk_size', DEFAULT_PREFETCH_CHUNK_SIZE)))
+    
+    def _export_app_limited(
+        self, app_id: str, include_secret: bool, source: Optional[Tuple[App, Workflow]] = None
+    ) -> Dict[str, Any]:
+        """在数据源并发上限内导出单个应用"""
+        if source is not None:
+            # 已预取的数据只需序列化，不再占用数据源并发
+            return self.export_app(app_id, include_secret, source)
+        with self._get_source_semaphore():
+            return self.export_app(app_id, include_secret)
+    
+    def export_app(
+        self, app_id: str, include_secret: bool = False, source: Optional[Tuple[App, Workflow]] = None
+    ) -> Dict[str, Any]:
+        """
+        导出单个应用的DSL，失败时返回错误结果而不抛出异常
+        
+        export.strategy 为 native 且没有预取数据时先使用Dify原生导出接口，失败时退回本地生成。
+        :param app_id: 应用ID
+        :param include_secret: 是否包含secret变量
+        :param source: 已预取的 (应用实例, 工作流实例)，为None时逐个加载
+        :return: 导出结果，包含耗时 duration_ms
+        """
+        started_at = time.perf_counter()
+        try:
+            native = self.workflow_service.export_native_dsl(app_id, include_secret) if source is None else None
+            if native is not None:
+                dsl_data, workflow_name = native
+            else:
+                # 一次性加载应用和工作流
+                app_model, workflow = source or self.workflow_service.load_export_source(app_id)
+                
+                # 导出DSL（内容未变化时命中缓存）
+                dsl_data, _ = AppDslService.export_dsl_cached(
+                    app_model=app_model,
+                    workflow=workflow,
+                    include_secret=include_secret
+                )
+                
+                # 生成文件名 - 使用工作流名称
+                workflow_name = getattr(workflow, 'app_name', None) or app_model.name
+            
+            return {
+                "app_id": app_id,
+                "success": True,
+                "data": dsl_data,
+                "filename": build_export_filename(workflow_name, app_id),
+                "workflow_name": workflow_name,
+                "duration_ms": int((time.perf_counter() - started_at) * 1000)
+            }
+        
+        except Exception as e:
+            logger.error(f"导出应用 {app_id} 失败: {e}")
+            return {
+                "app_id": app_id,
+                "success": False,
+                "error": str(e),
+                "workflow_name": f"工作流 {app_id[:8]}",
+                "duration_ms": int((time.perf_counter() - started_at) * 1000)
+            }
+    
+    def iter_export(self, app_ids: List[str], include_secret: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        并发导出应用，按输入顺序逐个产出结果
+        
+        数据库和API模式下按块批量预取应用和工作流，数据库每块只需两条查询，API模式并发请求；
+        使用Dify原生导出时每个应用只需一次请求，不再预取。
+        导出任务在有界线程池中执行，最多预先提交 2 * max_workers 个任务，
+        单个应用失败不影响其他应用。
+        :param app_ids: 应用ID列表
+        :param include_secret: 是否包含secret变量
+        """
+        native = self.workflow_service.use_native_export()
+        prefetch = not native and (config.is_database_enabled() or config.is_api_enabled())
+        chunk_size = self._get_prefetch_chunk_size() if prefetch else len(app_ids)
+        for start in range(0, len(app_ids), max(1, chunk_size)):
+            chunk = app_ids[start:start + chunk_size]
+            sources = {} if native else self.workflow_service.load_export_sources(chunk)
+            yield from self._iter_export_chunk(chunk, include_secret, sources)
+    
+    def _iter_export_chunk(
+        self, app_ids: List[str], include_secret: bool, sources: Dict[str, Tuple[App, Workflow]]
+    ) -> Iterator[Dict[str, Any]]:
+        """在线程池中导出一组应用，按输入顺序产出结果"""
+        max_workers = min(self._get_max_workers(), len(app_ids))
+        if max_workers <= 1:
+            for app_id in app_ids:
+                yield self._export_app_limited(app_id, include_secret, sources.get(app_id))
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-export")
+        pending = deque()
+        remaining = iter(app_ids)
+        
+        def submit_next() -> None:
+            for app_id in remaining:
+                pending.append(executor.submit(
+                    self._export_app_limited, app_id, include_secret, sources.get(app_id)
+                ))
+                return
+        
+        try:
+            for _ in range(max_workers * 2):
+                submit_next()
+            
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                yield result
+        finally:
+            # 客户端中断下载时取消尚未开始的任务
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stream_archive(
+        self,
+        results: Iterable[Dict[str, Any]],
+        writer: Optional[ArchiveWriter] = None,
+        manifest_extra: Optional[Dict[str, Any]] = None
+    ) -> Iterator[bytes]:
+        """
+        将导出结果流式写入归档，每写入一个文件就产出对应的字节块
+        
+        DSL内容写入后即被丢弃，各文件的导出结果（不含DSL内容）
+        作为 manifest.json 写在归档末尾。
+        :param results: 导出结果迭代器
+        :param writer: 归档写入器，为None时按 export.archive 配置创建
+        :param manifest_extra: 额外写入 manifest.json 的字段
+        """
+        writer = writer or create_archive_writer()
+        manifest = []
+        
+        for result in results:
+            if result["success"]:
+                chunk = writer.write_file(result["filename"], result["data"])
+            else:
+                # 为失败的导出创建错误文件
+                error_content = f"导出失败: {result['error']}"
+                chunk = writer.write_file(f"ERROR-{result['app_id']}.txt", error_content)
+            
+            manifest.append({k: v for k, v in result.items() if k != "data"})
+            
+            if chunk:
+                yield chunk
+        
+        yield writer.write_file(MANIFEST_FILENAME, json.dumps({
+            "exported_at": datetime.now().isoformat(),
+            **(manifest_extra or {}),
+            "success_count": sum(1 for r in manifest if r["success"]),
+            "total_count": len(manifest),
+            "results": manifest
+        }, ensure_ascii=False, indent=2))
+        yield writer.close()
+
+
+# 全局批量导出服务实例
+batch_export_service = BatchExportService()
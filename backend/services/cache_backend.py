@@ -0,0 +1,366 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from services.config_service import config
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存过期时间(秒)与最大条目数
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1000
+# 文件缓存的默认目录和数据库文件名
+DEFAULT_CACHE_DIR = "./cache"
+CACHE_DB_NAME = "cache.db"
+# Redis 缓存的默认键前缀
+DEFAULT_REDIS_PREFIX = "dify-export:"
+
+
+class CacheBackend:
+    """
+    缓存后端基类
+    
+    值须可JSON序列化；读写失败只记录日志并视为未命中，缓存故障不影响正常请求。
+    shared 为True的后端可被多个工作进程共享。
+    """
+    
+    type = ""
+    shared = False
+    
+    def __init__(self, default_ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，不存在、已过期或读取失败时返回None"""
+        try:
+            value = self._get(key)
+        except Exception as e:
+            logger.warning(f"读取缓存失败 ({self.type}): {e}")
+            value = None
+        
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        写入缓存，超过容量时淘汰最久未使用的条目
+        :param key: 缓存键
+        :param value: 可JSON序列化的值
+        :param ttl: 过期时间(秒)，为None时使用默认值
+        """
+        try:
+            self._set(key, value, self.default_ttl if ttl is None else ttl)
+        except Exception as e:
+            logger.warning(f"写入缓存失败 ({self.type}): {e}")
+    
+    def delete(self, key: str) -> None:
+        """删除缓存条目"""
+        try:
+            self._delete(key)
+        except Exception as e:
+            logger.warning(f"删除缓存失败 ({self.type}): {e}")
+    
+    def clear(self, prefix: str = "") -> None:
+        """清空缓存，指定 prefix 时只清除以其开头的键"""
+        try:
+            self._clear(prefix)
+        except Exception as e:
+            logger.warning(f"清空缓存失败 ({self.type}): {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        return {
+            "type": self.type,
+            "shared": self.shared,
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+    
+    def _get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+    
+    def _set(self, key: str, value: Any, ttl: int) -> None:
+        raise NotImplementedError
+    
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+    
+    def _clear(self, prefix: str) -> None:
+        raise NotImplementedError
+
+
+class NullCacheBackend(CacheBackend):
+    """cache.enabled 为false时使用，不缓存任何内容"""
+    
+    type = "none"
+    
+    def _get(self, key):
+        return None
+    
+    def _set(self, key, value, ttl):
+        pass
+    
+    def _delete(self, key):
+        pass
+    
+    def _clear(self, prefix):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内LRU缓存，值按引用保存，读取时不复制"""
+    
+    type = "memory"
+    
+    def __init__(self, default_ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(default_ttl, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def _clear(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["entries"] = len(self._entries)
+        return stats
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    SQLite文件缓存，同一台机器上的多个工作进程共享
+    
+    使用WAL模式允许并发读，每个线程使用独立连接；
+    条目数超过上限时按最近访问时间淘汰。
+    """
+    
+    type = "file"
+    shared = True
+    
+    def __init__(self, path: Path, default_ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(default_ttl, max_entries)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的连接，自动提交模式"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+    
+    def _get(self, key):
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        
+        value, expires_at = row
+        now = time.time()
+        if now >= expires_at:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+    
+    def _set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now + ttl, now)
+        )
+        
+        # 先清除过期条目，仍超出上限时淘汰最久未访问的条目
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        overflow = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+    
+    def _delete(self, key):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+    
+    def _clear(self, prefix):
+        self._connect().execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        try:
+            stats["entries"] = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存统计失败 ({self.type}): {e}")
+        return stats
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis协议缓存（Redis、Valkey、KeyDB等），可跨机器共享
+    
+    过期由服务端的键TTL处理；另用一个有序集合记录访问时间，
+    条目数超过上限时淘汰最久未访问的键。
+    """
+    
+    type = "redis"
+    shared = True
+    
+    def __init__(self, url: str, prefix: str = DEFAULT_REDIS_PREFIX,
+                 default_ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(default_ttl, max_entries)
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+        self._lru_key = f"{prefix}__lru__"
+    
+    def _get(self, key):
+        full_key = self.prefix + key
+        value = self._client.get(full_key)
+        if value is None:
+            self._client.zrem(self._lru_key, full_key)
+            return None
+        
+        self._client.zadd(self._lru_key, {full_key: time.time()})
+        return json.loads(value)
+    
+    def _set(self, key, value, ttl):
+        full_key = self.prefix + key
+        pipe = self._client.pipeline()
+        pipe.set(full_key, json.dumps(value, ensure_ascii=False), ex=max(1, int(ttl)))
+        pipe.zadd(self._lru_key, {full_key: time.time()})
+        pipe.zcard(self._lru_key)
+        count = pipe.execute()[-1]
+        
+        overflow = count - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in self._client.zpopmin(self._lru_key, overflow)]
+            if evicted:
+                self._client.delete(*evicted)
+    
+    def _delete(self, key):
+        full_key = self.prefix + key
+        self._client.delete(full_key)
+        self._client.zrem(self._lru_key, full_key)
+    
+    def _clear(self, prefix):
+        keys = list(self._client.scan_iter(match=f"{self.prefix}{prefix}*"))
+        keys = [key for key in keys if key != self._lru_key.encode()]
+        if keys:
+            self._client.delete(*keys)
+            self._client.zrem(self._lru_key, *keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        try:
+            stats["entries"] = self._client.zcard(self._lru_key)
+        except Exception as e:
+            logger.warning(f"读取缓存统计失败 ({self.type}): {e}")
+        return stats
+
+
+def create_cache_backend(cache_config: Optional[Dict[str, Any]] = None, namespace: str = "",
+                         max_entries: Optional[int] = None) -> CacheBackend:
+    """
+    根据 cache 配置创建缓存后端
+    
+    cache.type 可选 memory（默认）、file（SQLite文件）或 redis；
+    redis 未安装或类型未知时退回进程内缓存。
+    :param cache_config: 缓存配置，为None时读取 cache 配置段；是否启用总是由 config.is_cache_enabled() 决定
+    :param namespace: 命名空间，不同命名空间的条目分开存储、各自按容量淘汰
+    :param max_entries: 最大条目数，为None时读取 cache.max_entries
+    """
+    if cache_config is None:
+        cache_config = config.get_cache_config() or {}
+    if not config.is_cache_enabled():
+        return NullCacheBackend()
+    
+    cache_type = cache_config.get('type') or 'memory'
+    ttl = int(cache_config.get('ttl', DEFAULT_TTL))
+    if max_entries is None:
+        max_entries = int(cache_config.get('max_entries', DEFAULT_MAX_ENTRIES))
+    
+    if cache_type == 'file':
+        cache_dir = Path((cache_config.get('file') or {}).get('cache_dir', DEFAULT_CACHE_DIR))
+        db_name = f"cache_{namespace}.db" if namespace else CACHE_DB_NAME
+        return SQLiteCacheBackend(cache_dir / db_name, ttl, max_entries)
+    
+    if cache_type == 'redis':
+        if redis is None:
+            logger.warning("缓存类型 redis 需要安装 redis: pip install redis，已改用进程内缓存")
+            return MemoryCacheBackend(ttl, max_entries)
+        redis_config = cache_config.get('redis') or {}
+        return RedisCacheBackend(
+            redis_config.get('url', 'redis://localhost:6379/0'),
+            redis_config.get('prefix', DEFAULT_REDIS_PREFIX) + (f"{namespace}:" if namespace else ""),
+            ttl,
+            max_entries
+        )
+    
+    if cache_type != 'memory':
+        logger.warning(f"未知的缓存类型: {cache_type}，已改用进程内缓存")
+    return MemoryCacheBackend(ttl, max_entries)
+
+
+# 全局缓存后端实例
+cache_backend = create_cache_backend()
+# 应用详情缓存，条目数随应用数增长，使用单独的命名空间和容量，不会挤出应用列表
+app_detail_cache = create_cache_backend(
+    namespace="app_details",
+    max_entries=int((config.get_cache_config() or {}).get('detail_max_entries', DEFAULT_MAX_ENTRIES))
+)
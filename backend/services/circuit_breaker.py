@@ -0,0 +1,161 @@
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+import requests
+
+from services.config_service import config
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+# 默认配置: 连续失败多少次后熔断、熔断后多久(秒)放行试探请求、半开状态同时放行的试探请求数
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+DEFAULT_HALF_OPEN_MAX_CALLS = 1
+# 视为实例不可用的最终响应状态码（503已由限速器按 Retry-After 重试过）
+FAILURE_STATUS_CODES = {502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """实例处于熔断状态，请求未发送；继承 ConnectionError，现有的请求异常处理同样适用"""
+
+
+class CircuitBreaker:
+    """
+    单个实例的熔断器
+    
+    连续失败（连接错误、超时、5xx重试耗尽）达到 failure_threshold 次后进入熔断(open)，
+    之后的请求立即失败而不再等待超时；经过 recovery_timeout 秒进入半开(half_open)，
+    只放行 half_open_max_calls 个试探请求，成功则恢复(closed)，失败则重新熔断。
+    """
+    
+    def __init__(self, name: str, enabled: bool = True,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+                 half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS):
+        self.name = name
+        self.enabled = enabled
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = max(0.0, recovery_timeout)
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._half_open_at = 0.0
+        self._last_error = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """当前状态，熔断时间已过时视为半开"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+    
+    def _current_state(self, now: float) -> str:
+        """调用方须持有锁"""
+        if self._state == STATE_OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = STATE_HALF_OPEN
+            self._half_open_calls = 0
+            self._half_open_at = now
+        elif self._state == STATE_HALF_OPEN and now - self._half_open_at >= self.recovery_timeout:
+            # 试探请求迟迟没有结果（如请求未发出就出错）时重新放行，避免一直停在半开状态
+            self._half_open_calls = 0
+            self._half_open_at = now
+        return self._state
+    
+    def before_request(self) -> None:
+        """
+        发送请求前检查是否放行
+        :raises CircuitOpenError: 处于熔断状态，或半开状态的试探请求数已满
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == STATE_CLOSED:
+                return
+            if state == STATE_HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+            retry_in = max(0.0, self.recovery_timeout - (now - self._opened_at))
+            last_error = self._last_error
+        
+        raise CircuitOpenError(f"实例 {self.name} 连接异常，已熔断，{retry_in:.0f} 秒后重试: {last_error}")
+    
+    def record_success(self) -> None:
+        """请求成功，半开状态下恢复"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state != STATE_CLOSED:
+                logger.info(f"实例 {self.name} 已恢复，熔断器关闭")
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._last_error = None
+    
+    def release(self) -> None:
+        """请求被限流将要重试，归还半开状态占用的试探名额，不记录成功或失败"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == STATE_HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+    
+    def record_failure(self, error: Any) -> None:
+        """
+        请求失败，连续失败达到阈值或试探请求失败时熔断
+        :param error: 异常或失败原因，状态中显示为 last_error
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error)
+            if self._state == STATE_HALF_OPEN or (
+                    self._state == STATE_CLOSED and self._failures >= self.failure_threshold):
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"实例 {self.name} 连续失败 {self._failures} 次，熔断 {self.recovery_timeout:.0f} 秒: {error}"
+                )
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "enabled": self.enabled,
+                "state": state,
+                "failures": self._failures,
+                "retry_in": round(max(0.0, self.recovery_timeout - (now - self._opened_at)), 1)
+                if state == STATE_OPEN else 0,
+                "last_error": self._last_error,
+            }
+
+
+def create_circuit_breaker(name: str, instance_key: str) -> CircuitBreaker:
+    """
+    根据 circuit_breaker 配置创建熔断器
+    :param name: 会话名称，用于日志
+    :param instance_key: 数据源为 "source"，目标实例为实例ID；circuit_breaker.instances 中对应的配置覆盖默认值
+    """
+    breaker_config = dict(config.get_circuit_breaker_config())
+    overrides = (breaker_config.pop('instances', None) or {}).get(instance_key) or {}
+    breaker_config.update(overrides)
+    
+    return CircuitBreaker(
+        name,
+        enabled=bool(breaker_config.get('enabled', True)),
+        failure_threshold=int(breaker_config.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD)),
+        recovery_timeout=float(breaker_config.get('recovery_timeout', DEFAULT_RECOVERY_TIMEOUT)),
+        half_open_max_calls=int(breaker_config.get('half_open_max_calls', DEFAULT_HALF_OPEN_MAX_CALLS))
+    )
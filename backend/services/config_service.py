@@ -153,6 +153,18 @@ class ConfigService:
     
 
     
+    def get_http_config(self) -> Dict[str, Any]:
+        """获取HTTP连接池和超时配置"""
+        return self._config.get('http', {}) or {}
+    
+    def get_rate_limit_config(self) -> Dict[str, Any]:
+        """获取各实例请求限速配置"""
+        return self._config.get('rate_limit', {}) or {}
+    
+    def get_circuit_breaker_config(self) -> Dict[str, Any]:
+        """获取各实例熔断配置"""
+        return self._config.get('circuit_breaker', {}) or {}
+    
     def get_export_config(self) -> Dict[str, Any]:
         """获取导出配置"""
         return self._config.get('export', {})
@@ -180,8 +192,8 @@ class ConfigService:
 
     
     def is_cache_enabled(self) -> bool:
-        """检查是否启用缓存"""
-        return self._config.get('cache', {}).get('enabled', False)
+        """检查是否启用缓存，未配置 cache.enabled 时默认启用"""
+        return bool((self._config.get('cache') or {}).get('enabled', True))
     
     def reload_config(self) -> None:
         """重新加载配置文件"""
@@ -235,6 +247,10 @@ class ConfigService:
         log_dir = Path(log_file).parent
         log_dir.mkdir(parents=True, exist_ok=True)
         
+        # 创建导出任务产物目录
+        jobs_config = self.get_export_config().get('jobs', {}) or {}
+        Path(jobs_config.get('spool_dir', './data/export_jobs')).mkdir(parents=True, exist_ok=True)
+        
         # 创建缓存目录
         cache_config = self.get_cache_config()
         if cache_config.get('type') == 'file':
@@ -1,4 +1,5 @@
 import json
+import uuid
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
@@ -11,7 +12,8 @@ except ImportError:
     ThreadedConnectionPool = None
 
 from .config_service import config
-from models.app import App, Workflow, EnvironmentVariable, AppMode
+from .single_flight import single_flight, make_key
+from models.app import App, Workflow, WorkflowSummary, EnvironmentVariable, AppMode
 
 class DatabaseConnector:
     """数据库连接器，用于从Dify数据库获取数据"""
@@ -60,7 +62,16 @@ class DatabaseConnector:
             self.pool.putconn(conn)
     
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
-        """执行数据库查询"""
+        """
+        执行数据库查询
+        并发的相同查询（数据库、SQL和参数都相同）合并为一次，共享同一结果，调用方不应修改返回的行
+        """
+        db_config = self.config.get_database_config()
+        key = make_key("db", db_config.get('host'), db_config.get('port'), db_config.get('database'), query, params)
+        return single_flight.do(key, lambda: self._execute_query(query, params))
+    
+    def _execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """在连接池的连接上执行查询"""
         conn = None
         try:
             conn = self.get_connection()
@@ -97,18 +108,7 @@ class DatabaseConnector:
                 logging.warning(f"未找到应用ID为 {app_id} 的应用")
                 return None
             
-            app_data = results[0]
-            return App(
-                id=app_data['id'],
-                name=app_data['name'],
-                mode=app_data['mode'],
-                icon=app_data.get('icon', '🤖'),
-                icon_type=app_data.get('icon_type', 'emoji'),
-                icon_background=app_data.get('icon_background', '#FFEAD5'),
-                description=app_data.get('description', ''),
-                use_icon_as_answer_icon=app_data.get('use_icon_as_answer_icon', False),
-                tenant_id=app_data['tenant_id']
-            )
+            return self._build_app(results[0])
         except Exception as e:
             logging.error(f"获取应用信息失败: {e}")
             return None
@@ -132,39 +132,158 @@ class DatabaseConnector:
             if not results:
                 return None
             
-            workflow_data = results[0]
-            
-            # 解析JSON字段
-            graph = self._parse_json_field(workflow_data['graph'])
-            features = self._parse_json_field(workflow_data['features']) 
-            environment_variables_data = self._parse_json_field(workflow_data['environment_variables']) or []
-            
-            # 解析环境变量
-            env_vars = []
-            for env_var_data in environment_variables_data:
-                if isinstance(env_var_data, dict):
-                    env_vars.append(EnvironmentVariable(
-                        name=env_var_data.get('name', ''),
-                        value=env_var_data.get('value', ''),
-                        value_type=env_var_data.get('value_type', 'string')
-                    ))
-            
-            # 构造工作流对象
-            workflow = Workflow(
-                id=workflow_data['id'],
-                app_id=workflow_data['app_id'],
-                version=workflow_data['version'],
-                graph=graph,
-                features=features,
-                environment_variables=env_vars
-            )
-            
-            return workflow
+            return self._build_workflow(results[0])
             
         except Exception as e:
             logging.error(f"获取工作流失败: {e}")
             return None
     
+    def get_apps_by_ids(self, app_ids: List[str]) -> Dict[str, App]:
+        """
+        批量获取应用信息，一次查询返回所有应用
+        :param app_ids: 应用ID列表
+        :return: 以应用ID为键的应用字典，未找到的应用不包含在内
+        """
+        if not self.config.is_database_enabled():
+            return {}
+        
+        valid_ids = self._filter_uuid_ids(app_ids)
+        if not valid_ids:
+            return {}
+        
+        db_config = self.config.get_database_config()
+        table_name = db_config.get('tables', {}).get('apps', 'apps')
+        
+        query = f"""
+            SELECT id, name, mode, icon, icon_type, icon_background, 
+                   description, use_icon_as_answer_icon, tenant_id, 
+                   created_at, updated_at
+            FROM {table_name}
+            WHERE id = ANY(%s::uuid[])
+        """
+        
+        try:
+            results = self.execute_query(query, (valid_ids,))
+            return {str(app_data['id']): self._build_app(app_data) for app_data in results}
+        except Exception as e:
+            logging.error(f"批量获取应用信息失败: {e}")
+            return {}
+    
+    def get_workflows_by_app_ids(self, app_ids: List[str]) -> Dict[str, Workflow]:
+        """
+        批量获取每个应用最新的工作流，一次查询返回所有工作流
+        :param app_ids: 应用ID列表
+        :return: 以应用ID为键的工作流字典，没有工作流的应用不包含在内
+        """
+        if not self.config.is_database_enabled():
+            return {}
+        
+        valid_ids = self._filter_uuid_ids(app_ids)
+        if not valid_ids:
+            return {}
+        
+        # 每个app_id只取最新的工作流
+        workflow_query = """
+            SELECT DISTINCT ON (wf.app_id)
+                wf.id, wf.app_id, wf.version, wf.graph, wf.features, wf.environment_variables
+            FROM workflows wf
+            WHERE wf.app_id = ANY(%s::uuid[])
+            ORDER BY wf.app_id, wf.created_at DESC
+        """
+        
+        try:
+            results = self.execute_query(workflow_query, (valid_ids,))
+            workflows = {}
+            for workflow_data in results:
+                try:
+                    workflow = self._build_workflow(workflow_data)
+                    workflows[str(workflow.app_id)] = workflow
+                except Exception as e:
+                    logging.error(f"解析工作流数据失败 (ID: {workflow_data.get('id', 'unknown')}): {e}")
+            return workflows
+        except Exception as e:
+            logging.error(f"批量获取工作流失败: {e}")
+            return {}
+    
+    def get_app_change_times(self, since: Optional[datetime] = None) -> Dict[str, datetime]:
+        """
+        获取每个应用的最后变更时间，取应用记录和其工作流 updated_at 的较大者
+        :param since: 只返回在此时间之后变更的应用（UTC），为None时返回全部应用
+        :return: 以应用ID为键的最后变更时间字典
+        """
+        if not self.config.is_database_enabled():
+            return {}
+        
+        db_config = self.config.get_database_config()
+        table_name = db_config.get('tables', {}).get('apps', 'apps')
+        
+        # GREATEST 会忽略NULL，没有工作流的应用按应用记录的更新时间计算
+        query = f"""
+            SELECT a.id AS app_id, GREATEST(a.updated_at, MAX(wf.updated_at)) AS changed_at
+            FROM {table_name} a
+            LEFT JOIN workflows wf ON wf.app_id = a.id
+            GROUP BY a.id, a.updated_at
+        """
+        params = None
+        if since is not None:
+            query += " HAVING GREATEST(a.updated_at, MAX(wf.updated_at)) > %s"
+            params = (since,)
+        query += " ORDER BY changed_at"
+        
+        results = self.execute_query(query, params)
+        return {str(row['app_id']): row['changed_at'] for row in results if row['changed_at'] is not None}
+    
+    def _filter_uuid_ids(self, app_ids: List[str]) -> List[str]:
+        """过滤掉不是合法UUID的应用ID，避免整条批量查询因类型转换失败"""
+        valid_ids = []
+        for app_id in app_ids:
+            try:
+                uuid.UUID(str(app_id))
+                valid_ids.append(str(app_id))
+            except ValueError:
+                logging.warning(f"跳过非法的应用ID: {app_id}")
+        return valid_ids
+    
+    def _build_app(self, app_data: Dict[str, Any]) -> App:
+        """根据查询结果构造应用对象"""
+        return App(
+            id=str(app_data['id']),
+            name=app_data['name'],
+            mode=app_data['mode'],
+            icon=app_data.get('icon', '🤖'),
+            icon_type=app_data.get('icon_type', 'emoji'),
+            icon_background=app_data.get('icon_background', '#FFEAD5'),
+            description=app_data.get('description', ''),
+            use_icon_as_answer_icon=app_data.get('use_icon_as_answer_icon', False),
+            tenant_id=str(app_data['tenant_id'])
+        )
+    
+    def _build_workflow(self, workflow_data: Dict[str, Any]) -> Workflow:
+        """根据查询结果构造工作流对象"""
+        # 解析JSON字段
+        graph = self._parse_json_field(workflow_data['graph'])
+        features = self._parse_json_field(workflow_data['features'])
+        environment_variables_data = self._parse_json_field(workflow_data['environment_variables']) or []
+        
+        # 解析环境变量
+        env_vars = []
+        for env_var_data in environment_variables_data:
+            if isinstance(env_var_data, dict):
+                env_vars.append(EnvironmentVariable(
+                    name=env_var_data.get('name', ''),
+                    value=env_var_data.get('value', ''),
+                    value_type=env_var_data.get('value_type', 'string')
+                ))
+        
+        return Workflow(
+            id=str(workflow_data['id']),
+            app_id=str(workflow_data['app_id']),
+            version=workflow_data['version'],
+            graph=graph,
+            features=features,
+            environment_variables=env_vars
+        )
+    
     def get_all_workflows(self) -> List[Workflow]:
         """获取所有工作流"""
         if not self.config.is_database_enabled():
@@ -184,33 +303,7 @@ class DatabaseConnector:
             
             for workflow_data in results:
                 try:
-                    # 解析JSON字段
-                    graph = self._parse_json_field(workflow_data['graph'])
-                    features = self._parse_json_field(workflow_data['features'])
-                    environment_variables_data = self._parse_json_field(workflow_data['environment_variables']) or []
-                    
-                    # 解析环境变量
-                    env_vars = []
-                    for env_var_data in environment_variables_data:
-                        if isinstance(env_var_data, dict):
-                            env_vars.append(EnvironmentVariable(
-                                name=env_var_data.get('name', ''),
-                                value=env_var_data.get('value', ''),
-                                value_type=env_var_data.get('value_type', 'string')
-                            ))
-                    
-                    # 构造工作流对象
-                    workflow = Workflow(
-                        id=workflow_data['id'],
-                        app_id=workflow_data['app_id'],
-                        version=workflow_data['version'],
-                        graph=graph,
-                        features=features,
-                        environment_variables=env_vars
-                    )
-                    
-                    workflows.append(workflow)
-                    
+                    workflows.append(self._build_workflow(workflow_data))
                 except Exception as e:
                     logging.error(f"解析工作流数据失败 (ID: {workflow_data.get('id', 'unknown')}): {e}")
                     continue
@@ -373,20 +466,61 @@ class DatabaseConnector:
                 return {}
         return {}
 
-    def get_workflows_paginated(self, page: int = 1, page_size: int = 20, search: str = "") -> dict:
+    def get_mode_stats(self, search: str = "") -> Dict[str, int]:
+        """
+        按应用类型统计有工作流的应用数量，在数据库中聚合，不读取工作流内容
+        :param search: 搜索关键词，与分页查询的过滤条件一致
+        :return: 应用类型到应用数量的字典
         """
-        分页获取工作流列表
-        :param page: 页码（从1开始）
+        if not self.config.is_database_enabled():
+            return {}
+        
+        search_condition = ""
+        search_params = []
+        if search:
+            search_condition = "WHERE (a.name ILIKE %s OR wf.app_id::text ILIKE %s)"
+            search_params = [f"%{search}%", f"%{search}%"]
+        
+        # 应用类型按应用区分，同一应用的多个工作流只计一次
+        query = f"""
+            SELECT COALESCE(a.mode, 'workflow') AS app_mode, COUNT(DISTINCT wf.app_id) AS count
+            FROM workflows wf
+            LEFT JOIN apps a ON wf.app_id = a.id
+            {search_condition}
+            GROUP BY COALESCE(a.mode, 'workflow')
+        """
+        
+        try:
+            results = self.execute_query(query, search_params)
+            return {row['app_mode']: row['count'] for row in results}
+        except Exception as e:
+            logging.error(f"统计应用类型失败: {e}")
+            return {}
+    
+    def get_workflows_paginated(
+        self, page: int = 1, page_size: int = 20, search: str = "", after_app_id: Optional[str] = None
+    ) -> dict:
+        """
+        分页获取工作流列表摘要
+        
+        节点数和是否包含secret变量在SQL中计算，只对当前页的行解析JSON，
+        不把 graph / features 等完整内容传回应用。
+        传入 after_app_id 时使用键集分页（wf.app_id > 游标），深页与第一页代价相同。
+        :param page: 页码（从1开始），键集分页时忽略
         :param page_size: 每页数量
         :param search: 搜索关键词
-        :return: 包含工作流列表和总数的字典
+        :param after_app_id: 上一页最后一个应用的ID
+        :return: 包含工作流摘要列表、总数和是否有下一页的字典
         """
         if not self.config.is_database_enabled():
-            return {"workflows": [], "total": 0}
+            return {"workflows": [], "total": 0, "has_next": False}
+        
+        if after_app_id is not None and not self._filter_uuid_ids([after_app_id]):
+            raise ValueError("无效的分页游标")
             
         try:
-            # 计算偏移量
-            offset = (page - 1) * page_size
+            # 计算偏移量，键集分页时从游标之后开始
+            offset = (page - 1) * page_size if after_app_id is None else 0
             
             # 构建搜索条件
             search_condition = ""
@@ -395,6 +529,13 @@ class DatabaseConnector:
                 search_condition = "WHERE (a.name ILIKE %s OR wf.app_id::text ILIKE %s)"
                 search_params = [f"%{search}%", f"%{search}%"]
             
+            # 键集条件，按 app_id 排序与 DISTINCT ON 的顺序一致
+            page_condition = search_condition
+            page_params = list(search_params)
+            if after_app_id is not None:
+                page_condition += (" AND " if search_condition else "WHERE ") + "wf.app_id > %s::uuid"
+                page_params.append(after_app_id)
+            
             # 获取总数的查询 - 按app_id去重
             count_query = f"""
                 SELECT COUNT(DISTINCT wf.app_id)
@@ -403,59 +544,59 @@ class DatabaseConnector:
                 {search_condition}
             """
             
-            # 获取分页数据的查询 - 每个app_id只取最新的工作流
+            # 获取分页数据的查询 - 子查询中每个app_id只取最新的工作流并分页，
+            # 外层只对当前页的行计算节点数和secret标记
             data_query = f"""
-                SELECT DISTINCT ON (wf.app_id)
-                    wf.id, wf.app_id, wf.version, wf.graph, wf.features, 
-                    wf.environment_variables, wf.created_at,
-                    a.name as app_name, a.description as app_description, a.mode as app_mode
-                FROM workflows wf
-                LEFT JOIN apps a ON wf.app_id = a.id
-                {search_condition}
-                ORDER BY wf.app_id, wf.created_at DESC
-                LIMIT %s OFFSET %s
+                SELECT
+                    p.id, p.app_id, p.version, p.updated_at,
+                    p.app_name, p.app_description, p.app_mode,
+                    CASE WHEN jsonb_typeof(p.graph::jsonb -> 'nodes') = 'array'
+                         THEN jsonb_array_length(p.graph::jsonb -> 'nodes') ELSE 0 END AS node_count,
+                    CASE WHEN jsonb_typeof(p.environment_variables::jsonb) = 'array'
+                         THEN EXISTS (
+                             SELECT 1 FROM jsonb_array_elements(p.environment_variables::jsonb) env
+                             WHERE env ->> 'value_type' = 'secret'
+                         )
+                         ELSE FALSE END AS has_secret_variables
+                FROM (
+                    SELECT DISTINCT ON (wf.app_id)
+                        wf.id, wf.app_id, wf.version, wf.graph, wf.environment_variables,
+                        COALESCE(wf.updated_at, wf.created_at) AS updated_at,
+                        a.name as app_name, a.description as app_description, a.mode as app_mode
+                    FROM workflows wf
+                    LEFT JOIN apps a ON wf.app_id = a.id
+                    {page_condition}
+                    ORDER BY wf.app_id, wf.created_at DESC
+                    LIMIT %s OFFSET %s
+                ) p
+                ORDER BY p.app_id
             """
             
             # 执行总数查询
             count_results = self.execute_query(count_query, search_params)
             total = count_results[0]['count'] if count_results else 0
             
-            # 执行分页查询
-            data_params = search_params + [page_size, offset]
+            # 执行分页查询，多取一行用于判断是否有下一页
+            data_params = page_params + [page_size + 1, offset]
             data_results = self.execute_query(data_query, data_params)
+            has_next = len(data_results) > page_size
+            data_results = data_results[:page_size]
             
             workflows = []
             for workflow_data in data_results:
                 try:
-                    # 解析JSON字段
-                    graph = self._parse_json_field(workflow_data['graph'])
-                    features = self._parse_json_field(workflow_data['features'])
-                    environment_variables_data = self._parse_json_field(workflow_data['environment_variables']) or []
-                    
-                    # 解析环境变量
-                    env_vars = []
-                    for env_var_data in environment_variables_data:
-                        if isinstance(env_var_data, dict):
-                            env_vars.append(EnvironmentVariable(
-                                name=env_var_data.get('name', ''),
-                                value=env_var_data.get('value', ''),
-                                value_type=env_var_data.get('value_type', 'string')
-                            ))
-                    
-                    # 构造工作流对象
-                    workflow = Workflow(
-                        id=workflow_data['id'],
-                        app_id=workflow_data['app_id'],
+                    app_id = str(workflow_data['app_id'])
+                    workflows.append(WorkflowSummary(
+                        id=str(workflow_data['id']),
+                        app_id=app_id,
                         version=workflow_data['version'],
-                        graph=graph,
-                        features=features,
-                        environment_variables=env_vars,
-                        app_name=workflow_data.get('app_name') or f"工作流 {workflow_data['app_id'][:8]}",
+                        app_name=workflow_data.get('app_name') or f"工作流 {app_id[:8]}",
                         app_description=workflow_data.get('app_description') or '',
-                        app_mode=workflow_data.get('app_mode') or 'workflow'
-                    )
-                    
-                    workflows.append(workflow)
+                        app_mode=workflow_data.get('app_mode') or 'workflow',
+                        node_count=workflow_data['node_count'],
+                        has_secret_variables=workflow_data['has_secret_variables'],
+                        updated_at=workflow_data.get('updated_at')
+                    ))
                     
                 except Exception as e:
                     logging.error(f"解析工作流数据失败 (ID: {workflow_data.get('id', 'unknown')}): {e}")
@@ -463,12 +604,13 @@ class DatabaseConnector:
             
             return {
                 "workflows": workflows,
-                "total": total
+                "total": total,
+                "has_next": has_next
             }
             
         except Exception as e:
             logging.error(f"分页获取工作流失败: {e}")
-            return {"workflows": [], "total": 0}
+            return {"workflows": [], "total": 0, "has_next": False}
 
 
 # 全局数据库连接器实例
@@ -0,0 +1,31 @@
+import json
+from typing import Any, Iterable, Optional
+
+from flask import Response, stream_with_context
+
+# 长时间没有事件时发送的注释行，防止代理因空闲断开连接
+KEEPALIVE_COMMENT = ": keep-alive\n\n"
+
+
+def format_sse_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """
+    将事件格式化为Server-Sent Events文本
+    :param event: 事件名称
+    :param data: 事件数据，序列化为JSON
+    :param event_id: 事件ID，客户端重连时通过 Last-Event-ID 回传
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_response(events: Iterable[str]) -> Response:
+    """将事件生成器包装为 text/event-stream 响应"""
+    response = Response(stream_with_context(events), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # 禁止Nginx缓冲，保证事件及时下发
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
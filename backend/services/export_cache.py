@@ -0,0 +1,82 @@
+import json
+import hashlib
+import logging
+from typing import Optional
+
+from services.config_service import config
+from services.cache_backend import CacheBackend, MemoryCacheBackend, cache_backend, create_cache_backend
+from models.app import App, Workflow
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存条目数与过期时间(秒)
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_TTL = 3600
+
+
+def compute_export_key(app_model: App, workflow: Optional[Workflow], include_secret: bool, dsl_version: str) -> str:
+    """
+    计算导出内容的规范化哈希，作为缓存键和ETag
+    
+    哈希只包含会影响DSL内容的字段（不含 export_time 等每次导出都会变化的字段，
+    以及不写入DSL、默认工作流每次随机生成的工作流ID），因此同一份未修改的工作流总是得到相同的哈希。
+    """
+    payload = {
+        "dsl_version": dsl_version,
+        "include_secret": include_secret,
+        "app": app_model.model_dump(exclude={"tenant_id"}),
+        "workflow": workflow.model_dump(exclude={"id"}) if workflow else None,
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ExportCache:
+    """
+    导出DSL缓存，以内容哈希为键，按LRU和TTL淘汰
+    
+    cache.type 为可共享的后端时在其中的 export 命名空间与其他工作进程共用导出结果，
+    否则使用独立的进程内缓存；容量都由 export.cache.max_entries 控制。
+    """
+    
+    key_prefix = "export:"
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: int = DEFAULT_TTL, enabled: bool = True,
+                 backend: Optional[CacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.backend = backend or MemoryCacheBackend(ttl, max_entries)
+    
+    def get(self, key: str) -> Optional[str]:
+        """获取缓存的DSL，不存在或已过期时返回None"""
+        if not self.enabled:
+            return None
+        return self.backend.get(self.key_prefix + key)
+    
+    def set(self, key: str, value: str) -> None:
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        if not self.enabled:
+            return
+        self.backend.set(self.key_prefix + key, value, self.ttl)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        self.backend.clear(self.key_prefix)
+        logger.info("导出缓存已清除")
+
+
+def _create_export_cache() -> ExportCache:
+    """根据 export.cache 配置创建导出缓存，共享后端时使用单独的命名空间，不会挤出应用列表"""
+    cache_config = config.get_export_config().get('cache', {}) or {}
+    max_entries = int(cache_config.get('max_entries', DEFAULT_MAX_ENTRIES))
+    return ExportCache(
+        max_entries=max_entries,
+        ttl=int(cache_config.get('ttl', DEFAULT_TTL)),
+        enabled=cache_config.get('enabled', True),
+        backend=create_cache_backend(namespace="export", max_entries=max_entries) if cache_backend.shared else None
+    )
+
+
+# 全局导出缓存实例
+export_cache = _create_export_cache()
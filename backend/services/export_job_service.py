@@ -0,0 +1,303 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from services.config_service import config
+from services.batch_export_service import batch_export_service
+from services.archive_writer import ArchiveWriter, create_archive_writer
+
+logger = logging.getLogger(__name__)
+
+# 导出任务产物的默认存放目录、并发任务数和保留时间(秒)
+DEFAULT_SPOOL_DIR = "./data/export_jobs"
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+DEFAULT_RETENTION = 86400
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# 已结束的任务状态
+FINISHED_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class ExportJobCancelled(Exception):
+    """导出任务被取消"""
+
+
+class ExportJob:
+    """
+    异步导出任务，记录每个应用的导出进度和最终的归档
+    
+    每完成一个应用追加一条 progress 事件，任务结束时追加一条 done 事件，
+    事件按追加顺序编号，供SSE接口推送和断线续传。
+    """
+    
+    def __init__(self, job_id: str, app_ids: List[str], include_secret: bool, writer: ArchiveWriter):
+        self.id = job_id
+        self.app_ids = app_ids
+        self.include_secret = include_secret
+        self.writer = writer
+        self.status = JobStatus.PENDING
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.filename = f"workflows-export-{datetime.now().strftime('%Y%m%d_%H%M%S')}{writer.extension}"
+        self.archive_path: Optional[Path] = None
+        self.archive_size = 0
+        self.items: List[Dict[str, Any]] = [{"app_id": app_id, "status": "pending"} for app_id in app_ids]
+        self.completed_count = 0
+        self.success_count = 0
+        self.events: List[Dict[str, Any]] = []
+        self.cancel_event = threading.Event()
+        self.lock = threading.RLock()
+        self._events_changed = threading.Condition(self.lock)
+    
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    def record_result(self, index: int, result: Dict[str, Any]) -> None:
+        """记录单个应用的导出结果"""
+        with self.lock:
+            item = {
+                "app_id": result["app_id"],
+                "status": "success" if result["success"] else "failed",
+                "workflow_name": result.get("workflow_name"),
+                "duration_ms": result.get("duration_ms"),
+            }
+            if result["success"]:
+                item["filename"] = result["filename"]
+                self.success_count += 1
+            else:
+                item["error"] = result.get("error")
+            self.items[index] = item
+            self.completed_count += 1
+            
+            self._append_event("progress", {
+                "index": index,
+                **item,
+                "completed_count": self.completed_count,
+                "total_count": len(self.app_ids),
+            })
+    
+    def finish(self, status: JobStatus, error: Optional[str] = None) -> None:
+        """结束任务并追加 done 事件"""
+        with self.lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self._append_event("done", self.to_dict(include_items=False))
+    
+    def _append_event(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append({"event": event, "data": data})
+        self._events_changed.notify_all()
+    
+    def wait_events(self, cursor: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        等待并返回编号不小于 cursor 的事件
+        :param cursor: 起始事件编号
+        :param timeout: 没有新事件时的最长等待时间(秒)
+        :return: (新事件列表, 任务是否已结束)
+        """
+        with self.lock:
+            self._events_changed.wait_for(lambda: len(self.events) > cursor or self.is_finished, timeout)
+            return self.events[cursor:], self.is_finished
+    
+    def to_dict(self, include_items: bool = True) -> Dict[str, Any]:
+        """转换为接口返回的任务状态"""
+        with self.lock:
+            data = {
+                "job_id": self.id,
+                "status": self.status.value,
+                "total_count": len(self.app_ids),
+                "completed_count": self.completed_count,
+                "success_count": self.success_count,
+                "failed_count": self.completed_count - self.success_count,
+                "filename": self.filename,
+                "archive_format": self.writer.format,
+                "archive_size": self.archive_size,
+                "error": self.error,
+                "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+                "finished_at": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            }
+            if include_items:
+                data["items"] = [dict(item) for item in self.items]
+            return data
+
+
+class ExportJobService:
+    """异步导出任务服务，在后台线程中导出并将归档写入spool目录"""
+    
+    def __init__(self):
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _get_jobs_config(self) -> Dict[str, Any]:
+        """获取导出任务配置"""
+        return config.get_export_config().get('jobs', {}) or {}
+    
+    def _get_retention(self) -> int:
+        """获取已结束任务及其产物的保留时间(秒)"""
+        return int(self._get_jobs_config().get('retention', DEFAULT_RETENTION))
+    
+    def get_spool_dir(self) -> Path:
+        """获取导出产物目录，不存在时自动创建"""
+        spool_dir = Path(self._get_jobs_config().get('spool_dir', DEFAULT_SPOOL_DIR))
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        return spool_dir
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取执行导出任务的线程池，同时运行的任务数受 max_concurrent_jobs 限制"""
+        with self._lock:
+            if self._executor is None:
+                max_jobs = int(self._get_jobs_config().get('max_concurrent_jobs', DEFAULT_MAX_CONCURRENT_JOBS))
+                self._executor = ThreadPoolExecutor(max_workers=max(1, max_jobs), thread_name_prefix="export-job")
+            return self._executor
+    
+    def create_job(
+        self,
+        app_ids: List[str],
+        include_secret: bool = False,
+        archive_format: Optional[str] = None,
+        compression_level: Optional[int] = None
+    ) -> ExportJob:
+        """
+        创建导出任务并提交到后台执行
+        :param app_ids: 应用ID列表
+        :param include_secret: 是否包含secret变量
+        :param archive_format: 归档格式，为None时使用 export.archive 配置
+        :param compression_level: 压缩级别，为None时使用配置或格式默认值
+        :return: 导出任务
+        :raises ValueError: 归档格式或压缩级别不合法
+        """
+        writer = create_archive_writer(archive_format, compression_level)
+        self.cleanup_expired()
+        
+        job = ExportJob(uuid.uuid4().hex, list(app_ids), include_secret, writer)
+        with self._lock:
+            self._jobs[job.id] = job
+        
+        self._get_executor().submit(self._run_job, job)
+        logger.info(f"已创建导出任务 {job.id}，共 {len(app_ids)} 个应用")
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[ExportJob]:
+        """根据ID获取导出任务"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel_job(self, job_id: str) -> Optional[ExportJob]:
+        """
+        取消导出任务；任务已结束时删除任务及其产物
+        :param job_id: 任务ID
+        :return: 被取消或删除的任务，不存在时返回None
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        
+        if job.is_finished:
+            self._remove_job(job)
+        else:
+            job.cancel_event.set()
+            logger.info(f"已请求取消导出任务 {job_id}")
+        return job
+    
+    def _remove_job(self, job: ExportJob) -> None:
+        """移除任务并删除其产物"""
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        if job.archive_path is not None:
+            job.archive_path.unlink(missing_ok=True)
+    
+    def _run_job(self, job: ExportJob) -> None:
+        """在后台线程中执行导出任务"""
+        with job.lock:
+            if job.cancel_event.is_set():
+                job.finish(JobStatus.CANCELLED)
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+        
+        archive_path = self.get_spool_dir() / f"{job.id}{job.writer.extension}"
+        part_path = archive_path.with_name(archive_path.name + ".part")
+        try:
+            results = self._track_progress(job, batch_export_service.iter_export(job.app_ids, job.include_secret))
+            with open(part_path, 'wb') as f:
+                for chunk in batch_export_service.stream_archive(results, job.writer):
+                    f.write(chunk)
+            os.replace(part_path, archive_path)
+            
+            with job.lock:
+                job.archive_path = archive_path
+                job.archive_size = archive_path.stat().st_size
+                job.finish(JobStatus.COMPLETED)
+            logger.info(f"导出任务 {job.id} 完成，成功 {job.success_count}/{len(job.app_ids)}")
+        
+        except ExportJobCancelled:
+            part_path.unlink(missing_ok=True)
+            job.finish(JobStatus.CANCELLED)
+            logger.info(f"导出任务 {job.id} 已取消")
+        
+        except Exception as e:
+            part_path.unlink(missing_ok=True)
+            job.finish(JobStatus.FAILED, str(e))
+            logger.error(f"导出任务 {job.id} 失败: {e}")
+    
+    def _track_progress(self, job: ExportJob, results: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """记录每个应用的导出结果，任务被取消时中止导出"""
+        try:
+            for index, result in enumerate(results):
+                job.record_result(index, result)
+                yield result
+                if job.cancel_event.is_set():
+                    raise ExportJobCancelled()
+        finally:
+            # 关闭导出生成器，取消尚未开始的导出
+            results.close()
+    
+    def cleanup_expired(self) -> None:
+        """清理超过保留时间的已结束任务，以及spool目录中遗留的过期文件"""
+        retention = self._get_retention()
+        now = time.time()
+        
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.is_finished and job.finished_at and now - job.finished_at >= retention
+            ]
+            active_ids = {job.id for job in self._jobs.values() if job not in expired}
+        
+        for job in expired:
+            self._remove_job(job)
+        
+        try:
+            for path in self.get_spool_dir().iterdir():
+                job_id = path.name.split('.', 1)[0]
+                if job_id not in active_ids and now - path.stat().st_mtime >= retention:
+                    path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"清理导出任务目录失败: {e}")
+        
+        if expired:
+            logger.info(f"已清理 {len(expired)} 个过期导出任务")
+
+
+# 全局导出任务服务实例
+export_job_service = ExportJobService()
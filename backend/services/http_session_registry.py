@@ -0,0 +1,233 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.config_service import config
+from services.circuit_breaker import CircuitBreaker, FAILURE_STATUS_CODES, create_circuit_breaker
+from services.rate_limiter import AdaptiveRateLimiter, THROTTLE_STATUS_CODES, create_rate_limiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# 连接池默认配置: 每个会话缓存的主机连接池数、每个主机保留的连接数
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 32
+# 默认的连接超时和读取超时(秒)
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+
+# 主Dify实例（数据源）会话的名称
+SOURCE_SESSION = "source"
+# 收到503时可以安全重发的请求方法；429表示请求未被处理，任何方法都可重发
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def target_session_name(instance_id: str) -> str:
+    """目标实例会话的名称"""
+    return f"target:{instance_id}"
+
+
+def _instance_key(name: str) -> str:
+    """会话名称对应的 rate_limit.instances 和 circuit_breaker.instances 配置键: 数据源为 source，目标实例为实例ID"""
+    return name.split(":", 1)[1] if name.startswith("target:") else name
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+    记录请求数和进行中请求数的连接池适配器
+    
+    每个请求发送前经过实例的熔断器和限速器；收到429/503时通知限速器减速，
+    并在 Retry-After 之后重发，重试次数由 rate_limit.max_retries 控制。
+    连接错误、超时和最终的502/503/504计入熔断器的失败次数。
+    """
+    
+    def __init__(self, rate_limiter: AdaptiveRateLimiter, circuit_breaker: CircuitBreaker, *args, **kwargs):
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.requests_total = 0
+        self.in_flight = 0
+        self._counter_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+    
+    def _can_resend(self, request, status_code: int) -> bool:
+        """被限流的请求能否重发: 流式请求体无法重读，503只重发幂等请求"""
+        if hasattr(request.body, 'read'):
+            return False
+        return status_code == 429 or request.method in IDEMPOTENT_METHODS
+    
+    def _record_result(self, response):
+        """按最终响应更新熔断器"""
+        if response.status_code in FAILURE_STATUS_CODES:
+            self.circuit_breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            self.circuit_breaker.record_success()
+        return response
+    
+    def send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            # 熔断时直接抛出 CircuitOpenError，不等待连接超时
+            self.circuit_breaker.before_request()
+            self.rate_limiter.acquire()
+            with self._counter_lock:
+                self.requests_total += 1
+                self.in_flight += 1
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.RetryError) as e:
+                self.circuit_breaker.record_failure(e)
+                raise
+            finally:
+                with self._counter_lock:
+                    self.in_flight -= 1
+            
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                self.rate_limiter.on_success()
+                return self._record_result(response)
+            
+            self.rate_limiter.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+            if attempt >= self.rate_limiter.max_retries or not self._can_resend(request, response.status_code):
+                return self._record_result(response)
+            attempt += 1
+            self.circuit_breaker.release()
+            logger.warning(f"请求被限流 (HTTP {response.status_code})，正在重试 ({attempt}/{self.rate_limiter.max_retries}): {request.method} {request.url}")
+            response.close()
+    
+    def pool_stats(self) -> list:
+        """各主机连接池的使用情况"""
+        pools = []
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{key.key_scheme}://{key.key_host}:{key.key_port}",
+                "maxsize": pool.pool.maxsize if pool.pool else 0,
+                # 连接队列中预先填充了None占位，只统计实际保留的空闲连接
+                "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+                "connections_created": pool.num_connections,
+                "requests": pool.num_requests,
+            })
+        return pools
+
+
+class HttpSessionRegistry:
+    """
+    HTTP会话注册表，数据源和每个目标实例各使用一个带连接池的会话
+    
+    会话在首次使用时按 http 配置创建并一直复用，连接保持keep-alive，
+    避免每次请求都重新建立TCP和TLS连接。每个实例另有按 rate_limit 配置创建的
+    限速器和按 circuit_breaker 配置创建的熔断器，同步会话和异步客户端共用。
+    """
+    
+    def __init__(self):
+        self._sessions: Dict[str, Tuple[requests.Session, _PooledAdapter]] = {}
+        self._limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get_rate_limiter(self, name: str) -> AdaptiveRateLimiter:
+        """
+        获取指定会话对应实例的限速器，不存在时创建
+        :param name: 会话名称，如 SOURCE_SESSION 或 target_session_name(instance_id)
+        """
+        with self._lock:
+            return self._get_rate_limiter(name)
+    
+    def _get_rate_limiter(self, name: str) -> AdaptiveRateLimiter:
+        """获取限速器，调用方须持有锁"""
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            limiter = self._limiters[name] = create_rate_limiter(_instance_key(name))
+        return limiter
+    
+    def get_circuit_breaker(self, name: str) -> CircuitBreaker:
+        """
+        获取指定会话对应实例的熔断器，不存在时创建
+        :param name: 会话名称，如 SOURCE_SESSION 或 target_session_name(instance_id)
+        """
+        with self._lock:
+            return self._get_circuit_breaker(name)
+    
+    def _get_circuit_breaker(self, name: str) -> CircuitBreaker:
+        """获取熔断器，调用方须持有锁"""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = create_circuit_breaker(name, _instance_key(name))
+        return breaker
+    
+    def get_session(self, name: str, max_retries: Optional[Retry] = None, verify: bool = True) -> requests.Session:
+        """
+        获取指定名称的会话，不存在时创建
+        :param name: 会话名称，如 SOURCE_SESSION 或 target_session_name(instance_id)
+        :param max_retries: 适配器的重试策略，只在创建会话时使用，为None时不重试
+        :param verify: 是否校验TLS证书，只在创建会话时使用
+        """
+        with self._lock:
+            entry = self._sessions.get(name)
+            if entry is None:
+                http_config = config.get_http_config()
+                adapter = _PooledAdapter(
+                    self._get_rate_limiter(name),
+                    self._get_circuit_breaker(name),
+                    pool_connections=int(http_config.get('pool_connections', DEFAULT_POOL_CONNECTIONS)),
+                    pool_maxsize=int(http_config.get('pool_maxsize', DEFAULT_POOL_MAXSIZE)),
+                    max_retries=max_retries or 0
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.verify = verify
+                entry = self._sessions[name] = (session, adapter)
+            return entry[0]
+    
+    def get_timeout(self, read_timeout: Optional[float] = None) -> Tuple[float, float]:
+        """
+        获取 (连接超时, 读取超时)，可直接作为 requests 的 timeout 参数
+        :param read_timeout: 读取超时，为None时使用 http.read_timeout 配置
+        """
+        http_config = config.get_http_config()
+        connect_timeout = float(http_config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT))
+        if read_timeout is None:
+            read_timeout = http_config.get('read_timeout', DEFAULT_READ_TIMEOUT)
+        return connect_timeout, float(read_timeout)
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取各会话的请求数、连接池使用情况、限速器和熔断器状态"""
+        with self._lock:
+            entries = list(self._sessions.items())
+        
+        return {
+            name: {
+                "requests": adapter.requests_total,
+                "in_flight": adapter.in_flight,
+                "pools": adapter.pool_stats(),
+                "rate_limit": adapter.rate_limiter.stats(),
+                "circuit": adapter.circuit_breaker.stats(),
+            }
+            for name, (_, adapter) in entries
+        }
+    
+    def close(self, name: str) -> None:
+        """关闭并移除指定会话，下次使用时重新创建"""
+        with self._lock:
+            entry = self._sessions.pop(name, None)
+        if entry is not None:
+            entry[0].close()
+    
+    def close_all(self) -> None:
+        """关闭所有会话"""
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for session, _ in entries:
+            session.close()
+        logger.info("HTTP会话已全部关闭")
+
+
+# 全局会话注册表实例
+http_session_registry = HttpSessionRegistry()
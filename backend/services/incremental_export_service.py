@@ -0,0 +1,187 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from services.config_service import config
+from services.workflow_service import WorkflowService
+from services.batch_export_service import batch_export_service
+from services.archive_writer import ArchiveWriter
+
+logger = logging.getLogger(__name__)
+
+# 各数据源导出水位线的默认存放文件
+DEFAULT_WATERMARK_FILE = "./data/export_watermarks.json"
+
+
+def to_utc_datetime(value: Any) -> Optional[datetime]:
+    """
+    将时间值统一转换为带时区的UTC时间
+    :param value: datetime（不带时区时视为UTC）、Unix时间戳或ISO 8601字符串
+    :return: UTC时间，值为空时返回None
+    """
+    if value is None or value == "":
+        return None
+    
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    elif isinstance(value, str):
+        text = value.strip()
+        try:
+            return datetime.fromtimestamp(float(text), tz=timezone.utc)
+        except ValueError:
+            pass
+        # Python 3.11 之前的 fromisoformat 不支持 Z 后缀
+        if text.endswith(("Z", "z")):
+            text = text[:-1] + "+00:00"
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"无法解析的时间: {value}")
+    else:
+        raise ValueError(f"无法解析的时间: {value}")
+    
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def format_watermark(value: Optional[datetime]) -> Optional[str]:
+    """将水位线格式化为ISO 8601字符串"""
+    return value.isoformat() if value is not None else None
+
+
+class IncrementalExportService:
+    """
+    增量导出服务，只导出在水位线之后变更过的应用
+    
+    应用的变更时间取应用记录和其工作流 updated_at 的较大者；
+    每个数据源的水位线保存在JSON文件中，导出全部成功后才会前移。
+    """
+    
+    def __init__(self):
+        self.workflow_service = WorkflowService()
+        self._lock = threading.Lock()
+    
+    def _get_incremental_config(self) -> Dict[str, Any]:
+        """获取增量导出配置"""
+        return config.get_export_config().get('incremental', {}) or {}
+    
+    def _get_watermark_file(self) -> Path:
+        """获取水位线文件路径"""
+        return Path(self._get_incremental_config().get('watermark_file', DEFAULT_WATERMARK_FILE))
+    
+    def get_source_key(self) -> str:
+        """获取当前数据源的标识，不同数据源各自维护水位线"""
+        if config.is_database_enabled():
+            db_config = config.get_database_config()
+            return f"database:{db_config.get('host')}:{db_config.get('port')}/{db_config.get('database')}"
+        if config.is_api_enabled():
+            return f"api:{config.get_api_config().get('base_url', '').rstrip('/')}"
+        return config.get_data_source()
+    
+    def _load_watermarks(self) -> Dict[str, str]:
+        """读取所有数据源的水位线"""
+        path = self._get_watermark_file()
+        if not path.exists():
+            return {}
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f) or {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取导出水位线文件失败: {e}")
+            return {}
+    
+    def get_watermark(self) -> Optional[datetime]:
+        """获取当前数据源已保存的水位线，从未导出过时返回None"""
+        with self._lock:
+            return to_utc_datetime(self._load_watermarks().get(self.get_source_key()))
+    
+    def save_watermark(self, watermark: datetime) -> None:
+        """保存当前数据源的水位线，先写临时文件再替换，避免写入中断损坏文件"""
+        path = self._get_watermark_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._lock:
+            watermarks = self._load_watermarks()
+            watermarks[self.get_source_key()] = format_watermark(watermark)
+            
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(watermarks, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        
+        logger.info(f"导出水位线已更新为 {format_watermark(watermark)}")
+    
+    def find_changed_apps(self, since: Optional[datetime]) -> Tuple[List[str], Optional[datetime]]:
+        """
+        查找在 since 之后变更过的应用
+        :param since: 上次导出的水位线，为None时返回全部应用
+        :return: (按变更时间排序的应用ID列表, 新水位线)，没有变更时新水位线等于 since
+        """
+        query_since = since.astimezone(timezone.utc).replace(tzinfo=None) if since is not None else None
+        change_times = self.workflow_service.get_app_change_times(query_since)
+        
+        changed = []
+        for app_id, changed_at in change_times.items():
+            changed_at = to_utc_datetime(changed_at)
+            if since is None or changed_at > since:
+                changed.append((changed_at, app_id))
+        changed.sort()
+        
+        watermark = changed[-1][0] if changed else since
+        return [app_id for _, app_id in changed], watermark
+    
+    def stream_export(
+        self,
+        app_ids: List[str],
+        since: Optional[datetime],
+        watermark: Optional[datetime],
+        writer: Optional[ArchiveWriter] = None,
+        include_secret: bool = False,
+        commit: bool = True
+    ) -> Iterator[bytes]:
+        """
+        将变更的应用流式导出为归档，水位线写入 manifest.json
+        
+        归档完整产出且所有应用都导出成功后才保存新水位线，
+        客户端中断下载或有应用导出失败时保留原水位线，下次重新导出。
+        :param app_ids: 变更的应用ID列表
+        :param since: 本次导出的起始水位线
+        :param watermark: 本次导出后的新水位线
+        :param writer: 归档写入器，为None时按 export.archive 配置创建
+        :param include_secret: 是否包含secret变量
+        :param commit: 导出成功后是否保存新水位线
+        """
+        failed_count = 0
+        
+        def count_failures(results: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            nonlocal failed_count
+            for result in results:
+                if not result["success"]:
+                    failed_count += 1
+                yield result
+        
+        results = count_failures(batch_export_service.iter_export(app_ids, include_secret))
+        yield from batch_export_service.stream_archive(results, writer, manifest_extra={
+            "incremental": True,
+            "since": format_watermark(since),
+            "watermark": format_watermark(watermark),
+        })
+        
+        if not commit or watermark is None:
+            return
+        if failed_count:
+            logger.warning(f"增量导出有 {failed_count} 个应用失败，水位线保持不变")
+            return
+        self.save_watermark(watermark)
+
+
+# 全局增量导出服务实例
+incremental_export_service = IncrementalExportService()
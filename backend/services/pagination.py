@@ -0,0 +1,60 @@
+import json
+import base64
+from typing import Any, Dict, Optional, Tuple
+
+
+def encode_cursor(app_id: str, search: str = "", offset: Optional[int] = None) -> str:
+    """
+    生成分页游标，游标对客户端不透明
+    :param app_id: 当前页最后一个应用的ID，下一页从它之后开始
+    :param search: 当前的搜索关键词，游标只对同一搜索条件有效
+    :param offset: 下一页在列表中的位置，应用已被删除时用于定位
+    """
+    payload: Dict[str, Any] = {"a": app_id, "s": search}
+    if offset is not None:
+        payload["o"] = offset
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, search: str = "") -> Tuple[str, Optional[int]]:
+    """
+    解析分页游标
+    :param cursor: encode_cursor 生成的游标
+    :param search: 当前的搜索关键词
+    :return: (上一页最后一个应用的ID, 下一页的位置)
+    :raises ValueError: 游标格式不合法或与搜索条件不匹配
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        app_id = str(payload["a"])
+        offset = payload.get("o")
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("无效的分页游标")
+    
+    if payload.get("s", "") != search:
+        raise ValueError("分页游标与搜索条件不匹配，请从第一页重新查询")
+    return app_id, int(offset) if offset is not None else None
+
+
+def locate_after(
+    positions: Dict[str, int],
+    total: int,
+    after_app_id: str,
+    after_offset: Optional[int] = None
+) -> int:
+    """
+    在有序列表中定位游标之后的第一个位置
+    :param positions: 应用ID到列表位置的索引
+    :param total: 列表长度
+    :param after_app_id: 游标中的应用ID
+    :param after_offset: 游标中记录的位置，应用已不在列表中时使用
+    :raises ValueError: 应用不在列表中且游标没有记录位置
+    """
+    index = positions.get(after_app_id)
+    if index is not None:
+        return index + 1
+    if after_offset is not None:
+        return min(max(0, after_offset), total)
+    raise ValueError("分页游标已失效，请从第一页重新查询")
@@ -0,0 +1,166 @@
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from services.config_service import config
+
+logger = logging.getLogger(__name__)
+
+# 表示实例过载或限流的状态码
+THROTTLE_STATUS_CODES = {429, 503}
+# 默认配置: 初始速率、速率上下限(请求/秒)、突发容量、每秒加性增长量、限流时的乘性减小系数
+DEFAULT_INITIAL_RATE = 200.0
+DEFAULT_MIN_RATE = 1.0
+DEFAULT_MAX_RATE = 1000.0
+DEFAULT_BURST = 50
+DEFAULT_INCREASE = 10.0
+DEFAULT_DECREASE_FACTOR = 0.5
+# 被限流的请求默认重试次数
+DEFAULT_MAX_RETRIES = 3
+# 响应没有 Retry-After 时暂停发送的时间，以及 Retry-After 的上限(秒)
+DEFAULT_THROTTLE_DELAY = 1.0
+MAX_RETRY_AFTER = 60.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头
+    :param value: 秒数或HTTP日期
+    :return: 需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """
+    单个实例的自适应令牌桶限速器(AIMD)
+    
+    每个请求发送前取一个令牌，令牌不足时返回需要等待的时间；
+    请求成功时速率每秒约增加 increase，收到429/503时速率乘以 decrease_factor，
+    并在 Retry-After 指定的时间内暂停发放令牌。同一波限流响应只减速一次。
+    未启用时不限速，只遵守 Retry-After。
+    """
+    
+    def __init__(self, enabled: bool = True, initial_rate: float = DEFAULT_INITIAL_RATE,
+                 min_rate: float = DEFAULT_MIN_RATE, max_rate: float = DEFAULT_MAX_RATE,
+                 burst: int = DEFAULT_BURST, increase: float = DEFAULT_INCREASE,
+                 decrease_factor: float = DEFAULT_DECREASE_FACTOR, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.enabled = enabled
+        self.min_rate = max(0.01, min_rate)
+        self.max_rate = max(self.min_rate, max_rate)
+        self.rate = min(max(initial_rate, self.min_rate), self.max_rate)
+        self.burst = max(1, burst)
+        self.increase = increase
+        self.decrease_factor = min(max(decrease_factor, 0.01), 1.0)
+        self.max_retries = max(0, max_retries)
+        
+        self._tokens = float(self.burst)
+        # 上次补充令牌的时间；暂停期间设为暂停结束的时间，之前不补充令牌
+        self._updated_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._throttled = 0
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        """按当前速率补充令牌，调用方须持有锁"""
+        if now > self._updated_at:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+    
+    def reserve(self) -> float:
+        """
+        预留一个令牌
+        :return: 发送请求前需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._updated_at - now)
+            if not self.enabled:
+                return wait
+            
+            self._refill(now)
+            self._tokens -= 1
+            # 令牌为负表示已预留给排队中的请求，按当前速率依次等待
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+    
+    def acquire(self) -> None:
+        """等待直到可以发送请求"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    def on_success(self) -> None:
+        """请求未被限流，加性增加速率"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+    
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        """
+        请求被限流，乘性减小速率并暂停发放令牌
+        :param retry_after: Retry-After 指定的等待秒数，为None时暂停 DEFAULT_THROTTLE_DELAY
+        """
+        delay = min(MAX_RETRY_AFTER, DEFAULT_THROTTLE_DELAY if retry_after is None else retry_after)
+        with self._lock:
+            now = time.monotonic()
+            self._throttled += 1
+            if self.enabled:
+                # 在上次减速后的一个令牌间隔内收到的限流响应属于同一波，不重复减速
+                if now - self._last_decrease >= max(1.0, 1.0 / self.rate):
+                    self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                    self._last_decrease = now
+                    logger.warning(f"请求被限流，速率降至 {self.rate:.1f} 请求/秒，暂停 {delay:.1f} 秒")
+                self._refill(now)
+                self._tokens = min(self._tokens, 0.0)
+            self._updated_at = max(self._updated_at, now + delay)
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取限速器状态"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate": round(self.rate, 2),
+                "min_rate": self.min_rate,
+                "max_rate": self.max_rate,
+                "throttled": self._throttled,
+                "paused_for": round(max(0.0, self._updated_at - time.monotonic()), 2),
+            }
+
+
+def create_rate_limiter(instance_key: str) -> AdaptiveRateLimiter:
+    """
+    根据 rate_limit 配置创建限速器
+    :param instance_key: 数据源为 "source"，目标实例为实例ID；rate_limit.instances 中对应的配置覆盖默认值
+    """
+    rate_config = dict(config.get_rate_limit_config())
+    overrides = (rate_config.pop('instances', None) or {}).get(instance_key) or {}
+    rate_config.update(overrides)
+    
+    return AdaptiveRateLimiter(
+        enabled=bool(rate_config.get('enabled', True)),
+        initial_rate=float(rate_config.get('initial_rate', DEFAULT_INITIAL_RATE)),
+        min_rate=float(rate_config.get('min_rate', DEFAULT_MIN_RATE)),
+        max_rate=float(rate_config.get('max_rate', DEFAULT_MAX_RATE)),
+        burst=int(rate_config.get('burst', DEFAULT_BURST)),
+        increase=float(rate_config.get('increase', DEFAULT_INCREASE)),
+        decrease_factor=float(rate_config.get('decrease_factor', DEFAULT_DECREASE_FACTOR)),
+        max_retries=int(rate_config.get('max_retries', DEFAULT_MAX_RETRIES))
+    )
@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Set
+
+# 参与搜索的应用字段
+SEARCH_FIELDS = ("name", "id", "description")
+
+
+def _normalize(text: Any) -> str:
+    """统一大小写，搜索不区分大小写"""
+    return str(text or "").lower()
+
+
+def _grams(text: str) -> Set[str]:
+    """提取文本中的单字和相邻双字，中文等无空格分词的文字也能按子串匹配"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class AppSearchIndex:
+    """
+    应用列表的内存倒排索引，支持名称、ID和描述的子串搜索
+    
+    按单字和双字建立倒排表，查询时取关键词所有双字（单字关键词取单字）
+    倒排表的交集作为候选，再逐个校验子串，结果与线性扫描完全一致，
+    并保持应用在原列表中的顺序。
+    """
+    
+    def __init__(self, apps: List[Dict[str, Any]]):
+        # 保留原列表对象，调用方可据此判断索引是否对应当前缓存
+        self.apps = apps
+        self._texts: List[List[str]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        
+        for position, app in enumerate(self.apps):
+            texts = [_normalize(app.get(field)) for field in SEARCH_FIELDS]
+            self._texts.append(texts)
+            for gram in set().union(*(_grams(text) for text in texts)):
+                self._postings.setdefault(gram, set()).add(position)
+    
+    def __len__(self) -> int:
+        return len(self.apps)
+    
+    def search(self, keyword: str) -> List[Dict[str, Any]]:
+        """
+        搜索名称、ID或描述中包含关键词的应用
+        :param keyword: 搜索关键词，不区分大小写
+        :return: 匹配的应用，顺序与建立索引时的列表一致
+        """
+        keyword = _normalize(keyword)
+        if not keyword:
+            return list(self.apps)
+        
+        query_grams = {keyword[i:i + 2] for i in range(len(keyword) - 1)} or {keyword}
+        postings = []
+        for gram in query_grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        
+        # 从最短的倒排表开始求交集
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+        
+        return [
+            self.apps[position] for position in sorted(candidates)
+            if any(keyword in text for text in self._texts[position])
+        ]
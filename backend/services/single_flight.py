@@ -0,0 +1,85 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def make_key(*parts: Any) -> str:
+    """
+    由实例、端点和参数等组成请求合并的键
+    参数中的字典按键排序，列表、日期等不可哈希的值也能参与比较
+    """
+    return json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+
+
+class _Call:
+    """一次进行中的上游调用"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    合并并发的相同读请求
+    
+    同一个键同时只执行一次上游调用，其间到达的调用等待并共享同一结果或异常；
+    调用完成后键即被移除，之后的请求重新执行，不起缓存作用。
+    结果按引用共享，调用方不应修改返回的对象。
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+    
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        执行调用，相同键的调用正在进行时等待其结果
+        :param key: 合并键，通常由 make_key(实例, 端点, 参数) 生成
+        :param fn: 实际的上游调用
+        :return: fn 的返回值
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self._executed += 1
+            else:
+                leader = False
+                self._shared += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+    
+    def stats(self) -> Dict[str, int]:
+        """获取合并统计: 实际执行的调用数、共享结果的调用数和进行中的调用数"""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "shared": self._shared,
+                "in_flight": len(self._calls),
+            }
+
+
+# 全局请求合并实例
+single_flight = SingleFlight()
@@ -0,0 +1,194 @@
+import json
+import time
+import base64
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from services.http_session_registry import http_session_registry
+
+logger = logging.getLogger(__name__)
+
+# 无法从令牌解析出过期时间时假定的有效期(秒)
+DEFAULT_TOKEN_TTL = 3600
+# 过期前多久在后台主动刷新(秒)
+REFRESH_MARGIN = 300
+# 距离过期不足此时长(秒)的令牌不再使用，请求会等待刷新完成
+EXPIRY_SKEW = 30
+
+
+def decode_jwt_exp(token: Optional[str]) -> Optional[float]:
+    """
+    解析JWT载荷中的 exp 字段，不校验签名
+    :param token: JWT字符串
+    :return: 过期时间的Unix时间戳，不是JWT或没有 exp 时返回None
+    """
+    try:
+        payload = token.split('.')[1]
+        data = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(data['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class _TokenState:
+    """一个实例和账号的令牌及其刷新状态"""
+    
+    def __init__(self, base_url: str, username: str, password: str, session: requests.Session):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.session = session
+        self.access_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+    
+    def is_usable(self) -> bool:
+        """令牌存在且距离过期超过 EXPIRY_SKEW"""
+        return bool(self.access_token) and time.time() < self.expires_at - EXPIRY_SKEW
+
+
+class TokenManager:
+    """
+    Dify控制台访问令牌管理器
+    
+    令牌按 (实例URL, 用户名) 缓存，数据源连接器和导入目标实例共用；
+    同一账号同时只有一个线程登录或刷新，其他线程等待并直接使用其结果。
+    过期时间取自JWT的 exp 字段，并在过期前 REFRESH_MARGIN 秒于后台主动刷新。
+    """
+    
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], _TokenState] = {}
+        self._lock = threading.Lock()
+    
+    def _get_state(self, base_url: str, username: str, password: str, session: requests.Session) -> _TokenState:
+        """获取账号的令牌状态，不存在时创建"""
+        key = (base_url.rstrip('/'), username)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _TokenState(key[0], username, password, session)
+            state.password = password
+            return state
+    
+    def get_token(self, base_url: str, username: str, password: str, session: requests.Session) -> Optional[str]:
+        """
+        获取有效的访问令牌，必要时刷新或重新登录
+        :param base_url: Dify实例的基础URL
+        :param username: 登录邮箱
+        :param password: 登录密码
+        :param session: 登录和刷新请求使用的会话
+        :return: 访问令牌，登录失败时返回None
+        """
+        state = self._get_state(base_url, username, password, session)
+        if state.is_usable():
+            return state.access_token
+        
+        with state.lock:
+            # 等待期间其他线程可能已完成刷新
+            if not state.is_usable():
+                self._renew(state)
+            return state.access_token if state.is_usable() else None
+    
+    def invalidate(self, base_url: str, username: str, token: Optional[str]) -> None:
+        """
+        请求返回401时作废令牌，只有作废的仍是当前令牌时才生效，
+        并发的多个401只会触发一次刷新
+        """
+        with self._lock:
+            state = self._states.get((base_url.rstrip('/'), username))
+        if state is None:
+            return
+        with state.lock:
+            if token and state.access_token == token:
+                state.expires_at = 0.0
+    
+    def _renew(self, state: _TokenState) -> bool:
+        """
+        刷新令牌，刷新失败时重新登录，调用方须持有 state.lock
+        成功后安排下一次后台刷新；失败时不安排，由之后的请求再次尝试
+        """
+        renewed = bool(state.refresh_token and self._refresh(state)) or self._login(state)
+        if renewed:
+            self._schedule_refresh(state)
+        return renewed
+    
+    def _post(self, state: _TokenState, path: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """向实例发送认证请求，成功时返回 data 字段"""
+        response = state.session.post(f"{state.base_url}{path}", timeout=http_session_registry.get_timeout(), **kwargs)
+        response.raise_for_status()
+        result = response.json()
+        if result.get('result') == 'success' and result.get('data'):
+            return result['data']
+        logger.error(f"认证请求失败: {path} - {result}")
+        return None
+    
+    def _apply(self, state: _TokenState, data: Dict[str, Any]) -> None:
+        """保存新令牌，过期时间取自JWT的 exp 字段"""
+        state.access_token = data.get('access_token')
+        state.refresh_token = data.get('refresh_token') or state.refresh_token
+        state.expires_at = decode_jwt_exp(state.access_token) or time.time() + DEFAULT_TOKEN_TTL
+    
+    def _login(self, state: _TokenState) -> bool:
+        """使用用户名密码登录"""
+        try:
+            data = self._post(state, "/console/api/login", json={
+                "email": state.username,
+                "password": state.password,
+                "language": "zh-Hans",
+                "remember_me": True
+            })
+        except Exception as e:
+            logger.error(f"登录请求失败: {e}")
+            return False
+        
+        if not data:
+            return False
+        self._apply(state, data)
+        logger.info(f"登录成功，获得访问令牌: {state.base_url}")
+        return True
+    
+    def _refresh(self, state: _TokenState) -> bool:
+        """使用刷新令牌换取新的访问令牌"""
+        try:
+            data = self._post(
+                state, "/console/api/refresh-token",
+                headers={"Authorization": f"Bearer {state.refresh_token}"},
+                json={"refresh_token": state.refresh_token}
+            )
+        except Exception as e:
+            logger.error(f"令牌刷新请求失败: {e}")
+            return False
+        
+        if not data:
+            return False
+        self._apply(state, data)
+        logger.info(f"访问令牌刷新成功: {state.base_url}")
+        return True
+    
+    def _schedule_refresh(self, state: _TokenState) -> None:
+        """在令牌过期前 REFRESH_MARGIN 秒安排后台刷新，有效期很短的令牌在剩余时间过半时刷新"""
+        if state.timer is not None:
+            state.timer.cancel()
+        
+        remaining = state.expires_at - time.time()
+        delay = max(remaining - REFRESH_MARGIN, remaining / 2, 0.0)
+        state.timer = threading.Timer(delay, self._background_refresh, args=(state, state.access_token))
+        state.timer.daemon = True
+        state.timer.start()
+    
+    def _background_refresh(self, state: _TokenState, token: str) -> None:
+        """后台主动刷新，请求线程期间仍可使用尚未过期的旧令牌"""
+        with state.lock:
+            # 令牌已被请求线程刷新过时不再重复刷新
+            if state.access_token != token:
+                return
+            self._renew(state)
+
+
+# 全局令牌管理器实例
+token_manager = TokenManager()
@@ -1,10 +1,14 @@
 import json
 import uuid
-import yaml
 import requests
 import logging
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Iterator, Optional, List, Union
 from services.config_service import config
+from services.cache_backend import cache_backend
+from services.circuit_breaker import CircuitOpenError
+from services.http_session_registry import http_session_registry, target_session_name
+from services.token_manager import token_manager
+from services.yaml_serializer import load_yaml
 import base64
 import time
 import urllib3
@@ -14,12 +18,14 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# 目标实例连接成功状态的默认缓存时间(秒)
+DEFAULT_TARGET_STATUS_TTL = 30
+
 
 class WorkflowImportService:
     """工作流导入服务类"""
     
     def __init__(self):
-        self.timeout = 30
         self.retry_count = 3
         self.retry_delay = 1
     
@@ -48,7 +54,7 @@ class WorkflowImportService:
                 }
             
             # 构建导入请求
-            headers = config.get_target_instance_headers(target_instance_id)
+            headers = self._get_headers(target_instance_id)
             
             # 导入API端点（使用配置化端点）
             import_url = config.get_full_api_url('app_import', target_instance_id)
@@ -71,7 +77,7 @@ class WorkflowImportService:
             
             # 发送导入请求
             response = self._make_request_with_retry(
-                'POST', import_url, headers=headers, json=request_data
+                target_instance_id, 'POST', import_url, headers=headers, json=request_data
             )
             
             if response.status_code == 200:
@@ -135,13 +141,13 @@ class WorkflowImportService:
             确认结果
         """
         try:
-            headers = config.get_target_instance_headers(target_instance_id)
+            headers = self._get_headers(target_instance_id)
             
             # 确认导入API端点（使用配置化端点）
             confirm_url = config.get_full_api_url('import_confirm', target_instance_id, import_id=import_id)
             
             response = self._make_request_with_retry(
-                'POST', confirm_url, headers=headers
+                target_instance_id, 'POST', confirm_url, headers=headers
             )
             
             if response.status_code == 200:
@@ -189,22 +195,45 @@ class WorkflowImportService:
         Returns:
             批量导入结果
         """
-        results = []
-        success_count = 0
-        failed_count = 0
-        warning_count = 0
+        results = list(self.iter_batch_import(target_instance_id, workflow_files, import_options))
+        summary = self.summarize_import_results(results, len(workflow_files))
+        
+        logger.info(
+            f"批量导入完成 - 总计: {summary['total_count']}, 成功: {summary['success_count']}, "
+            f"失败: {summary['failed_count']}, 警告: {summary['warning_count']}"
+        )
+        
+        return {'results': results, **summary}
+    
+    def iter_batch_import(
+        self,
+        target_instance_id: str,
+        workflow_files: List[Dict[str, Any]],
+        import_options: Dict[str, Any]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐个导入工作流文件，每处理完一个文件产出一条结果（包含序号 index 和耗时 duration_ms）
         
+        调用方停止迭代时不再导入剩余文件，可用于中途取消批量导入。
+        
+        Args:
+            target_instance_id: 目标实例ID
+            workflow_files: 工作流文件列表
+            import_options: 导入选项
+        """
         logger.info(f"开始批量导入 {len(workflow_files)} 个工作流文件到实例 {target_instance_id}")
         
-        for workflow_file in workflow_files:
+        for index, workflow_file in enumerate(workflow_files):
             filename = workflow_file.get('filename', 'unknown.yaml')
             content = workflow_file.get('content', '')
+            started_at = time.perf_counter()
+            stop = False
             
             logger.info(f"正在导入工作流文件: {filename}")
             
             try:
                 # 解析YAML内容以获取应用信息
-                yaml_data = yaml.safe_load(content)
+                yaml_data = load_yaml(content)
                 app_info = yaml_data.get('app', {})
                 
                 # 构建导入数据
@@ -247,16 +276,10 @@ class WorkflowImportService:
                         result['error'] = confirm_result.get('error', '确认导入失败')
                         logger.error(f"文件 {filename} 导入确认失败: {result['error']}")
                 
-                # 统计结果
-                if result.get('success'):
-                    success_count += 1
-                    if result.get('status') in ['completed-with-warnings', 'pending']:
-                        warning_count += 1
-                else:
-                    failed_count += 1
+                if not result.get('success'):
                     logger.warning(f"文件 {filename} 导入失败: {result.get('error')}")
                     
-                results.append({
+                item = {
                     'filename': filename,
                     'success': result.get('success', False),
                     'app_id': result.get('app_id'),
@@ -265,47 +288,58 @@ class WorkflowImportService:
                     'status': result.get('status'),
                     'error': result.get('error'),
                     'warnings': result.get('warnings', [])
-                })
+                }
                 
             except Exception as e:
                 error_msg = f"处理文件 {filename} 时发生错误: {str(e)}"
                 logger.exception(error_msg)
                 
-                failed_count += 1
-                results.append({
+                item = {
                     'filename': filename,
                     'success': False,
                     'error': error_msg
-                })
+                }
                 
                 # 只有在严重错误且用户明确设置不忽略错误时才停止
                 if not import_options.get('ignore_errors', False) and isinstance(e, (ConnectionError, TimeoutError)):
                     logger.error(f"批量导入因严重错误停止: {error_msg}")
-                    break
+                    stop = True
                 else:
                     logger.warning(f"文件 {filename} 处理失败，继续处理下一个文件: {error_msg}")
         
-        logger.info(f"批量导入完成 - 总计: {len(workflow_files)}, 成功: {success_count}, 失败: {failed_count}, 警告: {warning_count}")
+            item['index'] = index
+            item['duration_ms'] = int((time.perf_counter() - started_at) * 1000)
+            yield item
         
+            if stop:
+                break
+    
+    @staticmethod
+    def summarize_import_results(results: List[Dict[str, Any]], total_count: int) -> Dict[str, int]:
+        """统计批量导入结果"""
+        success_count = sum(1 for r in results if r.get('success'))
+        warning_count = sum(
+            1 for r in results
+            if r.get('success') and r.get('status') in ['completed-with-warnings', 'pending']
+        )
         return {
-            'results': results,
             'success_count': success_count,
-            'total_count': len(workflow_files),
-            'failed_count': failed_count,
+            'total_count': total_count,
+            'failed_count': len(results) - success_count,
             'warning_count': warning_count
         }
     
     def _find_app_by_name(self, target_instance_id: str, app_name: str) -> Optional[Dict[str, Any]]:
         """在目标实例中查找指定名称的应用"""
         try:
-            headers = config.get_target_instance_headers(target_instance_id)
+            headers = self._get_headers(target_instance_id)
             
             # 应用列表API端点（使用配置化端点）
             apps_url = config.get_full_api_url('apps_list', target_instance_id)
             params = {'name': app_name, 'limit': 100}
             
             response = self._make_request_with_retry(
-                'GET', apps_url, headers=headers, params=params
+                target_instance_id, 'GET', apps_url, headers=headers, params=params
             )
             
             if response.status_code == 200:
@@ -335,24 +369,41 @@ class WorkflowImportService:
                 'name': instance.get('name'),
                 'url': instance.get('url'),
                 'is_default': instance.get('is_default', False),
-                'auth_type': instance.get('auth', {}).get('type', 'unknown')
+                'auth_type': instance.get('auth', {}).get('type', 'unknown'),
+                'circuit': http_session_registry.get_circuit_breaker(target_session_name(instance.get('id'))).stats()
             })
         
         return result
     
     def _test_instance_connection(self, instance_id: str) -> str:
-        """测试目标实例的连接状态"""
+        """
+        测试目标实例的连接状态
+        
+        连接成功的结果在缓存中保留 cache.target_status_ttl 秒，多个页面或工作进程
+        同时检查时不重复请求；失败结果不缓存，修正配置后可立即重新测试。
+        """
+        cache_key = f"target:status:{instance_id}"
+        if cache_backend.get(cache_key) == 'connected':
+            return 'connected'
+        
+        status = self._check_instance_connection(instance_id)
+        if status == 'connected':
+            ttl = int(config.get_cache_config().get('target_status_ttl', DEFAULT_TARGET_STATUS_TTL))
+            cache_backend.set(cache_key, status, ttl)
+        return status
+    
+    def _check_instance_connection(self, instance_id: str) -> str:
+        """请求目标实例的应用列表接口检查连接"""
         try:
-            headers = config.get_target_instance_headers(instance_id)
+            headers = self._get_headers(instance_id)
             
             # 尝试访问应用列表API来测试连接（使用配置化端点）
             test_url = config.get_full_api_url('apps_list', instance_id)
             
-            response = requests.get(
+            response = self._get_session(instance_id).get(
                 test_url, 
                 headers=headers, 
-                timeout=10,
-                verify=False
+                timeout=http_session_registry.get_timeout(10)
             )
             
             if response.status_code == 200:
@@ -368,26 +419,80 @@ class WorkflowImportService:
             logger.exception(f"测试连接时发生错误: {e}")
             return 'unknown_error'
     
+    def _get_session(self, target_instance_id: str) -> requests.Session:
+        """获取目标实例的会话，同一实例的请求复用连接池"""
+        return http_session_registry.get_session(target_session_name(target_instance_id), verify=False)
+    
+    def _get_basic_auth(self, target_instance_id: str) -> Optional[Dict[str, Any]]:
+        """获取目标实例的basic认证配置，不是basic认证时返回None"""
+        instance = config.get_target_instance_by_id(target_instance_id) or {}
+        auth_config = instance.get('auth', {})
+        return auth_config if auth_config.get('type') == 'basic' else None
+    
+    def _get_headers(self, target_instance_id: str) -> Dict[str, str]:
+        """
+        获取目标实例的请求头
+        
+        basic认证时用用户名密码登录控制台换取访问令牌，令牌由令牌管理器缓存，
+        与数据源连接器共用，同一账号的并发请求只登录一次。
+        """
+        auth_config = self._get_basic_auth(target_instance_id)
+        if auth_config is None:
+            return config.get_target_instance_headers(target_instance_id)
+        
+        token = token_manager.get_token(
+            config.get_target_instance_base_url(target_instance_id),
+            auth_config.get('username', ''),
+            auth_config.get('password', ''),
+            self._get_session(target_instance_id)
+        )
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        return headers
+    
     def _make_request_with_retry(
         self, 
+        target_instance_id: str,
         method: str, 
         url: str, 
         **kwargs
     ) -> requests.Response:
-        """带重试的HTTP请求"""
+        """
+        带重试的HTTP请求，使用目标实例的连接池会话；basic认证的令牌被拒绝时刷新一次后重试，
+        实例已熔断时立即抛出 CircuitOpenError
+        """
         last_exception = None
+        session = self._get_session(target_instance_id)
+        token_refreshed = False
         
         for attempt in range(self.retry_count):
             try:
-                response = requests.request(
+                response = session.request(
                     method, 
                     url, 
-                    timeout=self.timeout,
-                    verify=False,
+                    timeout=http_session_registry.get_timeout(),
                     **kwargs
                 )
+                
+                auth_config = self._get_basic_auth(target_instance_id)
+                headers = kwargs.get('headers') or {}
+                if (response.status_code == 401 and auth_config and not token_refreshed
+                        and 'Authorization' in headers and attempt < self.retry_count - 1):
+                    token_refreshed = True
+                    token_manager.invalidate(
+                        config.get_target_instance_base_url(target_instance_id),
+                        auth_config.get('username', ''),
+                        headers['Authorization'][len("Bearer "):]
+                    )
+                    kwargs['headers'] = {**headers, **self._get_headers(target_instance_id)}
+                    continue
                 return response
                 
+            except CircuitOpenError as e:
+                # 实例已熔断，重试也会立即失败
+                logger.error(f"请求失败: {e}")
+                raise
             except requests.exceptions.RequestException as e:
                 last_exception = e
                 if attempt < self.retry_count - 1:
@@ -1,28 +1,32 @@
-from typing import Optional, Dict, Any, List
-from models.app import Workflow, EnvironmentVariable, WorkflowNode, WorkflowEdge, App, AppMode
+from typing import Optional, Dict, Any, List, Tuple
+from models.app import Workflow, WorkflowSummary, EnvironmentVariable, WorkflowNode, WorkflowEdge, App, AppMode
 import uuid
 import logging
+from datetime import datetime
 
 from .config_service import config
 from .database_connector import database_connector
 from .api_connector import api_connector
+from .pagination import encode_cursor, decode_cursor, locate_after
+from .yaml_serializer import load_yaml
 
 
 class WorkflowService:
     # 模拟数据库存储（仅作为fallback）
     _workflows: Dict[str, Workflow] = {}
     
-    def get_draft_workflow(self, app_id: str) -> Optional[Workflow]:
+    def get_draft_workflow(self, app_id: str, app_model: Optional[App] = None) -> Optional[Workflow]:
         """
         获取草稿工作流
         :param app_id: 应用ID
+        :param app_model: 已加载的应用信息，API模式下用于避免重复获取应用详情
         :return: 工作流实例或None
         """
         # 根据配置选择数据源
         if config.is_database_enabled():
             return database_connector.get_workflow_by_app_id(app_id)
         elif config.is_api_enabled():
-            return api_connector.get_workflow_by_app_id(app_id)
+            return api_connector.get_workflow_by_app_id(app_id, app_model=app_model)
         else:
             # 使用内存存储作为fallback
             return self._workflows.get(app_id)
@@ -52,20 +56,104 @@ class WorkflowService:
         
         return workflows
     
+    def get_app_model(self, app_id: str) -> Optional[App]:
+        """
+        从数据源获取应用模型
+        :param app_id: 应用ID
+        :return: 应用实例或None
+        """
+        # 根据配置选择数据源
+        if config.is_database_enabled():
+            return database_connector.get_app_by_id(app_id)
+        elif config.is_api_enabled():
+            return api_connector.get_app_by_id(app_id)
+        return None
+    
     def get_or_create_app_model(self, app_id: str) -> App:
         """
         获取或创建应用模型
         :param app_id: 应用ID
         :return: 应用实例
         """
-        # 根据配置选择数据源
-        app_model = None
+        return self._default_app_model(app_id, self.get_app_model(app_id))
+    
+    def load_export_source(self, app_id: str) -> Tuple[App, Workflow]:
+        """
+        加载导出所需的应用和工作流，每个上游资源只读取一次
+        :param app_id: 应用ID
+        :return: (应用实例, 工作流实例)
+        """
+        app_model = self.get_app_model(app_id)
+        
+        workflow = self.get_draft_workflow(app_id, app_model=app_model)
+        if not workflow:
+            workflow = self.create_default_workflow(app_id)
+        
+        return self._default_app_model(app_id, app_model), workflow
+    
+    def use_native_export(self) -> bool:
+        """API模式下 export.strategy 为 native 时使用Dify原生的应用导出接口"""
+        return config.is_api_enabled() and config.get_export_config().get('strategy', 'local') == 'native'
+    
+    def export_native_dsl(self, app_id: str, include_secret: bool = False) -> Optional[Tuple[str, str]]:
+        """
+        通过Dify的应用导出接口获取原生DSL，一次请求即可，不再读取草稿和应用详情
+        :param app_id: 应用ID
+        :param include_secret: 是否包含secret变量
+        :return: (原样返回的DSL字符串, 应用名称)；未启用 native 策略或获取失败时返回None，由调用方在本地生成
+        """
+        if not self.use_native_export():
+            return None
+        
+        dsl_data = api_connector.get_app_export_data(app_id, include_secret)
+        if dsl_data is None:
+            logging.warning(f"原生导出失败，改为本地生成DSL: {app_id}")
+            return None
+        
+        try:
+            app_info = (load_yaml(dsl_data) or {}).get('app') or {}
+        except Exception as e:
+            logging.warning(f"原生导出的DSL无法解析，改为本地生成: {app_id} - {e}")
+            return None
+        return dsl_data, app_info.get('name') or f"工作流 {app_id[:8]}"
+    
+    def load_export_sources(self, app_ids: List[str]) -> Dict[str, Tuple[App, Workflow]]:
+        """
+        批量加载导出所需的应用和工作流
+        
+        数据库模式下用两条集合查询取回所有应用和工作流；API模式下并发请求应用详情和工作流草稿，
+        获取失败的应用不在结果中；内存存储返回空字典，由调用方逐个加载。
+        :param app_ids: 应用ID列表
+        :return: 以应用ID为键的 (应用实例, 工作流实例) 字典
+        """
+        if config.is_api_enabled():
+            return api_connector.get_export_sources(app_ids)
+        if not config.is_database_enabled():
+            return {}
+        
+        apps = database_connector.get_apps_by_ids(app_ids)
+        workflows = database_connector.get_workflows_by_app_ids(app_ids)
+        
+        sources = {}
+        for app_id in app_ids:
+            workflow = workflows.get(app_id) or self.create_default_workflow(app_id)
+            sources[app_id] = (self._default_app_model(app_id, apps.get(app_id)), workflow)
+        return sources
+    
+    def get_app_change_times(self, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        获取每个应用的最后变更时间（应用或其工作流的更新时间中较大者）
+        :param since: 只返回在此时间之后变更的应用（不带时区的UTC时间），仅数据库模式下在查询中过滤
+        :return: 以应用ID为键的最后变更时间字典，数据库模式为datetime，API模式为Unix时间戳
+        """
         if config.is_database_enabled():
-            app_model = database_connector.get_app_by_id(app_id)
+            return database_connector.get_app_change_times(since)
         elif config.is_api_enabled():
-            app_model = api_connector.get_app_by_id(app_id)
-        
-        # 如果没有找到应用，创建一个默认的
+            return api_connector.get_app_change_times()
+        return {}
+    
+    def _default_app_model(self, app_id: str, app_model: Optional[App]) -> App:
+        """应用不存在时创建一个默认的应用模型"""
         if app_model is None:
             app_model = App(
                 id=app_id,
@@ -219,46 +307,99 @@ class WorkflowService:
         return None 
 
     def clear_cache(self):
-        """清除缓存，强制刷新数据"""
+        """重新获取应用列表并替换缓存，刷新期间其他请求仍使用原缓存"""
+        if config.is_api_enabled():
+            api_connector.refresh_cache(force=True)
+            logging.info("工作流服务缓存已刷新")
+    
+    def get_cache_info(self) -> Optional[Dict[str, Any]]:
+        """获取应用列表缓存状态，只有API模式使用缓存，其他模式返回None"""
         if config.is_api_enabled():
-            api_connector.clear_cache()
-            logging.info("工作流服务缓存已清除")
+            return api_connector.get_cache_info()
+        return None
 
-    def get_workflows_paginated(self, page: int = 1, page_size: int = 20, search: str = "") -> dict:
+    def get_mode_stats(self, search: str = "") -> Dict[str, int]:
+        """
+        按应用类型统计全量工作流数量（不分页）
+        :param search: 搜索关键词
+        :return: 应用类型到数量的字典
         """
-        分页获取工作流列表
-        :param page: 页码（从1开始）
+        if config.is_database_enabled():
+            return database_connector.get_mode_stats(search)
+        elif config.is_api_enabled():
+            return api_connector.get_mode_stats(search)
+        
+        # 内存存储的数据量很小，直接按分页结果统计
+        stats: Dict[str, int] = {}
+        for workflow in self.get_workflows_paginated(1, len(self._workflows) or 100, search)["workflows"]:
+            app_mode = workflow.app_mode or 'workflow'
+            stats[app_mode] = stats.get(app_mode, 0) + 1
+        return stats
+    
+    def get_workflows_paginated(
+        self, page: int = 1, page_size: int = 20, search: str = "", after: Optional[str] = None
+    ) -> dict:
+        """
+        分页获取工作流列表摘要
+        
+        传入 after 游标时使用键集分页：数据库模式按 app_id 比较，
+        API和内存模式通过位置索引定位，翻到深页与第一页代价相同。
+        :param page: 页码（从1开始），游标分页时忽略
         :param page_size: 每页数量
         :param search: 搜索关键词
-        :return: 包含工作流列表和总数的字典
+        :param after: 上一页返回的 next_cursor
+        :return: 包含工作流摘要（WorkflowSummary）列表、总数、是否有下一页和 next_cursor 的字典
+        :raises ValueError: 游标不合法或已失效
         """
+        after_app_id, after_offset = decode_cursor(after, search) if after else (None, None)
+        
         # 根据配置选择数据源
         if config.is_database_enabled():
-            return database_connector.get_workflows_paginated(page, page_size, search)
+            result = database_connector.get_workflows_paginated(page, page_size, search, after_app_id)
         elif config.is_api_enabled():
-            return api_connector.get_workflows_paginated(page, page_size, search)
+            result = api_connector.get_workflows_paginated(page, page_size, search, after_app_id, after_offset)
+        else:
+            result = self._get_memory_workflows_paginated(page, page_size, search, after_app_id, after_offset)
+        
+        workflows = result["workflows"]
+        next_cursor = None
+        if result.get("has_next") and workflows:
+            offset = result.get("offset")
+            next_cursor = encode_cursor(
+                workflows[-1].app_id, search, offset + len(workflows) if offset is not None else None
+            )
+        return {**result, "next_cursor": next_cursor}
+    
+    def _get_memory_workflows_paginated(
+        self, page: int, page_size: int, search: str, after_app_id: Optional[str], after_offset: Optional[int]
+    ) -> dict:
+        """使用内存存储作为fallback的分页查询"""
+        workflows = list(self._workflows.values())
+        
+        # 如果没有工作流，创建一些示例工作流
+        if not workflows:
+            sample_app_ids = ["demo-app-001", "demo-app-002", "demo-app-003"]
+            for app_id in sample_app_ids:
+                workflow = self.create_default_workflow(app_id)
+                workflows.append(workflow)
+        
+        # 搜索过滤
+        if search:
+            workflows = [w for w in workflows if search.lower() in w.app_id.lower()]
+        
+        # 分页处理
+        total = len(workflows)
+        if after_app_id is not None:
+            positions = {w.app_id: index for index, w in enumerate(workflows)}
+            start = locate_after(positions, total, after_app_id, after_offset)
         else:
-            # 使用内存存储作为fallback
-            workflows = list(self._workflows.values())
-            
-            # 如果没有工作流，创建一些示例工作流
-            if not workflows:
-                sample_app_ids = ["demo-app-001", "demo-app-002", "demo-app-003"]
-                for app_id in sample_app_ids:
-                    workflow = self.create_default_workflow(app_id)
-                    workflows.append(workflow)
-            
-            # 搜索过滤
-            if search:
-                workflows = [w for w in workflows if search.lower() in w.app_id.lower()]
-            
-            # 分页处理
-            total = len(workflows)
             start = (page - 1) * page_size
-            end = start + page_size
-            paginated_workflows = workflows[start:end]
-            
-            return {
-                "workflows": paginated_workflows,
-                "total": total
-            } 
\ No newline at end of file
+        end = start + page_size
+        paginated_workflows = [WorkflowSummary.from_workflow(w) for w in workflows[start:end]]
+        
+        return {
+            "workflows": paginated_workflows,
+            "total": total,
+            "has_next": end < total,
+            "offset": start
+        }
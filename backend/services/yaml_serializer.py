@@ -0,0 +1,226 @@
+import io
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+import yaml
+from yaml.emitter import Emitter
+
+# libyaml可用时使用C实现的发射器和解析器，否则回退到纯Python实现
+try:
+    from yaml import CDumper as _CDumper, CSafeLoader as _SafeLoader
+    LIBYAML_AVAILABLE = True
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+    _CDumper = None
+    LIBYAML_AVAILABLE = False
+
+# libyaml 与纯Python发射器的输出有几处不同：
+# 1. libyaml 只把BMP内的字符视为可打印字符，emoji等字符会被转义成 "\U0001F916"；
+# 2. 过长的双引号字符串折行方式不同，含Unicode换行符的字符串引号风格不同；
+# 3. 判断简单键的长度规则不同。
+# 为保证输出与 yaml.dump 完全一致，先把上述第2类字符串替换为占位标记，把其余
+# 字符串中的BMP外字符替换为数据中未出现的私有区字符，交给libyaml输出后换回原字符，
+# 再用纯Python发射器在占位标记所在的列和缩进处渲染被替换的字符串；第3类键直接回退。
+_NON_BMP_PATTERN = re.compile('[\U00010000-\U0010FFFF]')
+_PRIVATE_USE_PATTERN = re.compile('[\uE000-\uF8FF]')
+_LINE_BREAK_PATTERN = re.compile('[\n\x85\u2028\u2029]')
+# libyaml 不会在单引号字符串中输出这些换行符
+_UNICODE_BREAK_PATTERN = re.compile('[\x85\u2028\u2029]')
+# 可能需要由纯Python发射器渲染的字符串：含特殊字符或Unicode换行符、换行前有空格或换行后有空格
+_QUOTED_HINT_PATTERN = re.compile(
+    '[^\n\x20-\x7E\xA0-\u2027\u202A-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFE]|\uFEFF'
+    '| [\n\x85\u2028\u2029]|[\n\x85\u2028\u2029] '
+)
+# 需要处理的字符串：可能需要由纯Python发射器渲染，或含私有区字符、BMP外字符
+_SPECIAL_PATTERN = re.compile(
+    '[^\n\x20-\x7E\xA0-\u2027\u202A-\uD7FF\uF900-\uFFFD]|\uFEFF'
+    '| [\n\x85\u2028\u2029]|[\n\x85\u2028\u2029] '
+)
+_PRIVATE_USE_START = 0xE000
+_PRIVATE_USE_END = 0xF8FF
+
+# 仅用于分析字符串会被输出成哪种风格，analyze_scalar 不修改发射器状态
+_scalar_analyzer = Emitter(io.StringIO(), allow_unicode=True)
+
+
+class _FallbackToPython(Exception):
+    """遇到无法保证输出一致的数据时回退到纯Python发射器"""
+
+
+def dump_yaml(data: Any) -> str:
+    """
+    将数据序列化为YAML字符串，输出与
+    yaml.dump(data, allow_unicode=True, default_flow_style=False, sort_keys=False) 完全一致
+    :param data: 要序列化的数据
+    :return: YAML字符串
+    """
+    if not LIBYAML_AVAILABLE:
+        return _python_dump(data)
+    
+    private_use_chars: Set[str] = set()
+    if not _scan(data, private_use_chars):
+        return _c_dump(data)
+    
+    try:
+        plan = _MaskPlan(private_use_chars)
+        masked = plan.mask(data, {})
+    except _FallbackToPython:
+        return _python_dump(data)
+    
+    output = _c_dump(masked).translate(plan.unmask_table)
+    if not plan.quoted:
+        return output
+    return plan.render_quoted(output)
+
+
+def load_yaml(content: str) -> Any:
+    """
+    安全地解析YAML字符串，等价于 yaml.safe_load
+    :param content: YAML字符串
+    :return: 解析后的数据
+    """
+    return yaml.load(content, Loader=_SafeLoader)
+
+
+def _python_dump(data: Any) -> str:
+    return yaml.dump(data, allow_unicode=True, default_flow_style=False, sort_keys=False)
+
+
+def _c_dump(data: Any) -> str:
+    return yaml.dump(data, Dumper=_CDumper, allow_unicode=True, default_flow_style=False, sort_keys=False)
+
+
+def _scan(data: Any, private_use_chars: Set[str], is_key: bool = False) -> bool:
+    """收集数据中出现的私有区字符，返回是否存在需要处理的字符串"""
+    if isinstance(data, str):
+        if _SPECIAL_PATTERN.search(data):
+            private_use_chars.update(_PRIVATE_USE_PATTERN.findall(data))
+            return True
+        # 两种实现判断简单键的规则不同，这类键交给 mask 回退处理
+        return is_key and not _is_plain_simple_key(data)
+    
+    found = False
+    if isinstance(data, dict):
+        for key, value in data.items():
+            found = _scan(key, private_use_chars, is_key=True) | found
+            found = _scan(value, private_use_chars) | found
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            found = _scan(item, private_use_chars) | found
+    return found
+
+
+def _is_plain_simple_key(key: str) -> bool:
+    """
+    判断键在两种实现中是否都会输出为简单键（key: value），
+    空键、多行键和过长的键在纯Python发射器中会输出为复杂键（? key）
+    """
+    if not key or _LINE_BREAK_PATTERN.search(key):
+        return False
+    # 纯Python按字符数、libyaml按UTF-8字节数限制简单键长度
+    return len(key) < 32 or len(key.encode('utf-8')) < 128
+
+
+class _MaskPlan:
+    """记录占位字符的分配，以及需要由纯Python发射器渲染的引号字符串"""
+    
+    def __init__(self, private_use_chars: Set[str]):
+        self._free_chars = (
+            chr(code) for code in range(_PRIVATE_USE_START, _PRIVATE_USE_END + 1)
+            if chr(code) not in private_use_chars
+        )
+        self._mask_table: Dict[str, str] = {}
+        self.unmask_table: Dict[int, str] = {}
+        self.quoted: List[Tuple[str, bool]] = []
+        # 引号字符串的占位标记形如 <marker>序号<marker>，libyaml会将其输出为普通标量
+        self._marker = self._allocate()
+        self._token_pattern = re.compile(f'{self._marker}(\\d+){self._marker}')
+    
+    def _allocate(self) -> str:
+        """分配一个数据中未使用的私有区字符，用完时回退到纯Python实现"""
+        char = next(self._free_chars, None)
+        if char is None:
+            raise _FallbackToPython()
+        return char
+    
+    def mask(self, data: Any, memo: Dict[int, Any]) -> Any:
+        """返回替换后的数据结构，同一对象只转换一次以保留锚点和别名"""
+        if isinstance(data, str):
+            return self._mask_scalar(data, is_key=False)
+        if not isinstance(data, (dict, list, tuple)):
+            return data
+        if id(data) in memo:
+            return memo[id(data)]
+        
+        if isinstance(data, dict):
+            result = {}
+            memo[id(data)] = result
+            for key, value in data.items():
+                masked_key = self._mask_scalar(key, is_key=True) if isinstance(key, str) else self.mask(key, memo)
+                result[masked_key] = self.mask(value, memo)
+        elif isinstance(data, list):
+            result = []
+            memo[id(data)] = result
+            result.extend(self.mask(item, memo) for item in data)
+        else:
+            result = tuple(self.mask(item, memo) for item in data)
+            memo[id(data)] = result
+        return result
+    
+    def _mask_scalar(self, scalar: str, is_key: bool) -> str:
+        if is_key and not _is_plain_simple_key(scalar):
+            raise _FallbackToPython()
+        
+        if _QUOTED_HINT_PATTERN.search(scalar):
+            analysis = _scalar_analyzer.analyze_scalar(scalar)
+            double_quoted = not analysis.allow_single_quoted
+            if double_quoted or _UNICODE_BREAK_PATTERN.search(scalar):
+                if is_key:
+                    raise _FallbackToPython()
+                self.quoted.append((scalar, double_quoted))
+                return f'{self._marker}{len(self.quoted) - 1}{self._marker}'
+        
+        if _NON_BMP_PATTERN.search(scalar):
+            return _NON_BMP_PATTERN.sub(lambda match: self._placeholder(match.group()), scalar)
+        return scalar
+    
+    def _placeholder(self, char: str) -> str:
+        placeholder = self._mask_table.get(char)
+        if placeholder is None:
+            placeholder = self._allocate()
+            self._mask_table[char] = placeholder
+            self.unmask_table[ord(placeholder)] = char
+        return placeholder
+    
+    def render_quoted(self, output: str) -> str:
+        """用纯Python发射器在占位标记所在的列和缩进处渲染引号字符串"""
+        
+        def replace(match: "re.Match") -> str:
+            start = match.start()
+            line_start = output.rfind('\n', 0, start) + 1
+            column = start - line_start
+            
+            # 跳过行首缩进和序列标记，得到所在节点的起始列
+            node_start = line_start
+            while output[node_start] == ' ':
+                node_start += 1
+            while output.startswith('- ', node_start):
+                node_start += 2
+            node_column = node_start - line_start
+            # 直接作为序列项时与标记对齐，作为映射的值时比键多缩进两列
+            indent = column if column == node_column else node_column + 2
+            
+            stream = io.StringIO()
+            emitter = Emitter(stream, allow_unicode=True)
+            emitter.column = column
+            emitter.indent = indent
+            emitter.whitespace = True
+            emitter.indention = False
+            scalar, double_quoted = self.quoted[int(match.group(1))]
+            if double_quoted:
+                emitter.write_double_quoted(scalar, split=True)
+            else:
+                emitter.write_single_quoted(scalar, split=True)
+            return stream.getvalue()
+        
+        return self._token_pattern.sub(replace, output)
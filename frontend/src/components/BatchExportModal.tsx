@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { WorkflowSummary } from '../types';
+import { WorkflowSummary, ExportJobProgressEvent } from '../types';
 import AppTypeTag from './AppTypeTag';
 
 interface BatchExportModalProps {
@@ -8,6 +8,9 @@ interface BatchExportModalProps {
   onConfirm: (includeSecret: boolean, exportFormat: 'zip' | 'individual') => void;
   selectedWorkflows: WorkflowSummary[];
   hasSecretVariables: boolean;
+  exporting?: boolean;
+  exportEvents?: ExportJobProgressEvent[];
+  onCancelExport?: () => void;
 }
 
 const BatchExportModal: React.FC<BatchExportModalProps> = ({
@@ -15,16 +18,22 @@ const BatchExportModal: React.FC<BatchExportModalProps> = ({
   onClose,
   onConfirm,
   selectedWorkflows,
-  hasSecretVariables
+  hasSecretVariables,
+  exporting = false,
+  exportEvents = [],
+  onCancelExport
 }) => {
   const [includeSecret, setIncludeSecret] = useState(false);
   const [exportFormat, setExportFormat] = useState<'zip' | 'individual'>('zip');
 
+  // 导出完成后由父组件关闭弹窗，导出过程中在弹窗内实时显示每个应用的导出结果
   const handleConfirm = () => {
     onConfirm(includeSecret, exportFormat);
-    onClose();
   };
 
+  const completedCount = exportEvents.length;
+  const failedCount = exportEvents.filter(event => event.status === 'failed').length;
+
   if (!isOpen) return null;
 
   return (
@@ -129,19 +138,80 @@ const BatchExportModal: React.FC<BatchExportModalProps> = ({
           </div>
         )}
 
+        {exporting && exportFormat === 'zip' && (
+          <div className="mb-6">
+            <div className="flex justify-between items-center mb-2">
+              <h4 className="text-md font-medium">导出进度</h4>
+              <span className="text-sm text-gray-600">
+                {completedCount} / {selectedWorkflows.length}
+                {failedCount > 0 && <span className="text-red-600 ml-2">失败 {failedCount}</span>}
+              </span>
+            </div>
+            <div className="w-full bg-gray-200 rounded-full h-2 mb-3">
+              <div
+                className="bg-green-600 h-2 rounded-full transition-all duration-300"
+                style={{ width: `${selectedWorkflows.length > 0 ? (completedCount / selectedWorkflows.length) * 100 : 0}%` }}
+              ></div>
+            </div>
+            <div className="max-h-48 overflow-y-auto border border-gray-200 rounded-lg">
+              {exportEvents.length === 0 && (
+                <div className="p-3 text-sm text-gray-500">等待导出开始...</div>
+              )}
+              {exportEvents.map((event) => (
+                <div key={event.index} className="px-3 py-2 border-b last:border-b-0 flex justify-between items-center text-sm">
+                  <div className="flex-1 truncate">
+                    {event.status === 'success' ? (
+                      <span className="text-green-600 mr-2">✓</span>
+                    ) : (
+                      <span className="text-red-600 mr-2">✗</span>
+                    )}
+                    <span className="font-medium">{event.workflow_name || event.app_id}</span>
+                    {event.status === 'success' ? (
+                      <span className="text-gray-500 ml-2">{event.filename}</span>
+                    ) : (
+                      <span className="text-red-600 ml-2">{event.error}</span>
+                    )}
+                  </div>
+                  {event.duration_ms !== undefined && (
+                    <span className="text-xs text-gray-500 ml-2">{event.duration_ms} ms</span>
+                  )}
+                </div>
+              ))}
+            </div>
+          </div>
+        )}
+
         <div className="flex justify-end space-x-4">
-          <button
-            onClick={onClose}
-            className="px-4 py-2 text-gray-600 border border-gray-300 rounded hover:bg-gray-50"
-          >
-            取消
-          </button>
-          <button
-            onClick={handleConfirm}
-            className="px-4 py-2 bg-green-600 text-white rounded hover:bg-green-700"
-          >
-            确认导出
-          </button>
+          {exporting && exportFormat === 'zip' ? (
+            <button
+              onClick={onCancelExport}
+              className="px-4 py-2 text-red-600 border border-red-300 rounded hover:bg-red-50"
+            >
+              取消导出
+            </button>
+          ) : exporting ? (
+            <button
+              disabled
+              className="px-4 py-2 bg-green-600 text-white rounded opacity-50 cursor-not-allowed"
+            >
+              导出中...
+            </button>
+          ) : (
+            <>
+              <button
+                onClick={onClose}
+                className="px-4 py-2 text-gray-600 border border-gray-300 rounded hover:bg-gray-50"
+              >
+                取消
+              </button>
+              <button
+                onClick={handleConfirm}
+                className="px-4 py-2 bg-green-600 text-white rounded hover:bg-green-700"
+              >
+                确认导出
+              </button>
+            </>
+          )}
         </div>
       </div>
     </div>
@@ -1,5 +1,5 @@
 import React, { useState, useRef, useCallback } from 'react';
-import { BatchImportRequest, BatchImportResponse, WorkflowImportFile } from '../types';
+import { BatchImportRequest, BatchImportResponse, BatchImportResult, WorkflowImportFile } from '../types';
 import { ApiService } from '../services/api';
 import TargetInstanceSelector from './TargetInstanceSelector';
 
@@ -32,8 +32,12 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
   const [error, setError] = useState<string | null>(null);
   const [importResult, setImportResult] = useState<BatchImportResponse | null>(null);
   const [isCompleted, setIsCompleted] = useState(false);
+  const [progressResults, setProgressResults] = useState<BatchImportResult[]>([]);
+  const [importTotal, setImportTotal] = useState(0);
+  const [isCancelled, setIsCancelled] = useState(false);
   
   const fileInputRef = useRef<HTMLInputElement>(null);
+  const abortControllerRef = useRef<AbortController | null>(null);
 
   const validateFile = async (file: File): Promise<{ valid: boolean; error?: string; app_info?: any }> => {
     try {
@@ -137,10 +141,17 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
       return;
     }
 
+    const abortController = new AbortController();
+    abortControllerRef.current = abortController;
+    const received: BatchImportResult[] = [];
+
     try {
       setLoading(true);
       setError(null);
       setImportResult(null);
+      setProgressResults([]);
+      setImportTotal(validFiles.length);
+      setIsCancelled(false);
 
       const request: BatchImportRequest = {
         target_instance_id: targetInstanceId,
@@ -153,7 +164,13 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
         import_options: importOptions
       };
 
-      const result = await ApiService.batchImportWorkflows(request);
+      // 每导入完一个文件实时显示结果
+      const summary = await ApiService.streamBatchImport(request, (event) => {
+        received.push(event);
+        setProgressResults([...received]);
+      }, abortController.signal);
+      
+      const result: BatchImportResponse = { ...summary, results: received };
       setImportResult(result);
       setIsCompleted(true);
       
@@ -162,17 +179,44 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
       }
 
     } catch (err) {
-      setError(err instanceof Error ? err.message : '批量导入失败');
+      if (abortController.signal.aborted) {
+        // 取消后展示已完成部分的结果，剩余文件不再导入
+        const successCount = received.filter(r => r.success).length;
+        const result: BatchImportResponse = {
+          results: received,
+          success_count: successCount,
+          total_count: validFiles.length,
+          failed_count: received.length - successCount,
+          warning_count: received.filter(r => r.success && (r.status === 'completed-with-warnings' || r.status === 'pending')).length
+        };
+        setImportResult(result);
+        setIsCancelled(true);
+        setIsCompleted(true);
+        
+        if (result.success_count > 0) {
+          onImportSuccess?.(result);
+        }
+      } else {
+        setError(err instanceof Error ? err.message : '批量导入失败');
+      }
     } finally {
+      abortControllerRef.current = null;
       setLoading(false);
     }
   };
 
+  const cancelImport = () => {
+    abortControllerRef.current?.abort();
+  };
+
   const reset = () => {
     setFiles([]);
     setError(null);
     setImportResult(null);
     setIsCompleted(false);
+    setProgressResults([]);
+    setImportTotal(0);
+    setIsCancelled(false);
     if (fileInputRef.current) {
       fileInputRef.current.value = '';
     }
@@ -381,6 +425,45 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
                 </div>
               )}
 
+              {/* 导入进度 */}
+              {loading && (
+                <div>
+                  <div className="flex justify-between items-center mb-2">
+                    <label className="block text-sm font-medium text-gray-700">导入进度</label>
+                    <span className="text-sm text-gray-600">
+                      {progressResults.length} / {importTotal}
+                    </span>
+                  </div>
+                  <div className="w-full bg-gray-200 rounded-full h-2 mb-3">
+                    <div
+                      className="bg-blue-600 h-2 rounded-full transition-all duration-300"
+                      style={{ width: `${importTotal > 0 ? (progressResults.length / importTotal) * 100 : 0}%` }}
+                    ></div>
+                  </div>
+                  <div className="max-h-48 overflow-y-auto border border-gray-200 rounded-lg">
+                    {progressResults.length === 0 && (
+                      <div className="p-3 text-sm text-gray-500">等待导入开始...</div>
+                    )}
+                    {progressResults.map((result, index) => (
+                      <div key={index} className="px-3 py-2 border-b last:border-b-0 flex justify-between items-center text-sm">
+                        <div className="flex-1 truncate">
+                          {result.success ? (
+                            <span className="text-green-500 mr-2">✓</span>
+                          ) : (
+                            <span className="text-red-500 mr-2">✗</span>
+                          )}
+                          <span className="font-medium">{result.filename}</span>
+                          {result.error && <span className="text-red-600 ml-2">{result.error}</span>}
+                        </div>
+                        {result.duration_ms !== undefined && (
+                          <span className="text-xs text-gray-500 ml-2">{result.duration_ms} ms</span>
+                        )}
+                      </div>
+                    ))}
+                  </div>
+                </div>
+              )}
+
               {/* 错误消息 */}
               {error && (
                 <div className="p-3 bg-red-50 border border-red-200 rounded-md">
@@ -395,7 +478,9 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
             /* 导入结果 */
             <div className="space-y-4">
               <div className="text-center">
-                <h3 className="text-lg font-medium text-gray-900 mb-2">批量导入完成</h3>
+                <h3 className="text-lg font-medium text-gray-900 mb-2">
+                  {isCancelled ? '批量导入已取消' : '批量导入完成'}
+                </h3>
                 {importResult && (
                   <div className="grid grid-cols-1 md:grid-cols-4 gap-4 mb-6">
                     <div className="bg-blue-50 p-3 rounded-lg text-center">
@@ -482,11 +567,10 @@ const BatchImportModal: React.FC<BatchImportModalProps> = ({
                 
                 <div className="flex space-x-3">
                   <button
-                    onClick={handleClose}
-                    disabled={loading}
-                    className="px-6 py-2 border border-gray-300 text-gray-700 rounded-md hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed"
+                    onClick={loading ? cancelImport : handleClose}
+                    className="px-6 py-2 border border-gray-300 text-gray-700 rounded-md hover:bg-gray-50"
                   >
-                    取消
+                    {loading ? '取消导入' : '取消'}
                   </button>
                   
                   <button
@@ -5,6 +5,9 @@ interface PaginationProps {
   pagination: PaginationInfo;
   onPageChange: (page: number) => void;
   onPageSizeChange: (pageSize: number) => void;
+  // 游标分页：提供时上一页/下一页按钮使用游标翻页，页码按钮仍按页码跳转
+  onNextPage?: () => void;
+  onPrevPage?: () => void;
   loading?: boolean;
 }
 
@@ -12,6 +15,8 @@ const Pagination: React.FC<PaginationProps> = ({
   pagination,
   onPageChange,
   onPageSizeChange,
+  onNextPage,
+  onPrevPage,
   loading = false
 }) => {
   const { page, page_size, total, total_pages, has_next, has_prev } = pagination;
@@ -91,7 +96,7 @@ const Pagination: React.FC<PaginationProps> = ({
 
         {/* 上一页 */}
         <button
-          onClick={() => onPageChange(page - 1)}
+          onClick={() => (onPrevPage ? onPrevPage() : onPageChange(page - 1))}
           disabled={!has_prev || loading}
           className="px-3 py-1 text-sm border border-gray-300 rounded hover:bg-gray-50 disabled:bg-gray-100 disabled:cursor-not-allowed"
         >
@@ -151,7 +156,7 @@ const Pagination: React.FC<PaginationProps> = ({
 
         {/* 下一页 */}
         <button
-          onClick={() => onPageChange(page + 1)}
+          onClick={() => (onNextPage ? onNextPage() : onPageChange(page + 1))}
           disabled={!has_next || loading}
           className="px-3 py-1 text-sm border border-gray-300 rounded hover:bg-gray-50 disabled:bg-gray-100 disabled:cursor-not-allowed"
         >
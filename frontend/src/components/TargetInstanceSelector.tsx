@@ -301,6 +301,17 @@ const TargetInstanceSelector: React.FC<TargetInstanceSelectorProps> = ({
               <span className="text-gray-800">{selectedInstanceDetails.auth_type}</span>
             </div>
             
+            {selectedInstanceDetails.circuit && selectedInstanceDetails.circuit.state !== 'closed' && (
+              <div className="flex items-center justify-between">
+                <span className="text-gray-600">熔断状态:</span>
+                <span className="text-red-600" title={selectedInstanceDetails.circuit.last_error || undefined}>
+                  {selectedInstanceDetails.circuit.state === 'open'
+                    ? `已熔断，${Math.ceil(selectedInstanceDetails.circuit.retry_in)} 秒后重试`
+                    : '恢复中'}
+                </span>
+              </div>
+            )}
+            
             <div className="flex items-center justify-between">
               <span className="text-gray-600">连接状态:</span>
               <div className="flex items-center space-x-1">
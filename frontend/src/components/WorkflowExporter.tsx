@@ -49,9 +49,12 @@ const WorkflowExporter: React.FC = () => {
     error: batchError,
     searchKeyword,
     exportProgress,
+    exportEvents,
     getAllWorkflows,
     refreshWorkflows,
     goToPage,
+    goToNextPage,
+    goToPrevPage,
     changePageSize,
     handleSearch,
     toggleWorkflowSelection,
@@ -62,6 +65,7 @@ const WorkflowExporter: React.FC = () => {
     toggleAllInCurrentPage,
     clearAllSelections,
     batchExportWorkflows,
+    cancelBatchExport,
     downloadIndividualFiles,
   } = useBatchWorkflowExport();
 
@@ -110,7 +114,7 @@ const WorkflowExporter: React.FC = () => {
   const handleConfirmBatchExport = async (includeSecret: boolean, exportFormat: 'zip' | 'individual') => {
     const response = await batchExportWorkflows(includeSecret, exportFormat);
     
-    if (response && exportFormat === 'individual' && response.results) {
+    if (response && response.export_format === 'individual') {
       downloadIndividualFiles(response.results);
     }
     
@@ -370,10 +374,23 @@ const WorkflowExporter: React.FC = () => {
                   <div className="mb-4 p-4 bg-blue-50 rounded-lg">
                     <div className="flex items-center justify-between mb-2">
                       <span className="text-sm font-medium text-blue-800">导出进度</span>
-                      <span className="text-sm text-blue-600">
-                        {exportProgress.current} / {exportProgress.total}
-                      </span>
+                      <div className="flex items-center gap-3">
+                        <span className="text-sm text-blue-600">
+                          {exportProgress.current} / {exportProgress.total}
+                        </span>
+                        <button
+                          onClick={cancelBatchExport}
+                          className="text-sm text-red-600 hover:text-red-800"
+                        >
+                          取消
+                        </button>
+                      </div>
                     </div>
+                    {exportProgress.currentWorkflow && (
+                      <div className="text-xs text-blue-600 mb-2">
+                        已完成: {exportProgress.currentWorkflow}
+                      </div>
+                    )}
                     <div className="w-full bg-blue-200 rounded-full h-2">
                       <div 
                         className="bg-blue-600 h-2 rounded-full transition-all duration-300"
@@ -448,6 +465,8 @@ const WorkflowExporter: React.FC = () => {
                   pagination={pagination}
                   onPageChange={goToPage}
                   onPageSizeChange={changePageSize}
+                  onNextPage={goToNextPage}
+                  onPrevPage={goToPrevPage}
                   loading={batchLoading}
                 />
               </div>
@@ -642,6 +661,9 @@ const WorkflowExporter: React.FC = () => {
         onConfirm={handleConfirmBatchExport}
         selectedWorkflows={selectedWorkflowsData}
         hasSecretVariables={hasSecretVariables}
+        exporting={batchExporting}
+        exportEvents={exportEvents}
+        onCancelExport={cancelBatchExport}
       />
 
       <BatchImportModal
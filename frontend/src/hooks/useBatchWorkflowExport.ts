@@ -1,6 +1,11 @@
-import { useState, useCallback } from 'react';
+import { useState, useCallback, useRef } from 'react';
 import { ApiService } from '../services/api';
-import { WorkflowSummary, BatchExportRequest, BatchExportResponse, PaginationInfo, WorkflowListParams } from '../types';
+import { WorkflowSummary, BatchExportRequest, BatchExportResponse, BatchExportZipResult, ExportJob, ExportJobProgressEvent, PaginationInfo, WorkflowListParams } from '../types';
+
+// 无法使用SSE时导出任务状态的轮询间隔(毫秒)
+const EXPORT_JOB_POLL_INTERVAL = 1000;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
 
 export const useBatchWorkflowExport = () => {
   const [workflows, setWorkflows] = useState<WorkflowSummary[]>([]);
@@ -23,10 +28,21 @@ export const useBatchWorkflowExport = () => {
     total: number;
     currentWorkflow?: string;
   }>({ current: 0, total: 0 });
+  const [exportEvents, setExportEvents] = useState<ExportJobProgressEvent[]>([]);
+  const exportJobIdRef = useRef<string | null>(null);
+  // 游标分页：记录依次翻页时每一页使用的游标，返回上一页时出栈，按页码跳转后清空
+  const cursorStackRef = useRef<(string | undefined)[]>([]);
+  const currentCursorRef = useRef<string | undefined>(undefined);
+  
+  const resetCursors = () => {
+    cursorStackRef.current = [];
+    currentCursorRef.current = undefined;
+  };
 
   const getAllWorkflows = useCallback(async (params: WorkflowListParams = {}) => {
     setLoading(true);
     setError(null);
+    resetCursors();
     
     try {
       const response = await ApiService.getAllWorkflows({
@@ -64,6 +80,7 @@ export const useBatchWorkflowExport = () => {
   const refreshWorkflows = useCallback(async () => {
     setLoading(true);
     setError(null);
+    resetCursors();
     
     try {
       // 先调用刷新接口清除缓存
@@ -92,6 +109,7 @@ export const useBatchWorkflowExport = () => {
 
   const goToPage = useCallback(async (page: number) => {
     if (page >= 1 && page <= pagination.total_pages) {
+      resetCursors();
       try {
         // 先获取目标页面的数据，以便知道哪些选择需要保留
         const response = await ApiService.getAllWorkflows({ 
@@ -126,7 +144,72 @@ export const useBatchWorkflowExport = () => {
     }
   }, [pagination.page_size, pagination.total_pages, searchKeyword, getAllWorkflows]);
 
+  // 按游标加载一页，after 为空时按页码加载
+  const loadCursorPage = useCallback(async (after: string | undefined, page: number): Promise<boolean> => {
+    setLoading(true);
+    setError(null);
+    
+    try {
+      const response = await ApiService.getAllWorkflows({
+        page,
+        page_size: pagination.page_size,
+        search: searchKeyword,
+        after
+      });
+      
+      // 只保留目标页面的选择，清除其他页面的选择
+      const targetPageAppIds = new Set(response.workflows.map(w => w.app_id));
+      setSelectedWorkflows(prev => {
+        const newSelection = new Set();
+        prev.forEach(appId => {
+          if (targetPageAppIds.has(appId)) {
+            newSelection.add(appId);
+          }
+        });
+        return newSelection;
+      });
+      
+      setWorkflows(response.workflows);
+      setPagination(response.pagination);
+      currentCursorRef.current = after;
+      return true;
+      
+    } catch (err: any) {
+      setError(err.message);
+      return false;
+    } finally {
+      setLoading(false);
+    }
+  }, [pagination.page_size, searchKeyword]);
+
+  // 下一页使用游标，深页与第一页的查询代价相同
+  const goToNextPage = useCallback(async () => {
+    if (!pagination.next_cursor) {
+      goToPage(pagination.page + 1);
+      return;
+    }
+    
+    const previousCursor = currentCursorRef.current;
+    if (await loadCursorPage(pagination.next_cursor, pagination.page + 1)) {
+      cursorStackRef.current.push(previousCursor);
+    }
+  }, [pagination.next_cursor, pagination.page, goToPage, loadCursorPage]);
+
+  // 上一页使用栈中记录的游标；栈为空时（例如按页码跳转后）按页码加载
+  const goToPrevPage = useCallback(async () => {
+    const stack = cursorStackRef.current;
+    if (stack.length === 0) {
+      goToPage(pagination.page - 1);
+      return;
+    }
+    
+    if (await loadCursorPage(stack[stack.length - 1], pagination.page - 1)) {
+      stack.pop();
+    }
+  }, [pagination.page, goToPage, loadCursorPage]);
+
   const changePageSize = useCallback(async (pageSize: number) => {
+    resetCursors();
     try {
       // 获取新页面大小的第一页数据
       const response = await ApiService.getAllWorkflows({ 
@@ -162,6 +245,7 @@ export const useBatchWorkflowExport = () => {
 
   const handleSearch = useCallback(async (keyword: string) => {
     setSearchKeyword(keyword);
+    resetCursors();
     
     try {
       // 搜索时获取第一页数据
@@ -275,7 +359,7 @@ export const useBatchWorkflowExport = () => {
   const batchExportWorkflows = useCallback(async (
     includeSecret: boolean = false,
     exportFormat: 'zip' | 'individual' = 'zip'
-  ): Promise<BatchExportResponse | null> => {
+  ): Promise<BatchExportResponse | BatchExportZipResult | null> => {
     if (selectedWorkflows.size === 0) {
       setError('请选择至少一个工作流');
       return null;
@@ -284,6 +368,7 @@ export const useBatchWorkflowExport = () => {
     setExporting(true);
     setError(null);
     setExportProgress({ current: 0, total: selectedWorkflows.size });
+    setExportEvents([]);
 
     try {
       const request: BatchExportRequest = {
@@ -292,13 +377,48 @@ export const useBatchWorkflowExport = () => {
         export_format: exportFormat
       };
 
-      const response = await ApiService.batchExportWorkflows(request);
-      
-      // 处理ZIP文件下载
-      if (response.export_format === 'zip' && response.data && response.filename) {
-        downloadZipFile(response.data, response.filename);
+      // ZIP格式创建后台导出任务，通过SSE接收每个应用的导出结果，完成后下载生成的ZIP包
+      if (exportFormat === 'zip') {
+        let job: ExportJob;
+        try {
+          job = await ApiService.createExportJob(request.app_ids, includeSecret);
+        } catch {
+          // 无法创建导出任务时回退为直接流式下载ZIP包
+          const result = await ApiService.downloadBatchExportZip(request);
+          downloadZipFile(result.blob, result.filename);
+          setExportProgress({ current: result.total_count, total: result.total_count });
+          return result;
+        }
+        exportJobIdRef.current = job.job_id;
+        
+        try {
+          job = await watchExportJobEvents(job.job_id);
+        } catch {
+          job = await pollExportJob(job.job_id);
+        }
+        
+        if (job.status === 'cancelled') {
+          setError('导出已取消');
+          return null;
+        }
+        if (job.status !== 'completed') {
+          throw new Error(job.error || '导出任务失败');
+        }
+        
+        const blob = await ApiService.downloadExportJob(job.job_id);
+        downloadZipFile(blob, job.filename);
+        
+        return {
+          export_format: 'zip',
+          job_id: job.job_id,
+          filename: job.filename,
+          blob,
+          success_count: job.success_count,
+          total_count: job.total_count
+        };
       }
 
+      const response = await ApiService.batchExportWorkflows(request);
       setExportProgress({ current: response.success_count, total: response.total_count });
       
       return response;
@@ -306,21 +426,75 @@ export const useBatchWorkflowExport = () => {
       setError(err.message);
       return null;
     } finally {
+      exportJobIdRef.current = null;
       setExporting(false);
     }
   }, [selectedWorkflows]);
 
-  const downloadZipFile = useCallback((base64Data: string, filename: string) => {
-    try {
-      // 将base64转换为Blob
-      const byteCharacters = atob(base64Data);
-      const byteNumbers = new Array(byteCharacters.length);
-      for (let i = 0; i < byteCharacters.length; i++) {
-        byteNumbers[i] = byteCharacters.charCodeAt(i);
+  // 订阅导出任务的SSE事件，任务结束时返回最终状态
+  const watchExportJobEvents = (jobId: string) => new Promise<ExportJob>((resolve, reject) => {
+    if (typeof EventSource === 'undefined') {
+      reject(new Error('EventSource is not supported'));
+      return;
+    }
+    
+    const source = ApiService.subscribeExportJobEvents(jobId);
+    
+    source.addEventListener('progress', (e) => {
+      const event: ExportJobProgressEvent = JSON.parse((e as MessageEvent).data);
+      setExportEvents(prev => [...prev, event]);
+      setExportProgress({
+        current: event.completed_count,
+        total: event.total_count,
+        currentWorkflow: event.workflow_name
+      });
+    });
+    
+    source.addEventListener('done', (e) => {
+      source.close();
+      resolve(JSON.parse((e as MessageEvent).data));
+    });
+    
+    source.onerror = () => {
+      // 连接中断时浏览器会自动重连，只有连接被关闭时才改为轮询
+      if (source.readyState === EventSource.CLOSED) {
+        reject(new Error('导出进度连接已断开'));
       }
-      const byteArray = new Uint8Array(byteNumbers);
-      const blob = new Blob([byteArray], { type: 'application/zip' });
+    };
+  });
+
+  // 轮询导出任务状态，直到任务结束
+  const pollExportJob = async (jobId: string): Promise<ExportJob> => {
+    let job = await ApiService.getExportJob(jobId);
+    
+    while (job.status === 'pending' || job.status === 'running') {
+      await sleep(EXPORT_JOB_POLL_INTERVAL);
+      job = await ApiService.getExportJob(jobId);
+      
+      const lastFinished = job.items?.filter(item => item.status !== 'pending').pop();
+      setExportProgress({
+        current: job.completed_count,
+        total: job.total_count,
+        currentWorkflow: lastFinished?.workflow_name
+      });
+    }
+    
+    return job;
+  };
 
+  const cancelBatchExport = useCallback(async () => {
+    const jobId = exportJobIdRef.current;
+    if (!jobId) return;
+    
+    try {
+      await ApiService.cancelExportJob(jobId);
+    } catch (err: any) {
+      setError(err.message);
+    }
+  }, []);
+
+  const downloadZipFile = useCallback((blob: Blob, filename: string) => {
+    try {
       // 创建下载链接
       const url = window.URL.createObjectURL(blob);
       const link = document.createElement('a');
@@ -361,9 +535,12 @@ export const useBatchWorkflowExport = () => {
     error,
     searchKeyword,
     exportProgress,
+    exportEvents,
     getAllWorkflows,
     refreshWorkflows,
     goToPage,
+    goToNextPage,
+    goToPrevPage,
     changePageSize,
     handleSearch,
     toggleWorkflowSelection,
@@ -374,6 +551,7 @@ export const useBatchWorkflowExport = () => {
     toggleAllInCurrentPage,
     clearAllSelections,
     batchExportWorkflows,
+    cancelBatchExport,
     downloadIndividualFiles,
   };
 }; 
\ No newline at end of file
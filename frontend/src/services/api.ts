@@ -4,10 +4,13 @@ import {
   WorkflowListParams, 
   BatchExportRequest, 
   BatchExportResponse,
+  BatchExportZipResult,
+  ExportJob,
   WorkflowImportRequest,
   WorkflowImportResponse,
   BatchImportRequest,
   BatchImportResponse,
+  BatchImportProgressEvent,
   DifyInstance
 } from '../types';
 
@@ -57,6 +60,9 @@ export class ApiService {
     if (params.search) {
       searchParams.append('search', params.search);
     }
+    if (params.after) {
+      searchParams.append('after', params.after);
+    }
     
     const url = `${API_BASE_URL}/workflows${searchParams.toString() ? '?' + searchParams.toString() : ''}`;
     
@@ -90,6 +96,110 @@ export class ApiService {
     return response.json();
   }
   
+  // 以二进制流方式直接下载批量导出的ZIP包，无法创建导出任务时使用，边接收边回调已接收的字节数
+  static async downloadBatchExportZip(
+    request: BatchExportRequest,
+    onProgress?: (receivedBytes: number) => void
+  ): Promise<BatchExportZipResult> {
+    const response = await fetch(`${API_BASE_URL}/workflows/batch-export`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ ...request, export_format: 'zip' }),
+    });
+    
+    if (!response.ok || !response.body) {
+      throw new Error(`Batch export failed: ${response.statusText}`);
+    }
+    
+    const reader = response.body.getReader();
+    const chunks: Uint8Array[] = [];
+    let receivedBytes = 0;
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      chunks.push(value);
+      receivedBytes += value.length;
+      onProgress?.(receivedBytes);
+    }
+    
+    const disposition = response.headers.get('Content-Disposition') || '';
+    const filenameMatch = disposition.match(/filename="?([^"]+)"?/);
+    
+    return {
+      export_format: 'zip',
+      filename: filenameMatch ? filenameMatch[1] : `workflows-export-${Date.now()}.zip`,
+      blob: new Blob(chunks, { type: 'application/zip' }),
+      total_count: Number(response.headers.get('X-Export-Total') || request.app_ids.length),
+    };
+  }
+
+  // 异步导出任务相关API
+  static async createExportJob(appIds: string[], includeSecret: boolean = false): Promise<ExportJob> {
+    const response = await fetch(`${API_BASE_URL}/export-jobs`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ app_ids: appIds, include_secret: includeSecret }),
+    });
+    
+    if (!response.ok) {
+      throw new Error(`Create export job failed: ${response.statusText}`);
+    }
+    
+    return response.json();
+  }
+  
+  static async getExportJob(jobId: string): Promise<ExportJob> {
+    const response = await fetch(`${API_BASE_URL}/export-jobs/${jobId}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+    
+    if (!response.ok) {
+      throw new Error(`Get export job failed: ${response.statusText}`);
+    }
+    
+    return response.json();
+  }
+  
+  static async cancelExportJob(jobId: string): Promise<ExportJob> {
+    const response = await fetch(`${API_BASE_URL}/export-jobs/${jobId}`, {
+      method: 'DELETE',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+    
+    if (!response.ok) {
+      throw new Error(`Cancel export job failed: ${response.statusText}`);
+    }
+    
+    return response.json();
+  }
+  
+  // 订阅导出任务的SSE进度事件（progress / done），断线时浏览器会携带 Last-Event-ID 自动重连
+  static subscribeExportJobEvents(jobId: string): EventSource {
+    return new EventSource(`${API_BASE_URL}/export-jobs/${jobId}/events`);
+  }
+  
+  static async downloadExportJob(jobId: string): Promise<Blob> {
+    const response = await fetch(`${API_BASE_URL}/export-jobs/${jobId}/download`, {
+      method: 'GET',
+    });
+    
+    if (!response.ok) {
+      throw new Error(`Download export job failed: ${response.statusText}`);
+    }
+    
+    return response.blob();
+  }
+  
   static async refreshWorkflows(): Promise<{ success: boolean; message: string }> {
     const response = await fetch(`${API_BASE_URL}/workflows/refresh`, {
       method: 'POST',
@@ -157,6 +267,62 @@ export class ApiService {
     return response.json();
   }
 
+  // 以SSE方式批量导入，每导入完一个文件回调一次；通过 signal 中断请求即取消剩余文件的导入
+  static async streamBatchImport(
+    request: BatchImportRequest,
+    onProgress: (event: BatchImportProgressEvent) => void,
+    signal?: AbortSignal
+  ): Promise<Omit<BatchImportResponse, 'results'>> {
+    const response = await fetch(`${API_BASE_URL}/workflows/batch-import/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(request),
+      signal,
+    });
+    
+    if (!response.ok || !response.body) {
+      throw new Error(`Batch import failed: ${response.statusText}`);
+    }
+    
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += value;
+      
+      // 事件之间以空行分隔
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+        
+        let eventName = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+          if (line.startsWith('event: ')) eventName = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        if (!data) continue;
+        
+        const payload = JSON.parse(data);
+        if (eventName === 'progress') {
+          onProgress(payload);
+        } else if (eventName === 'done') {
+          return payload;
+        } else if (eventName === 'error') {
+          throw new Error(payload.error);
+        }
+      }
+    }
+    
+    throw new Error('Batch import stream ended unexpectedly');
+  }
+
   static async getTargetInstances(): Promise<{ instances: DifyInstance[] }> {
     const response = await fetch(`${API_BASE_URL}/target-instances`, {
       method: 'GET',
@@ -65,26 +65,43 @@ export interface PaginationInfo {
   total_pages: number;
   has_next: boolean;
   has_prev: boolean;
+  // 游标分页：下一页的游标，没有下一页时为空
+  next_cursor?: string | null;
 }
 
 export interface WorkflowListResponse {
   workflows: WorkflowSummary[];
   pagination: PaginationInfo;
   stats?: Record<string, number>; // 添加全量应用类型统计
+  cache?: CacheInfo | null; // 应用列表缓存状态，仅API模式返回
+}
+
+export interface CacheInfo {
+  age: number; // 缓存已存在的秒数
+  ttl: number;
+  stale: boolean; // 已过期，正在使用旧数据
+  refreshing: boolean; // 后台刷新是否进行中
 }
 
 export interface WorkflowListParams {
   page?: number;
   page_size?: number;
   search?: string;
+  // 游标分页：传入上一页返回的 next_cursor，深页与第一页查询代价相同
+  after?: string;
 }
 
 export interface BatchExportRequest {
   app_ids: string[];
   include_secret: boolean;
   export_format: 'zip' | 'individual';
+  archive_format?: ArchiveFormat;
+  compression_level?: number;
 }
 
+// 打包导出的归档格式，为空时使用后端配置
+export type ArchiveFormat = 'zip' | 'zip-stored' | 'tar.gz' | 'tar.xz' | 'tar.zst';
+
 export interface BatchExportResult {
   app_id: string;
   success: boolean;
@@ -94,14 +111,58 @@ export interface BatchExportResult {
 }
 
 export interface BatchExportResponse {
-  export_format: 'zip' | 'individual';
-  filename?: string;
-  data?: string; // base64 encoded for zip format
+  export_format: 'individual';
   results: BatchExportResult[];
   success_count: number;
   total_count: number;
 }
 
+// ZIP格式通过异步导出任务生成，各文件的导出结果记录在包内的 manifest.json 中
+// 无法创建导出任务而直接流式下载时没有 job_id，成功数量只记录在 manifest.json 中
+export interface BatchExportZipResult {
+  export_format: 'zip';
+  job_id?: string;
+  filename: string;
+  blob: Blob;
+  success_count?: number;
+  total_count: number;
+}
+
+export type ExportJobStatus = 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
+
+export interface ExportJobItem {
+  app_id: string;
+  status: 'pending' | 'success' | 'failed';
+  workflow_name?: string;
+  filename?: string;
+  error?: string;
+  duration_ms?: number;
+}
+
+// 导出任务SSE推送的 progress 事件，每完成一个应用推送一条
+export interface ExportJobProgressEvent extends ExportJobItem {
+  index: number;
+  completed_count: number;
+  total_count: number;
+}
+
+export interface ExportJob {
+  job_id: string;
+  status: ExportJobStatus;
+  total_count: number;
+  completed_count: number;
+  success_count: number;
+  failed_count: number;
+  filename: string;
+  archive_format: ArchiveFormat;
+  archive_size: number;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+  items?: ExportJobItem[];
+}
+
 // 工作流导入相关类型定义
 export interface DifyInstance {
   id: string;
@@ -116,6 +177,15 @@ export interface DifyInstance {
     api_key_header?: string;
   };
   is_default?: boolean;
+  circuit?: CircuitInfo; // 实例熔断器状态
+}
+
+export interface CircuitInfo {
+  enabled: boolean;
+  state: 'closed' | 'open' | 'half_open'; // open 时请求立即失败，half_open 时放行试探请求
+  failures: number; // 连续失败次数
+  retry_in: number; // 熔断剩余秒数
+  last_error?: string | null;
 }
 
 export interface WorkflowImportRequest {
@@ -176,6 +246,15 @@ export interface BatchImportResult {
   status?: WorkflowImportResponse['status'];
   error?: string;
   warnings?: string[];
+  index?: number;
+  duration_ms?: number;
+}
+
+// 批量导入SSE推送的 progress 事件，每导入完一个文件推送一条
+export interface BatchImportProgressEvent extends BatchImportResult {
+  index: number;
+  completed_count: number;
+  total_count: number;
 }
 
 export interface BatchImportResponse {